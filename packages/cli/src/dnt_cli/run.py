@@ -1,18 +1,48 @@
 """Main entry point for DNT Watcher CLI - monitors cabin availability with beautiful output."""
 
+import argparse
 import datetime
+import functools
+import json
 import sys
 
 from colorama import Fore, Style, init
 from dnt_core import (
-    diff_lists,
-    extract_available_dates,
+    DATE_CLOSED,
+    DATE_OPENED,
+    DURATION_LABELS,
+    SATURDAY,
+    SATURDAY_OPENED,
+    STAGES,
+    WEEKEND_OPENED,
+    BreakerBoard,
+    Calendar,
+    CheckPipeline,
+    CheckResult,
+    LeaseQueue,
+    ResponseRecorder,
+    RuleEngine,
+    StateCache,
+    SubscriberIndex,
+    WarmState,
+    availability_at,
+    change_timeline,
+    compile_rules,
+    compile_subscribers,
+    events_of,
+    export_archive,
     extract_cabin_id,
-    find_available_weekends,
+    fleet_booking_velocity,
     get_availability,
+    import_history_files,
     load_cabins,
-    load_latest_files,
-    save_result_as_json,
+    load_rules,
+    load_subscribers,
+    open_intervals,
+    replay_recording,
+    resolve_cabin_id,
+    start_server,
+    subscribed_cabins,
 )
 from dnt_notification import send_notification
 
@@ -25,56 +55,52 @@ def print_date_statistics(dates):
     Prints clean, colorful statistics focused on weekend availability.
 
     Args:
-        dates (list): A list of dates in the format 'YYYY-MM-DD'.
+        dates (Calendar or list): A Calendar, or a list of dates in the format 'YYYY-MM-DD'.
 
     Returns:
         None
     """
-    datetime_dates = [
-        datetime.datetime.strptime(date[:10], "%Y-%m-%d") for date in dates
-    ]
+    calendar = Calendar.from_iso(dates)
 
-    if not datetime_dates:
+    if not calendar:
         print(f"\n{Fore.YELLOW}⚠ No available dates found{Style.RESET_ALL}\n")
         return
 
     # Find weekends
-    weekends = find_available_weekends(dates)
+    weekend_fridays = calendar.weekend_fridays()
 
-    # Count weekday availability
-    weekday_counts = {i: 0 for i in range(7)}  # 0=Monday, 6=Sunday
-    for date in datetime_dates:
-        weekday_counts[date.weekday()] += 1
+    # Count weekday availability (0=Monday, 6=Sunday)
+    weekday_counts = calendar.weekday_counts()
 
     # Print summary
-    total_dates = len(datetime_dates)
+    total_dates = len(calendar)
     print(f"\n{Fore.CYAN}📊 Total available dates:{Style.RESET_ALL} {total_dates}")
 
     # Print weekend availability - THE MOST IMPORTANT PART
-    if weekends:
-        print(f"\n{Fore.GREEN}✓ {len(weekends)} FULL WEEKEND(S) AVAILABLE:{Style.RESET_ALL}")
-        for friday, _ in weekends:
-            saturday = friday + datetime.timedelta(days=1)
-            sunday = friday + datetime.timedelta(days=2)
+    if weekend_fridays:
+        print(f"\n{Fore.GREEN}✓ {len(weekend_fridays)} FULL WEEKEND(S) AVAILABLE:{Style.RESET_ALL}")
+        for friday in weekend_fridays:
+            saturday = datetime.date.fromordinal(friday + 1)
             print(f"  {Fore.GREEN}•{Style.RESET_ALL} {Fore.WHITE}{saturday.strftime('%Y-%m-%d')} (Saturday){Style.RESET_ALL} - Full Fri-Sun weekend")
     else:
         print(f"\n{Fore.RED}✗ No full weekends available{Style.RESET_ALL}")
 
     # Show Saturday availability (even if not full weekends)
-    saturdays = [d for d in datetime_dates if d.weekday() == 5]  # Saturday = 5
-    if saturdays and not weekends:
+    saturdays = calendar.on_weekday(SATURDAY)
+    if saturdays and not weekend_fridays:
         print(f"\n{Fore.YELLOW}📅 {len(saturdays)} Saturday(s) available (but not full weekends):{Style.RESET_ALL}")
         for saturday in saturdays[:5]:  # Show max 5
-            print(f"  {Fore.YELLOW}•{Style.RESET_ALL} {saturday.strftime('%Y-%m-%d')}")
+            print(f"  {Fore.YELLOW}•{Style.RESET_ALL} {datetime.date.fromordinal(saturday).strftime('%Y-%m-%d')}")
         if len(saturdays) > 5:
             print(f"  {Fore.YELLOW}... and {len(saturdays) - 5} more{Style.RESET_ALL}")
-    elif saturdays and weekends:
+    elif saturdays and weekend_fridays:
         # Show how many Saturdays are part of full weekends
-        non_weekend_saturdays = [s for s in saturdays if s not in [w[0] + datetime.timedelta(days=1) for w in weekends]]
+        weekend_saturdays = {friday + 1 for friday in weekend_fridays}
+        non_weekend_saturdays = [s for s in saturdays if s not in weekend_saturdays]
         if non_weekend_saturdays:
             print(f"\n{Fore.YELLOW}📅 {len(non_weekend_saturdays)} additional Saturday(s) (not full weekends):{Style.RESET_ALL}")
             for saturday in non_weekend_saturdays[:3]:
-                print(f"  {Fore.YELLOW}•{Style.RESET_ALL} {saturday.strftime('%Y-%m-%d')}")
+                print(f"  {Fore.YELLOW}•{Style.RESET_ALL} {datetime.date.fromordinal(saturday).strftime('%Y-%m-%d')}")
             if len(non_weekend_saturdays) > 3:
                 print(f"  {Fore.YELLOW}... and {len(non_weekend_saturdays) - 3} more{Style.RESET_ALL}")
 
@@ -88,168 +114,914 @@ def print_date_statistics(dates):
     print(f"  {weekday_summary}")
 
     # Date range
-    earliest = min(datetime_dates)
-    latest = max(datetime_dates)
+    earliest = calendar.first()
+    latest = calendar.last()
     print(f"\n{Fore.CYAN}📆 Range:{Style.RESET_ALL} {earliest.strftime('%Y-%m-%d')} → {latest.strftime('%Y-%m-%d')}")
     print()
 
 
-def print_diff_results(added, removed, cabin_name):
+def notify_changes(events, cabin_name):
     """
-    Print comparison results with colorful output and send notifications.
+    Send a notification for newly opened weekends, Saturdays or dates.
 
     Args:
-        added (list): List of newly added dates.
-        removed (list): List of removed dates.
+        events (list): ChangeEvent objects from compute_events().
         cabin_name (str): Name of the cabin for notifications.
+    """
+    added = events_of(events, DATE_OPENED)
+    if not added:
+        return
+
+    added_weekends = events_of(events, WEEKEND_OPENED)
+    added_saturdays = events_of(events, SATURDAY_OPENED)
+
+    if added_weekends:
+        weekend_str = ", ".join([weekend.day.strftime("%Y-%m-%d") for weekend in added_weekends])
+        send_notification(
+            "DNT Watcher - NEW FULL WEEKENDS!",
+            f"{cabin_name}: {len(added_weekends)} weekend(s)! {weekend_str}",
+        )
+    elif added_saturdays:
+        saturday_str = ", ".join([saturday.day.strftime("%Y-%m-%d") for saturday in added_saturdays[:3]])
+        if len(added_saturdays) > 3:
+            saturday_str += f" +{len(added_saturdays) - 3} more"
+        send_notification(
+            "DNT Watcher - NEW SATURDAYS!",
+            f"{cabin_name}: {len(added_saturdays)} Saturday(s)! {saturday_str}",
+        )
+    else:
+        send_notification(
+            "DNT Watcher", f"{cabin_name}: {len(added)} new date(s) available"
+        )
+
+
+def notify_rule_match(match, cabin_name):
+    """
+    Send a notification for a stay that matched a watch rule.
+
+    Args:
+        match (RuleMatch): The matched stay.
+        cabin_name (str): Name of the cabin for notifications.
+    """
+    stay = f"{match.first_night.strftime('%Y-%m-%d')} → {match.last_night.strftime('%Y-%m-%d')}"
+    send_notification(f"DNT Watcher - {match.rule}", f"{cabin_name}: {match.nights} night(s) {stay}")
+
+
+def send_alerts(result: CheckResult, rules: RuleEngine = None, subscribers: SubscriberIndex = None):
+    """
+    Send the notifications for one cabin's changes.
+
+    Without subscribers, the changes are alerted once. With subscribers,
+    each subscriber is alerted about the changes in their watch windows
+    instead, and nothing is alerted to everyone. In both cases the watch
+    rules decide what is alerted; without rules the built-in weekend,
+    Saturday and new-date alerts apply.
+
+    Args:
+        result (CheckResult): A finished check with changes.
+        rules (RuleEngine): Watch rules, if configured.
+        subscribers (SubscriberIndex): Subscribers to route the changes to.
+    """
+    if subscribers:
+        routed = sorted(subscribers.route(result.cabin_id, result.events).items())
+        audiences = [(f"{result.name} (for {subscriber})", events) for subscriber, events in routed]
+    else:
+        audiences = [(result.name, result.events)]
+
+    for cabin_name, events in audiences:
+        if rules:
+            for match in rules.evaluate(result.cabin_id, events, result.dates):
+                notify_rule_match(match, cabin_name)
+        else:
+            notify_changes(events, cabin_name)
+
+
+def print_diff_results(events, cabin_name):
+    """
+    Print comparison results with colorful output.
+
+    Args:
+        events (list): ChangeEvent objects from compute_events().
+        cabin_name (str): Name of the cabin.
 
     Returns:
         None
     """
-    if not added and not removed:
+    if not events:
         print(f"{Fore.CYAN}ℹ No changes since last check{Style.RESET_ALL}")
         return
 
-    if added:
-        # Check if any new dates are full weekends
-        added_weekends = find_available_weekends(added)
+    added = events_of(events, DATE_OPENED)
+    removed = events_of(events, DATE_CLOSED)
 
-        # Check if any new dates are Saturdays
-        added_dates = [datetime.datetime.strptime(d[:10], "%Y-%m-%d") for d in added]
-        added_saturdays = [d for d in added_dates if d.weekday() == 5]
+    if added:
+        added_weekends = events_of(events, WEEKEND_OPENED)
+        added_saturdays = events_of(events, SATURDAY_OPENED)
 
         if added_weekends:
             print(f"{Fore.GREEN}★ NEW FULL WEEKEND(S) AVAILABLE! ★{Style.RESET_ALL}")
-            for friday, _ in added_weekends:
-                saturday = friday + datetime.timedelta(days=1)
+            for weekend in added_weekends:
+                saturday = weekend.day + datetime.timedelta(days=1)
                 print(f"  {Fore.GREEN}• {saturday.strftime('%Y-%m-%d')} (Saturday){Style.RESET_ALL}")
-
-            # Send notification for new weekends
-            weekend_str = ", ".join([f.strftime("%Y-%m-%d") for f, _ in added_weekends])
-            send_notification(
-                "DNT Watcher - NEW FULL WEEKENDS!",
-                f"{cabin_name}: {len(added_weekends)} weekend(s)! {weekend_str}",
-            )
         elif added_saturdays:
             print(f"{Fore.YELLOW}★ NEW SATURDAY(S) AVAILABLE! ★{Style.RESET_ALL}")
             for saturday in added_saturdays[:5]:
-                print(f"  {Fore.YELLOW}• {saturday.strftime('%Y-%m-%d')} (Saturday){Style.RESET_ALL}")
+                print(f"  {Fore.YELLOW}• {saturday.day.strftime('%Y-%m-%d')} (Saturday){Style.RESET_ALL}")
             if len(added_saturdays) > 5:
                 print(f"  {Fore.YELLOW}... and {len(added_saturdays) - 5} more{Style.RESET_ALL}")
-
-            # Send notification for new Saturdays
-            saturday_str = ", ".join([d.strftime("%Y-%m-%d") for d in added_saturdays[:3]])
-            if len(added_saturdays) > 3:
-                saturday_str += f" +{len(added_saturdays) - 3} more"
-            send_notification(
-                "DNT Watcher - NEW SATURDAYS!",
-                f"{cabin_name}: {len(added_saturdays)} Saturday(s)! {saturday_str}",
-            )
         else:
             print(f"{Fore.GREEN}+ {len(added)} new date(s) available{Style.RESET_ALL}")
-            send_notification(
-                "DNT Watcher", f"{cabin_name}: {len(added)} new date(s) available"
-            )
 
     if removed:
         print(f"{Fore.RED}- {len(removed)} date(s) no longer available{Style.RESET_ALL}")
 
 
-def check_cabin_availability(cabin_id: str, cabin_name: str = "Cabin"):
+def print_rule_matches(matches):
     """
-    Check the availability of a cabin based on the cabin ID.
+    Print the watch rules matched by a cabin's changes.
 
     Args:
-        cabin_id (str): The cabin ID (e.g., "101297" for Stallen).
-        cabin_name (str): The name of the cabin for display purposes.
+        matches (list): RuleMatch objects from RuleEngine.evaluate().
+    """
+    for match in matches:
+        stay = f"{match.first_night.strftime('%Y-%m-%d')} → {match.last_night.strftime('%Y-%m-%d')}"
+        print(f"{Fore.GREEN}🔔 {match.rule}:{Style.RESET_ALL} {stay} ({match.nights} night(s))")
+
+
+def print_subscriber_changes(result: CheckResult, subscribers: SubscriberIndex = None):
+    """
+    Print which subscribers a cabin's changes concern.
+
+    Args:
+        result (CheckResult): The finished check from the pipeline.
+        subscribers (SubscriberIndex): The subscribers' watch windows, if any.
+    """
+    if not subscribers:
+        return
+    for subscriber, events in sorted(subscribers.route(result.cabin_id, result.events).items()):
+        opened = len(events_of(events, DATE_OPENED))
+        closed = len(events_of(events, DATE_CLOSED))
+        print(f"{Fore.MAGENTA}👤 {subscriber}:{Style.RESET_ALL} +{opened} / -{closed} date(s) in watch window")
+
+
+def match_watch_rules(result: CheckResult, rules: RuleEngine = None):
+    """
+    Match a result's changes against the watch rules.
 
     Returns:
-        None
+        list: RuleMatch objects, or None if no rules are configured and the
+              built-in alerts apply.
     """
-    print(f"\n{Fore.CYAN}━━━ {cabin_name} {Fore.WHITE}(ID: {cabin_id}){Fore.CYAN} ━━━{Style.RESET_ALL}")
+    if not rules:
+        return None
+    return rules.evaluate(result.cabin_id, result.events, result.dates)
 
-    # Get availability from today until November of next year
-    today = datetime.date.today()
-    from_date = today.strftime("%Y-%m-%d")
-    next_year = today.year + 1
-    to_date = f"{next_year}-11-01"
 
-    # Fetch availability data from API
-    result = get_availability(cabin_id, from_date, to_date)
-    if not result:
-        print(f"{Fore.RED}✗ Failed to fetch availability{Style.RESET_ALL}")
+def update_cache(result: CheckResult, cache: StateCache = None):
+    """Record a check result in the local API's state, if one is being served."""
+    if cache is None:
         return
+    if result.ok:
+        cache.update(result.cabin_id, result.name, result.dates, () if result.first_run else result.events)
+    elif not result.skipped:
+        cache.record_failure(result.cabin_id)
 
-    # Extract available dates
-    available = extract_available_dates(result)
 
-    # Display statistics
-    print_date_statistics(available)
+def render_check_result(
+    result: CheckResult,
+    cache: StateCache = None,
+    quiet: bool = False,
+    rules: RuleEngine = None,
+    subscribers: SubscriberIndex = None,
+):
+    """
+    Print the outcome of checking one cabin and send notifications.
 
-    # Save results to history
-    save_result_as_json(available)
+    Args:
+        result (CheckResult): The finished check from the pipeline.
+        cache (StateCache): Optional in-memory state to update for the local API.
+        quiet (bool): Only print cabins whose availability changed (failures go to stderr).
+        rules (RuleEngine): Watch rules that decide which changes to notify about
+                            (default: the built-in weekend/Saturday/new-date alerts).
+        subscribers (SubscriberIndex): Subscribers to route the changes to.
+    """
+    update_cache(result, cache)
+    matches = match_watch_rules(result, rules) if result.ok and not result.first_run else None
 
-    # Check for new dates compared to previous run
-    last_results = load_latest_files()
-    if len(last_results) < 2:
-        print(f"{Fore.YELLOW}ℹ First run - no history to compare{Style.RESET_ALL}\n")
+    if quiet:
+        if not result.ok:
+            print(f"{'⏸' if result.skipped else '✗'} {result.name} (ID: {result.cabin_id}): {result.error}", file=sys.stderr)
+        elif result.events and not result.first_run:
+            print(f"\n{Fore.CYAN}━━━ {result.name} {Fore.WHITE}(ID: {result.cabin_id}){Fore.CYAN} ━━━{Style.RESET_ALL}")
+            print_diff_results(result.events, result.name)
+            print_rule_matches(matches or [])
+            print_subscriber_changes(result, subscribers)
+            send_alerts(result, rules, subscribers)
         return
 
-    # Compare with previous results
-    added, removed = diff_lists(last_results[0], last_results[1])
+    print(f"\n{Fore.CYAN}━━━ {result.name} {Fore.WHITE}(ID: {result.cabin_id}){Fore.CYAN} ━━━{Style.RESET_ALL}")
+
+    if result.skipped:
+        print(f"{Fore.YELLOW}⏸ {result.error}{Style.RESET_ALL}")
+        return
+    if not result.ok:
+        print(f"{Fore.RED}✗ {result.error}{Style.RESET_ALL}")
+        return
+
+    # Display statistics
+    print_date_statistics(result.dates)
+
+    if result.first_run:
+        print(f"{Fore.YELLOW}ℹ First run - no history to compare{Style.RESET_ALL}\n")
+        return
 
     # Print and send notifications
-    print_diff_results(added, removed, cabin_name)
+    print_diff_results(result.events, result.name)
+    print_rule_matches(matches or [])
+    print_subscriber_changes(result, subscribers)
+    send_alerts(result, rules, subscribers)
 
     print()  # Extra spacing
 
 
-def main():
-    """Main function to run the DNT Watcher CLI."""
+class JsonlOutput:
+    """
+    Streams check results as JSON lines for log processors.
+
+    Every cabin yields one ``cabin`` (or ``error``) record and every change
+    one record typed by its event kind. Records are written as bytes to a
+    buffered stream, bypassing colorama, and flushed once per check cycle.
+    """
+
+    def __init__(self, stream=None, quiet: bool = False):
+        """
+        Args:
+            stream: Binary stream to write to (default: stdout's buffer).
+            quiet (bool): Only write change records (and errors).
+        """
+        self.stream = stream if stream is not None else sys.stdout.buffer
+        self.quiet = quiet
+
+    def write(self, record: dict):
+        """Write a single record."""
+        self.stream.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode() + b"\n")
+
+    def result(
+        self,
+        result: CheckResult,
+        cache: StateCache = None,
+        rules: RuleEngine = None,
+        subscribers: SubscriberIndex = None,
+    ):
+        """Write the records for one check result and send notifications."""
+        update_cache(result, cache)
+        when = (result.checked_at or datetime.datetime.now()).isoformat(timespec="seconds")
+        cabin = {"cabin_id": result.cabin_id, "name": result.name, "time": when}
+
+        if not result.ok:
+            self.write({"type": "error", **cabin, "error": result.error, "skipped": result.skipped})
+            return
+
+        if not self.quiet:
+            first, last = result.dates.first(), result.dates.last()
+            self.write(
+                {
+                    "type": "cabin",
+                    **cabin,
+                    "available": len(result.dates),
+                    "weekends": [datetime.date.fromordinal(friday).isoformat() for friday in result.dates.weekend_fridays()],
+                    "first": first.isoformat() if first else None,
+                    "last": last.isoformat() if last else None,
+                    "first_run": result.first_run,
+                }
+            )
+
+        if not result.first_run:
+            for event in result.events:
+                record = {**event.to_dict(), **cabin}
+                if subscribers:
+                    record["subscribers"] = subscribers.subscribers_for(result.cabin_id, event.day)
+                self.write(record)
+            for match in match_watch_rules(result, rules) or []:
+                self.write({"type": "rule_match", **match.to_dict(), "name": result.name, "time": when})
+            send_alerts(result, rules, subscribers)
+
+    def cycle(self, pipeline: CheckPipeline):
+        """Write the timings of a finished cycle."""
+        self.write(
+            {
+                "type": "cycle",
+                "seconds": round(pipeline.cycle_seconds, 3),
+                "stages": {stage: round(pipeline.stage_seconds[stage], 3) for stage in STAGES},
+            }
+        )
+
+    def breakers(self, breakers: BreakerBoard):
+        """Write the failure stats of the circuit breakers, if anything failed."""
+        stats = breakers.stats()
+        if stats["failures"] or stats["skipped"]:
+            self.write({"type": "breakers", **stats})
+
+    def flush(self):
+        self.stream.flush()
+
+
+def check_cabin_availability(
+    cabin_id: str,
+    cabin_name: str = "Cabin",
+    cache: StateCache = None,
+    breakers: BreakerBoard = None,
+    rules: RuleEngine = None,
+    subscribers: SubscriberIndex = None,
+):
+    """
+    Check the availability of a cabin based on the cabin ID.
+
+    Args:
+        cabin_id (str): The cabin ID (e.g., "101297" for Stallen).
+        cabin_name (str): The name of the cabin for display purposes.
+        cache (StateCache): Optional in-memory state to update for the local API.
+        breakers (BreakerBoard): Optional circuit breakers that may skip the request.
+        rules (RuleEngine): Watch rules that decide which changes to notify about.
+        subscribers (SubscriberIndex): Subscribers to route the changes to.
+
+    Returns:
+        bool: False if the availability could not be fetched.
+    """
+    results = CheckPipeline(breakers=breakers).run(
+        [CheckResult(cabin_id, cabin_name)],
+        sink=lambda result: render_check_result(result, cache, rules=rules, subscribers=subscribers),
+    )
+    return results[0].ok
+
+
+def print_stage_timings(pipeline: CheckPipeline):
+    """Print how long each pipeline stage took in total during the last cycle."""
+    stages = " | ".join(f"{stage}: {pipeline.stage_seconds[stage]:.2f}s" for stage in STAGES)
+    print(f"{Fore.CYAN}⏱ Cycle {pipeline.cycle_seconds:.2f}s{Style.RESET_ALL} ({stages})")
+
+
+def print_breaker_stats(breakers: BreakerBoard, names=None, quiet: bool = False):
+    """
+    Print API failure stats and open circuit breakers, if anything failed.
+
+    Args:
+        breakers (BreakerBoard): The circuit breakers used for the checks.
+        names (dict): Optional display name per cabin ID.
+        quiet (bool): Print to stderr instead of stdout.
+    """
+    stats = breakers.stats()
+    if not stats["failures"] and not stats["skipped"]:
+        return
+    names = names or {}
+    api = stats["api"]
+
+    def next_try(seconds):
+        return f"{seconds}s" if seconds < 60 else _format_duration(datetime.timedelta(seconds=seconds))
+
+    line = f"{Fore.YELLOW}⚡ API failures: {stats['failures']} | skipped requests: {stats['skipped']}{Style.RESET_ALL}"
+    if api["state"] != "closed":
+        line += f" | {Fore.RED}API breaker {api['state'].replace('_', '-')}, next try in {next_try(api['retry_in'])}{Style.RESET_ALL}"
+    print_status(line, quiet)
+    for cabin_id, cabin in stats["cabins"].items():
+        state = cabin["state"].replace("_", "-")
+        detail = f"{cabin['failures']} failure(s), {cabin['successes']} success(es), {state}"
+        if cabin["state"] != "closed":
+            detail += f", next try in {next_try(cabin['retry_in'])}"
+        print_status(f"  • {names.get(cabin_id, cabin_id)}: {detail}", quiet)
+
+
+def print_status(message: str, quiet: bool = False):
+    """Print a status line; quiet and JSON output send it to stderr instead."""
+    print(message, file=sys.stderr if quiet else sys.stdout)
+
+
+def watched_cabin_ids():
+    """Return the IDs of every cabin the watcher checks, including those only subscribers watch."""
+    cabins = load_cabins()
+    subscribers = compile_subscribers(load_subscribers(), cabins)
+    return [extract_cabin_id(cabin["url"]) for cabin in subscribed_cabins(cabins, subscribers)]
+
+
+def check_all_cabins(
+    cache: StateCache = None,
+    show_timings: bool = False,
+    recorder: ResponseRecorder = None,
+    output: JsonlOutput = None,
+    quiet: bool = False,
+    breakers: BreakerBoard = None,
+    state: WarmState = None,
+    interval: int = None,
+):
+    """
+    Check availability for every configured cabin once.
+
+    Args:
+        cache (StateCache): Optional in-memory state to update for the local API.
+        show_timings (bool): Print per-stage timings after the check.
+        recorder (ResponseRecorder): Optional recording to append the raw API responses to.
+        output (JsonlOutput): Write JSON lines here instead of the colored text report.
+        quiet (bool): Only print cabins whose availability changed.
+        breakers (BreakerBoard): Circuit breakers to keep across cycles
+                                 (default: fresh ones for this check).
+        state (WarmState): Warm-start state to record the results in.
+        interval (int): With a state, only check the cabins that are due and
+                        schedule their next check this many seconds from now.
+    """
+    import time
+
     # Load cabin configuration from YAML
     cabins = load_cabins()
 
     if not cabins:
-        print(f"{Fore.RED}✗ No cabins configured in dnt_hytter.yaml{Style.RESET_ALL}")
+        print(f"{Fore.RED}✗ No cabins configured in dnt_hytter.yaml{Style.RESET_ALL}", file=sys.stderr)
         sys.exit(1)
 
-    # Print header
-    print(f"\n{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}  🏔  DNT WATCHER - Cabin Availability Monitor  🏔{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}Monitoring {len(cabins)} cabin(s){Style.RESET_ALL}")
+    # Rules and subscribers are re-read with the cabins every cycle, so config
+    # edits apply without a restart
+    rules = compile_rules(load_rules(), cabins)
+    subscribers = compile_subscribers(load_subscribers(), cabins)
+    # Each cabin is fetched once, however many subscribers watch it
+    cabins = subscribed_cabins(cabins, subscribers)
+
+    due = None
+    if state is not None:
+        state.retain(extract_cabin_id(cabin["url"]) for cabin in cabins)
+        if interval is not None:
+            now = time.time()
+            due = now + interval
+            cabins = [cabin for cabin in cabins if state.is_due(extract_cabin_id(cabin["url"]), now)]
+            if not cabins:
+                return
+
+    def remember(results):
+        if state is not None:
+            for result in results:
+                state.record(result, due)
+
+    text = output is None and not quiet
+    if text:
+        # Print header
+        print(f"\n{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}  🏔  DNT WATCHER - Cabin Availability Monitor  🏔{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}Monitoring {len(cabins)} cabin(s){Style.RESET_ALL}")
 
     # Check availability for each configured cabin
-    for cabin in cabins:
-        cabin_id = extract_cabin_id(cabin["url"])
-        cabin_name = cabin["navn"]
-        check_cabin_availability(cabin_id, cabin_name)
+    fetch = get_availability
+    if recorder is not None:
+        fetch = functools.partial(get_availability, recorder=recorder)
+    if breakers is None:
+        breakers = BreakerBoard()
+    pipeline = CheckPipeline(fetch=fetch, breakers=breakers, state=state)
+    if output is not None:
+        remember(pipeline.run(cabins, sink=lambda result: output.result(result, cache, rules, subscribers)))
+        if show_timings:
+            output.cycle(pipeline)
+        output.breakers(breakers)
+        output.flush()
+        return
+    remember(pipeline.run(cabins, sink=lambda result: render_check_result(result, cache, quiet, rules, subscribers)))
 
-    # Footer
-    print(f"{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}  ✓ Check complete!{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}\n")
+    if text:
+        # Footer
+        print(f"{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}  ✓ Check complete!{Style.RESET_ALL}")
+    print_breaker_stats(breakers, {extract_cabin_id(cabin["url"]): cabin["navn"] for cabin in cabins}, quiet)
+    if show_timings:
+        print_stage_timings(pipeline)
+    if text:
+        print(f"{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}\n")
 
 
-def run_continuous(interval: int = 3600):
+def run_continuous(
+    interval: int = 3600,
+    serve_port: int = None,
+    record_path: str = None,
+    output: JsonlOutput = None,
+    quiet: bool = False,
+):
     """
     Run the watcher continuously on an interval.
 
+    The calendars, schedule and circuit breakers are saved after every cycle
+    and on shutdown. A restarted watcher serves the saved state right away
+    and resumes the schedule instead of checking every cabin at once.
+
     Args:
         interval (int): Time between checks in seconds (default: 3600 = 1 hour).
+        serve_port (int): If given, serve the current state as JSON on this
+                          localhost port while running.
+        record_path (str): If given, append every raw API response to this recording.
+        output (JsonlOutput): Write JSON lines here instead of the colored text report.
+        quiet (bool): Only print cabins whose availability changed.
     """
     import time
 
-    # Run first check immediately
-    main()
+    quiet_status = quiet or output is not None
+
+    # One read of the saved state replaces a fresh start
+    state = WarmState.load()
+
+    # Breakers persist across cycles so failing cabins back off between checks
+    breakers = BreakerBoard()
+    state.restore_breakers(breakers)
+
+    cache = None
+    if serve_port is not None:
+        cache = StateCache(breakers=breakers)
+        cache.load_from_history(load_cabins(), state=state)
+        start_server(cache, port=serve_port)
+        print_status(f"{Fore.CYAN}🌐 Serving state on http://127.0.0.1:{serve_port}/cabins{Style.RESET_ALL}", quiet_status)
+
+    recorder = None
+    if record_path is not None:
+        recorder = ResponseRecorder(record_path)
+        print_status(f"{Fore.CYAN}⏺ Recording API responses to {record_path}{Style.RESET_ALL}", quiet_status)
+
+    def run_cycle():
+        check_all_cabins(
+            cache, recorder=recorder, output=output, quiet=quiet, breakers=breakers, state=state, interval=interval
+        )
+        state.save(breakers)
+
+    try:
+        wait = state.seconds_until_due(cabin_ids=watched_cabin_ids())
+        if wait:
+            print_status(f"{Fore.CYAN}⏯ Resuming schedule, next check in {wait / 60:.0f} min.{Style.RESET_ALL}", quiet_status)
+        else:
+            # Run first check immediately
+            run_cycle()
+
+        # Run on interval
+        print_status(f"\n{Fore.CYAN}⏰ Running continuously every {interval/3600} hour(s).{Style.RESET_ALL}", quiet_status)
+        print_status(f"{Fore.CYAN}   Press Ctrl+C to stop.{Style.RESET_ALL}\n", quiet_status)
+
+        while True:
+            # Cabins are due one interval after their last check, also across
+            # restarts; cabins added to the config are checked right away
+            time.sleep(state.seconds_until_due(cabin_ids=watched_cabin_ids()))
+            run_cycle()
+    finally:
+        state.save(breakers)
+        if recorder is not None:
+            recorder.close()
+
+
+def run_worker(interval: int = 3600, lease: int = 300, queue_path: str = "history/queue.sqlite3", worker_id: str = None):
+    """
+    Run as one of several workers sharing the cabins through a lease queue.
+
+    Every cabin is checked by exactly one worker per interval. Start as many
+    workers as needed, on this host or others sharing the queue file.
+
+    Args:
+        interval (int): Time between checks of the same cabin in seconds.
+        lease (int): Seconds a claimed cabin stays reserved for this worker.
+        queue_path (str): Path to the shared SQLite queue.
+        worker_id (str): Unique worker ID (default: hostname and PID).
+    """
+    import os
+    import socket
+    import time
 
-    # Run on interval
-    print(f"\n{Fore.CYAN}⏰ Running continuously every {interval/3600} hour(s).{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}   Press Ctrl+C to stop.{Style.RESET_ALL}\n")
+    if worker_id is None:
+        worker_id = f"{socket.gethostname()}-{os.getpid()}"
 
-    while True:
-        time.sleep(interval)
-        main()
+    cabins = load_cabins()
+    if not cabins:
+        print(f"{Fore.RED}✗ No cabins configured in dnt_hytter.yaml{Style.RESET_ALL}")
+        sys.exit(1)
+    rules = compile_rules(load_rules(), cabins)
+    subscribers = compile_subscribers(load_subscribers(), cabins)
+    # Cabins only subscribers watch are shared through the queue as well
+    cabins = subscribed_cabins(cabins, subscribers)
+    names = {extract_cabin_id(cabin["url"]): cabin["navn"] for cabin in cabins}
+
+    breakers = BreakerBoard()
+    queue = LeaseQueue(queue_path, lease_seconds=lease)
+    queue.sync(list(names))
+    print(f"{Fore.CYAN}👷 Worker {worker_id} sharing {len(names)} cabin(s) via {queue_path}{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}   Press Ctrl+C to stop.{Style.RESET_ALL}")
+
+    try:
+        while True:
+            cabin_id = queue.claim(worker_id)
+            if cabin_id is None:
+                wait = queue.seconds_until_due()
+                time.sleep(min(wait if wait is not None else interval, 60))
+                continue
+
+            name = names.get(cabin_id, cabin_id)
+            if check_cabin_availability(cabin_id, name, breakers=breakers, rules=rules, subscribers=subscribers):
+                if not queue.complete(cabin_id, worker_id, interval):
+                    print(f"{Fore.YELLOW}⚠ Lease on {cabin_id} expired during the check{Style.RESET_ALL}")
+            else:
+                # Let any worker retry after a short pause, or once the breaker allows it
+                retry_in = max(min(lease, interval), breakers.retry_in(cabin_id))
+                queue.release(cabin_id, worker_id, retry_in=retry_in)
+                print_breaker_stats(breakers, names)
+    finally:
+        queue.close()
+
+
+def run_replay(
+    path: str,
+    history_dir: str = None,
+    realtime: bool = False,
+    speed: float = 1.0,
+    show_timings: bool = False,
+    output: JsonlOutput = None,
+    quiet: bool = False,
+):
+    """
+    Replay a recording through the full check pipeline and print its throughput.
+
+    Args:
+        path (str): Recording written with --record.
+        history_dir (str): Where to write the replayed history (default: a
+                           temporary directory that is removed afterwards).
+        realtime (bool): Keep the original pacing between cycles.
+        speed (float): Pacing multiplier in realtime mode.
+        show_timings (bool): Print per-stage timings after every cycle.
+        output (JsonlOutput): Write JSON lines here instead of the colored text report.
+        quiet (bool): Only print cabins whose availability changed.
+    """
+    import tempfile
+
+    cabins = load_cabins()
+    names = {extract_cabin_id(cabin["url"]): cabin["navn"] for cabin in cabins}
+    rules = compile_rules(load_rules(), cabins)
+    subscribers = compile_subscribers(load_subscribers(), cabins)
+
+    def on_cycle(when, pipeline):
+        if output is not None:
+            if show_timings:
+                output.cycle(pipeline)
+            output.flush()
+            return
+        if not quiet:
+            print(f"{Fore.WHITE}── Replayed cycle recorded {when.strftime('%Y-%m-%d %H:%M')}{Style.RESET_ALL}")
+        if show_timings:
+            print_stage_timings(pipeline)
+
+    if output is not None:
+        sink = functools.partial(output.result, rules=rules, subscribers=subscribers)
+    else:
+        sink = functools.partial(render_check_result, quiet=quiet, rules=rules, subscribers=subscribers)
+
+    with tempfile.TemporaryDirectory(prefix="dnt-replay-") as scratch:
+        totals = replay_recording(
+            path,
+            history_dir or scratch,
+            sink=sink,
+            realtime=realtime,
+            speed=speed,
+            names=names,
+            on_cycle=on_cycle,
+        )
+
+    seconds = totals["seconds"]
+    rate = totals["checks"] / seconds if seconds else 0.0
+    if output is not None:
+        totals["seconds"] = round(seconds, 3)
+        totals["stage_seconds"] = {stage: round(value, 3) for stage, value in totals["stage_seconds"].items()}
+        output.write({"type": "replay", **totals, "checks_per_second": round(rate, 1)})
+        output.flush()
+        return
+
+    stages = " | ".join(f"{stage}: {totals['stage_seconds'][stage]:.2f}s" for stage in STAGES)
+    print_status(f"\n{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}", quiet)
+    print_status(f"{Fore.GREEN}  ✓ Replayed {totals['cycles']} cycle(s), {totals['checks']} check(s){Style.RESET_ALL}", quiet)
+    print_status(f"  Failures: {totals['failures']} | Change events: {totals['events']}", quiet)
+    print_status(f"  Pipeline time: {seconds:.2f}s ({rate:.1f} checks/s)", quiet)
+    print_status(f"  {stages}", quiet)
+    print_status(f"{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}\n", quiet)
+
+
+def print_history_at(cabin: str, when: datetime.datetime):
+    """
+    Print the reconstructed availability of a cabin at a past instant.
+
+    Args:
+        cabin (str): Cabin name or ID.
+        when (datetime): The instant to reconstruct.
+    """
+    cabin_id = resolve_cabin_id(load_cabins(), cabin)
+    print(f"\n{Fore.CYAN}━━━ {cabin} {Fore.WHITE}at {when.strftime('%Y-%m-%d %H:%M')}{Fore.CYAN} ━━━{Style.RESET_ALL}")
+    print_date_statistics(availability_at(cabin_id, when))
+
+
+def print_history_timeline(cabin: str, start=None, end=None, first_date=None, last_date=None):
+    """
+    Print every change of a cabin's availability and how long each date stayed open.
+
+    Args:
+        cabin (str): Cabin name or ID.
+        start (datetime): Only include changes at or after this instant.
+        end (datetime): Only include changes at or before this instant.
+        first_date (str): Only include bookable dates on or after this day.
+        last_date (str): Only include bookable dates on or before this day.
+    """
+    cabin_id = resolve_cabin_id(load_cabins(), cabin)
+    timeline = change_timeline(cabin_id, start, end, first_date, last_date)
+
+    print(f"\n{Fore.CYAN}━━━ {cabin} {Fore.WHITE}(ID: {cabin_id}){Fore.CYAN} ━━━{Style.RESET_ALL}")
+    if not timeline:
+        print(f"{Fore.YELLOW}⚠ No changes recorded{Style.RESET_ALL}\n")
+        return
+
+    for when, added, removed in timeline:
+        print(f"\n{Fore.WHITE}{when.strftime('%Y-%m-%d %H:%M')}{Style.RESET_ALL}")
+        for date in added:
+            print(f"  {Fore.GREEN}+ {date[:10]}{Style.RESET_ALL}")
+        for date in removed:
+            print(f"  {Fore.RED}- {date[:10]}{Style.RESET_ALL}")
+
+    print(f"\n{Fore.CYAN}⏱ Open periods:{Style.RESET_ALL}")
+    for date, periods in open_intervals(timeline).items():
+        for opened, closed in periods:
+            opened_str = opened.strftime("%Y-%m-%d %H:%M") if opened else "before start"
+            if closed is None:
+                print(f"  {date[:10]}: opened {opened_str}, {Fore.GREEN}still available{Style.RESET_ALL}")
+            elif opened is None:
+                print(f"  {date[:10]}: {opened_str}, gone {closed.strftime('%Y-%m-%d %H:%M')}")
+            else:
+                print(f"  {date[:10]}: opened {opened_str}, {Fore.YELLOW}gone after {closed - opened}{Style.RESET_ALL}")
+    print()
+
+
+def _format_duration(duration):
+    """Format a timedelta compactly, e.g. '3d 4h', '2h 15m' or '12m'."""
+    minutes = int(duration.total_seconds() // 60)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+
+def print_velocity_report(stats):
+    """
+    Print how quickly released dates get booked, per cabin and per weekday.
+
+    Args:
+        stats (VelocityStats): Statistics from analyze_booking_velocity().
+    """
+    names = {extract_cabin_id(cabin["url"]): cabin["navn"] for cabin in load_cabins()}
+
+    print(f"\n{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}  ⚡ BOOKING VELOCITY REPORT{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}{'=' * 60}{Style.RESET_ALL}")
+
+    if not stats.cabins:
+        print(f"\n{Fore.YELLOW}⚠ No history journals found{Style.RESET_ALL}\n")
+        return
+
+    for cabin_id, cabin in sorted(stats.cabins.items()):
+        histogram = cabin.time_to_gone
+        print(f"\n{Fore.CYAN}━━━ {names.get(cabin_id, cabin_id)} {Fore.WHITE}(ID: {cabin_id}){Fore.CYAN} ━━━{Style.RESET_ALL}")
+        print(f"  Released dates: {cabin.releases} | Booked after release: {histogram.count}")
+        if histogram.count:
+            print(
+                f"  Time to gone: mean {_format_duration(histogram.mean)}, "
+                f"median {histogram.median_bucket}, fastest {_format_duration(histogram.fastest)}"
+            )
+            buckets = " | ".join(f"{label}: {count}" for label, count in zip(DURATION_LABELS, histogram.counts))
+            print(f"  {buckets}")
+        if cabin.releases:
+            top_hours = sorted(range(24), key=lambda hour: -cabin.release_hours[hour])[:3]
+            hours_str = ", ".join(f"{hour:02d}:00 ({cabin.release_hours[hour]})" for hour in top_hours if cabin.release_hours[hour])
+            print(f"  Release hours: {hours_str}")
+
+    print(f"\n{Fore.CYAN}📅 Time to gone by weekday:{Style.RESET_ALL}")
+    weekday_names = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    for name, histogram in zip(weekday_names, stats.by_weekday):
+        if histogram.count:
+            print(f"  {name}: {histogram.count} booked, mean {_format_duration(histogram.mean)}, median {histogram.median_bucket}")
+        else:
+            print(f"  {name}: -")
+
+    threshold = _format_duration(stats.sellout_threshold)
+    if stats.sellouts:
+        print(f"\n{Fore.RED}🔥 Weekends gone within {threshold}:{Style.RESET_ALL}")
+        for cabin_id, friday, opened, duration in stats.sellouts:
+            print(
+                f"  {Fore.RED}•{Style.RESET_ALL} {names.get(cabin_id, cabin_id)}: "
+                f"{friday.isoformat()} weekend, released {opened.strftime('%Y-%m-%d %H:%M')}, gone after {_format_duration(duration)}"
+            )
+    else:
+        print(f"\n{Fore.GREEN}✓ No weekends gone within {threshold}{Style.RESET_ALL}")
+    print()
+
+
+def main(argv=None):
+    """Main function to run the DNT Watcher CLI."""
+    parser = argparse.ArgumentParser(prog="dnt-watcher", description="DNT cabin availability monitor")
+    subparsers = parser.add_subparsers(dest="command")
+
+    # Output options shared by the commands that run checks
+    output_options = argparse.ArgumentParser(add_help=False)
+    output_options.add_argument(
+        "--format", choices=("text", "jsonl"), default="text", help="colored text report or one JSON record per line"
+    )
+    output_options.add_argument("--quiet", action="store_true", help="only print changes")
+
+    check_parser = subparsers.add_parser("check", parents=[output_options], help="check all configured cabins once (default)")
+    check_parser.add_argument("--timings", action="store_true", help="print per-stage pipeline timings")
+    check_parser.add_argument("--record", metavar="PATH", help="append the raw API responses to a recording")
+
+    watch_parser = subparsers.add_parser("watch", parents=[output_options], help="check all cabins on an interval")
+    watch_parser.add_argument("--interval", type=int, default=3600, help="seconds between checks")
+    watch_parser.add_argument(
+        "--serve", type=int, nargs="?", const=8765, metavar="PORT", help="serve current state as JSON on localhost (default port: 8765)"
+    )
+
+    watch_parser.add_argument("--record", metavar="PATH", help="append the raw API responses to a recording")
+
+    worker_parser = subparsers.add_parser("worker", help="share the cabins with other workers via a lease queue")
+    worker_parser.add_argument("--interval", type=int, default=3600, help="seconds between checks of each cabin")
+    worker_parser.add_argument("--lease", type=int, default=300, help="seconds a claimed cabin stays reserved")
+    worker_parser.add_argument("--queue", default="history/queue.sqlite3", help="path to the shared queue database")
+    worker_parser.add_argument("--id", dest="worker_id", help="unique worker ID (default: hostname-pid)")
+
+    history_parser = subparsers.add_parser("history", help="query recorded availability history")
+    history_commands = history_parser.add_subparsers(dest="history_command", required=True)
+
+    at_parser = history_commands.add_parser("at", help="show a cabin's availability at a past instant")
+    at_parser.add_argument("cabin", help="cabin name or ID")
+    at_parser.add_argument("when", type=datetime.datetime.fromisoformat, help="instant, e.g. 2025-11-05T14:00")
+
+    timeline_parser = history_commands.add_parser("timeline", help="show all changes for a cabin")
+    timeline_parser.add_argument("cabin", help="cabin name or ID")
+    timeline_parser.add_argument("--since", type=datetime.datetime.fromisoformat, help="first instant to include")
+    timeline_parser.add_argument("--until", type=datetime.datetime.fromisoformat, help="last instant to include")
+    timeline_parser.add_argument("--from-date", help="first bookable date to include (YYYY-MM-DD)")
+    timeline_parser.add_argument("--to-date", help="last bookable date to include (YYYY-MM-DD)")
+
+    history_commands.add_parser("import", help="build journals from existing history files")
+
+    export_parser = history_commands.add_parser("export", help="export journals to a memory-mapped archive")
+    export_parser.add_argument("path", help="archive file to write, e.g. history.dntarchive")
+
+    report_parser = subparsers.add_parser("report", help="booking-velocity report for all cabins")
+    report_parser.add_argument("--sellout-minutes", type=int, default=30, help="weekends gone within this many minutes count as sellouts")
+    report_parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+
+    replay_parser = subparsers.add_parser("replay", parents=[output_options], help="run a recording through the check pipeline")
+    replay_parser.add_argument("path", help="recording written with --record")
+    replay_parser.add_argument("--realtime", action="store_true", help="keep the original pacing between cycles")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="pacing multiplier with --realtime")
+    replay_parser.add_argument("--history-dir", help="write replayed history here (default: temporary directory)")
+    replay_parser.add_argument("--timings", action="store_true", help="print per-stage timings for every cycle")
+
+    args = parser.parse_args(argv)
+
+    quiet = getattr(args, "quiet", False)
+    output = JsonlOutput(quiet=quiet) if getattr(args, "format", "text") == "jsonl" else None
+
+    if args.command == "watch":
+        run_continuous(args.interval, args.serve, args.record, output, quiet)
+    elif args.command == "worker":
+        run_worker(args.interval, args.lease, args.queue, args.worker_id)
+    elif args.command == "history" and args.history_command == "at":
+        print_history_at(args.cabin, args.when)
+    elif args.command == "history" and args.history_command == "timeline":
+        print_history_timeline(args.cabin, args.since, args.until, args.from_date, args.to_date)
+    elif args.command == "history" and args.history_command == "import":
+        for cabin_id, count in import_history_files().items():
+            print(f"{Fore.GREEN}✓{Style.RESET_ALL} {cabin_id}: imported {count} snapshot(s)")
+    elif args.command == "history" and args.history_command == "export":
+        count = export_archive(args.path)
+        print(f"{Fore.GREEN}✓{Style.RESET_ALL} Wrote {count} record(s) to {args.path}")
+    elif args.command == "replay":
+        run_replay(args.path, args.history_dir, args.realtime, args.speed, args.timings, output, quiet)
+    elif args.command == "report":
+        threshold = datetime.timedelta(minutes=args.sellout_minutes)
+        print_velocity_report(fleet_booking_velocity(workers=args.workers, sellout_threshold=threshold))
+    else:
+        record_path = getattr(args, "record", None)
+        recorder = ResponseRecorder(record_path) if record_path else None
+        # Keep the saved state current for the next watcher or toolbar start
+        state = WarmState.load()
+        # Failing cabins keep backing off between one-shot runs (e.g. from cron)
+        breakers = BreakerBoard()
+        state.restore_breakers(breakers)
+        try:
+            check_all_cabins(
+                show_timings=getattr(args, "timings", False),
+                recorder=recorder,
+                output=output,
+                quiet=quiet,
+                breakers=breakers,
+                state=state,
+            )
+            state.save(breakers)
+        finally:
+            if recorder is not None:
+                recorder.close()
 
 
 if __name__ == "__main__":
@@ -4,24 +4,169 @@ from .api import get_availability
 from .analysis import (
     diff_lists,
     extract_available_dates,
+    extract_calendar,
     find_available_weekends,
+    list_history_files,
     load_latest_files,
+    parse_history_filename,
     save_result_as_json,
 )
-from .config import extract_cabin_id, load_cabins
+from .velocity import (
+    DURATION_LABELS,
+    CabinVelocity,
+    DurationHistogram,
+    VelocityStats,
+    analyze_booking_velocity,
+    iter_fleet_changes,
+)
+from .archive import HistoryArchive, export_archive
+from .breaker import BreakerBoard, CircuitBreaker
+from .batch import analyze_cabin_velocity, fleet_booking_velocity, run_fleet
+from .pipeline import STAGES, CheckPipeline, CheckResult
+from .recording import (
+    ReplaySource,
+    ResponseRecorder,
+    read_recording,
+    recorded_cycles,
+    replay_recording,
+)
+from .rules import RuleEngine, RuleMatch, WatchRule, compile_rules, parse_months
+from .snapshots import SnapshotWriter, load_snapshot, snapshot_filename, write_atomic
+from .server import StateCache, fetch_state, start_server
+from .subscribers import IntervalIndex, SubscriberIndex, compile_subscribers, subscribed_cabins
+from .warmstart import STATE_FILENAME, SavedCabin, WarmState, calendar_hash
+from .workqueue import LeaseQueue
+from .config import extract_cabin_id, load_cabins, load_rules, load_subscribers, resolve_cabin_id
+from .dates import (
+    DATE_SUFFIX,
+    FRIDAY,
+    SATURDAY,
+    SUNDAY,
+    Calendar,
+    default_date_range,
+    from_ordinal,
+    to_ordinal,
+    weekday_of,
+)
+from .events import (
+    DATE_CLOSED,
+    DATE_OPENED,
+    SATURDAY_OPENED,
+    WEEKEND_CLOSED,
+    WEEKEND_OPENED,
+    ChangeEvent,
+    compute_events,
+    events_of,
+    split_dates,
+)
+from .journal import (
+    HistoryJournal,
+    append_snapshot,
+    availability_at,
+    change_timeline,
+    import_history_files,
+    list_journals,
+    open_intervals,
+)
 
 __all__ = [
     # API functions
     "get_availability",
     # Analysis functions
     "extract_available_dates",
+    "extract_calendar",
     "find_available_weekends",
     "save_result_as_json",
     "load_latest_files",
     "diff_lists",
+    "parse_history_filename",
+    "list_history_files",
+    "SnapshotWriter",
+    "load_snapshot",
+    "snapshot_filename",
+    "write_atomic",
+    # Compact dates
+    "Calendar",
+    "to_ordinal",
+    "from_ordinal",
+    "weekday_of",
+    "DATE_SUFFIX",
+    "FRIDAY",
+    "SATURDAY",
+    "SUNDAY",
+    # Change events
+    "compute_events",
+    "events_of",
+    "split_dates",
+    "ChangeEvent",
+    "DATE_OPENED",
+    "DATE_CLOSED",
+    "WEEKEND_OPENED",
+    "WEEKEND_CLOSED",
+    "SATURDAY_OPENED",
+    # History journal
+    "HistoryJournal",
+    "append_snapshot",
+    "availability_at",
+    "change_timeline",
+    "open_intervals",
+    "list_journals",
+    "import_history_files",
+    # Multi-process fleet analysis
+    "run_fleet",
+    "fleet_booking_velocity",
+    "analyze_cabin_velocity",
+    # Memory-mapped archive
+    "export_archive",
+    "HistoryArchive",
+    # Booking-velocity analytics
+    "analyze_booking_velocity",
+    "iter_fleet_changes",
+    "VelocityStats",
+    "CabinVelocity",
+    "DurationHistogram",
+    "DURATION_LABELS",
+    # Check pipeline
+    "CheckPipeline",
+    "BreakerBoard",
+    "CircuitBreaker",
+    "CheckResult",
+    "default_date_range",
+    "STAGES",
+    # Record and replay
+    "ResponseRecorder",
+    "ReplaySource",
+    "read_recording",
+    "recorded_cycles",
+    "replay_recording",
+    # Watch rules
+    "compile_rules",
+    "parse_months",
+    "RuleEngine",
+    "RuleMatch",
+    "WatchRule",
+    # Subscribers
+    "compile_subscribers",
+    "subscribed_cabins",
+    "SubscriberIndex",
+    "IntervalIndex",
+    # Local JSON API
+    "StateCache",
+    "start_server",
+    "fetch_state",
+    # Warm start
+    "WarmState",
+    "SavedCabin",
+    "calendar_hash",
+    "STATE_FILENAME",
+    # Shared work queue
+    "LeaseQueue",
     # Config functions
     "load_cabins",
+    "load_rules",
+    "load_subscribers",
     "extract_cabin_id",
+    "resolve_cabin_id",
 ]
 
 __version__ = "1.0.0"
@@ -1,9 +1,11 @@
 """Data analysis functions for cabin availability."""
 
 import datetime
-import json
 import os
 
+from .dates import Calendar, to_ordinal
+from .snapshots import SnapshotWriter, load_snapshot
+
 
 def extract_available_dates(availability: dict):
     """
@@ -30,85 +32,147 @@ def extract_available_dates(availability: dict):
     return available_dates
 
 
+def extract_calendar(availability: dict):
+    """
+    Extract the available dates as a compact Calendar.
+
+    Dates are parsed exactly once here, at the API boundary; everything
+    downstream works on day ordinals. The free beds of each day (summed over
+    all products) are kept alongside.
+
+    Args:
+        availability (dict): A dictionary containing availability data from the API.
+
+    Returns:
+        Calendar: The available days.
+    """
+    if not availability or "data" not in availability:
+        return Calendar()
+
+    ordinals = []
+    beds = []
+    for day_data in availability["data"]["availabilityList"]:
+        count = sum(max(product.get("available", 0), 0) for product in day_data.get("products", []))
+        if count > 0:
+            ordinals.append(to_ordinal(day_data["date"]))
+            beds.append(count)
+    return Calendar(ordinals, beds)
+
+
 def find_available_weekends(dates):
     """
     Finds full weekends (Friday-Sunday) that are available.
 
     Args:
-        dates (list): A list of date strings in ISO format.
+        dates (Calendar or list): A Calendar, or a list of date strings in ISO format.
 
     Returns:
         list: A list of tuples containing (friday_date, "Fri-Sun") for each available weekend.
     """
-    datetime_dates = [
-        datetime.datetime.strptime(date[:10], "%Y-%m-%d") for date in dates
+    calendar = Calendar.from_iso(dates)
+    return [
+        (datetime.datetime.fromordinal(friday), "Fri-Sun")
+        for friday in calendar.weekend_fridays()
     ]
-    date_set = set(datetime_dates)
-
-    weekends = []
-    for date in sorted(datetime_dates):
-        # Check if this is a Friday (weekday() == 4)
-        if date.weekday() == 4:
-            saturday = date + datetime.timedelta(days=1)
-            sunday = date + datetime.timedelta(days=2)
 
-            # Check if both Saturday and Sunday are also available
-            if saturday in date_set and sunday in date_set:
-                weekends.append((date, "Fri-Sun"))
 
-    return weekends
-
-
-def save_result_as_json(result, history_dir: str = "history"):
+def save_result_as_json(result, history_dir: str = "history", cabin_id: str = None, timestamp: datetime.datetime = None):
     """
     Save the result as a JSON file with a human-readable timestamped filename.
 
+    The file is replaced atomically. To save many snapshots at once, buffer
+    them in a SnapshotWriter instead.
+
     Args:
-        result (dict): The result to be saved as JSON.
+        result (dict): The result to be saved as JSON. A Calendar is saved as
+                       its list of ISO date strings.
         history_dir (str): Directory to save history files (default: "history").
+        cabin_id (str): Optional cabin ID appended to the filename
+                        (HH-DD-MM-YYYY-{cabin_id}.json, same as the Swift app).
+        timestamp (datetime): Time of the snapshot (default: now).
 
     Returns:
         str: The path to the saved file.
     """
-    import time
+    writer = SnapshotWriter(history_dir)
+    path = writer.add(result, cabin_id, timestamp)
+    writer.commit()
+    return path
 
-    timestamp = time.strftime("%H-%d-%m-%Y")
-    filename = f"{history_dir}/{timestamp}.json"
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with open(filename, "w") as f:
-        json.dump(result, f)
 
-    return filename
+def parse_history_filename(filename: str):
+    """
+    Parse a history filename into its timestamp and cabin ID.
 
+    Args:
+        filename (str): A filename like "14-05-11-2025.json" or
+                        "14-05-11-2025-101297.json".
 
-def load_latest_files(history_dir: str = "history"):
+    Returns:
+        tuple: (datetime, cabin_id) where cabin_id is None for legacy files,
+               or None if the filename is not a history snapshot.
     """
-    Load the contents of the latest two files in the history folder.
+    if not filename.endswith(".json"):
+        return None
+
+    parts = filename[: -len(".json")].split("-", 4)
+    try:
+        hour, day, month, year = (int(p) for p in parts[:4])
+        timestamp = datetime.datetime(year, month, day, hour)
+    except ValueError:
+        return None
+
+    cabin_id = parts[4] if len(parts) == 5 else None
+    return timestamp, cabin_id
+
+
+def list_history_files(history_dir: str = "history", cabin_id: str = None):
+    """
+    List history snapshot files in chronological order.
 
     Args:
         history_dir (str): Directory containing history files (default: "history").
+        cabin_id (str): Only include files for this cabin. When None, only
+                        legacy files without a cabin ID are included.
 
     Returns:
-        list: A list of dictionaries containing the contents of the latest files.
-              Empty list if fewer than 2 files exist.
+        list: A list of (datetime, filename) tuples, oldest first.
     """
     if not os.path.exists(history_dir):
         return []
 
-    files = os.listdir(history_dir)
-    if len(files) < 2:
-        return []
+    snapshots = []
+    for file in os.listdir(history_dir):
+        parsed = parse_history_filename(file)
+        if parsed is None or parsed[1] != cabin_id:
+            continue
+        snapshots.append((parsed[0], file))
+
+    return sorted(snapshots)
 
-    latest_files = sorted(files)[-2:]
 
+def load_latest_files(history_dir: str = "history", cabin_id: str = None):
+    """
+    Load the contents of the latest two files in the history folder.
+
+    Args:
+        history_dir (str): Directory containing history files (default: "history").
+        cabin_id (str): Only consider snapshots saved for this cabin.
+
+    Returns:
+        list: A list of dictionaries containing the contents of the latest files.
+              Empty list if fewer than 2 readable files exist.
+    """
     results = []
-    for file in latest_files:
-        file_path = os.path.join(history_dir, file)
-        with open(file_path) as f:
-            result = json.load(f)
+    # Newest first; unreadable (e.g. truncated) files are skipped
+    for _, file in reversed(list_history_files(history_dir, cabin_id)):
+        result = load_snapshot(os.path.join(history_dir, file))
+        if result is not None:
             results.append(result)
+            if len(results) == 2:
+                return results[::-1]
 
-    return results
+    return []
 
 
 def diff_lists(list1, list2):
@@ -3,7 +3,7 @@
 import requests
 
 
-def get_availability(cabin_id: str, from_date: str, to_date: str):
+def get_availability(cabin_id: str, from_date: str, to_date: str, recorder=None, timeout: float = 30):
     """
     Get the availability of a specific cabin from the DNT website.
 
@@ -11,6 +11,9 @@ def get_availability(cabin_id: str, from_date: str, to_date: str):
     cabin_id (str): The cabin ID (e.g., "101297" for Stallen).
     from_date (str): Start date in YYYY-MM-DD format.
     to_date (str): End date in YYYY-MM-DD format.
+    recorder (ResponseRecorder): If given, every response (including failures)
+                                 is also written to its recording for later replay.
+    timeout (float): Seconds to wait for the server before giving up.
 
     Returns:
     dict: A dictionary containing the availability data, or None on error.
@@ -23,9 +26,13 @@ def get_availability(cabin_id: str, from_date: str, to_date: str):
     }
 
     try:
-        response = requests.get(url, params=params)
+        response = requests.get(url, params=params, timeout=timeout)
         response.raise_for_status()
-        return response.json()
+        availability = response.json()
     except requests.exceptions.RequestException:
         # Return None on error - let calling code handle error reporting
-        return None
+        availability = None
+
+    if recorder is not None:
+        recorder.record(cabin_id, from_date, to_date, availability)
+    return availability
@@ -0,0 +1,288 @@
+"""Memory-mapped columnar archive of availability history.
+
+The archive lays out every recorded snapshot as a fixed-width record, so
+analytics can scan a year of history for the whole fleet straight from the
+page cache without parsing JSON or allocating per record.
+
+File layout (all integers little-endian):
+
+- Header (64 bytes): magic, version, number of cabins, number of records,
+  bitmap width in days, ordinal of the first day, record size and the
+  offsets of the cabin table and the records.
+- Cabin table: one 48-byte entry per cabin with the null-padded cabin ID, the
+  index of its first record and its number of records.
+- Records, sorted by cabin and then snapshot time: timestamp (int64, epoch
+  seconds), cabin index (uint32), number of available days (uint32) and a
+  day bitmap where bit ``i`` is set if day ``first_day + i`` was available.
+
+Records are readable zero-copy through ``mmap`` and, if NumPy is installed,
+as a structured ``numpy.memmap`` through ``HistoryArchive.as_numpy()``.
+"""
+
+import datetime
+import mmap
+import os
+import struct
+
+from .dates import from_ordinal, to_ordinal
+from .journal import HistoryJournal, _to_epoch, list_journals
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, only needed for as_numpy()
+    np = None
+
+MAGIC = b"DNTARCH1"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHIQIiIQQ")
+HEADER_SIZE = 64
+CABIN_ENTRY = struct.Struct("<32sQQ")
+RECORD_PREFIX = struct.Struct("<qII")
+
+
+def _iter_snapshots(journal: HistoryJournal):
+    """Yield (epoch_seconds, set_of_day_ordinals) for every recorded state of a journal."""
+    days = set()
+    for when, added, removed in journal.changes(include_initial=True):
+        days.difference_update(to_ordinal(d) for d in removed)
+        days.update(to_ordinal(d) for d in added)
+        yield _to_epoch(when), days
+
+
+def export_archive(path: str, history_dir: str = "history", cabin_ids=None):
+    """
+    Export cabin journals to a memory-mappable archive file.
+
+    The journals are streamed twice (once to size the bitmap, once to write
+    the records) so memory use does not grow with the length of history.
+    The archive is written to a temporary file and renamed into place.
+
+    Args:
+        path (str): Where to write the archive.
+        history_dir (str): Directory containing history files (default: "history").
+        cabin_ids (list): Cabins to export (default: every cabin with a journal).
+
+    Returns:
+        int: Number of records written.
+    """
+    if cabin_ids is None:
+        cabin_ids = list_journals(history_dir)
+
+    # First pass: count records and find the range of days covered
+    counts = []
+    first_day, last_day = None, None
+    for cabin_id in cabin_ids:
+        count = 0
+        for _, days in _iter_snapshots(HistoryJournal(cabin_id, history_dir)):
+            count += 1
+            if days:
+                first_day = min(days) if first_day is None else min(first_day, min(days))
+                last_day = max(days) if last_day is None else max(last_day, max(days))
+        counts.append(count)
+
+    if first_day is None:
+        first_day = last_day = datetime.date.today().toordinal()
+    # Round the bitmap up to whole 64-bit words to keep records 8-byte aligned
+    day_count = (last_day - first_day) // 64 * 64 + 64
+    bitmap_size = day_count // 8
+    record_size = RECORD_PREFIX.size + bitmap_size
+    cabin_table_offset = HEADER_SIZE
+    records_offset = cabin_table_offset + CABIN_ENTRY.size * len(cabin_ids)
+    records_offset = (records_offset + 7) // 8 * 8
+    record_count = sum(counts)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                day_count // 64,
+                len(cabin_ids),
+                record_count,
+                record_size,
+                first_day,
+                0,
+                cabin_table_offset,
+                records_offset,
+            ).ljust(HEADER_SIZE, b"\0")
+        )
+
+        first_record = 0
+        for cabin_id, count in zip(cabin_ids, counts):
+            f.write(CABIN_ENTRY.pack(cabin_id.encode(), first_record, count))
+            first_record += count
+        f.write(b"\0" * (records_offset - f.tell()))
+
+        # Second pass: write the records
+        for index, cabin_id in enumerate(cabin_ids):
+            for t, days in _iter_snapshots(HistoryJournal(cabin_id, history_dir)):
+                bitmap = bytearray(bitmap_size)
+                for day in days:
+                    bit = day - first_day
+                    bitmap[bit >> 3] |= 1 << (bit & 7)
+                f.write(RECORD_PREFIX.pack(t, index, len(days)))
+                f.write(bitmap)
+
+    os.replace(tmp_path, path)
+    return record_count
+
+
+class HistoryArchive:
+    """Read-only, memory-mapped view of an archive written by export_archive()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        (
+            magic,
+            version,
+            words,
+            cabin_count,
+            self.record_count,
+            self.record_size,
+            self.first_day,
+            _,
+            cabin_table_offset,
+            self.records_offset,
+        ) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a DNT history archive (version {VERSION})")
+
+        self.day_count = words * 64
+        self.cabin_ids = []
+        self._cabin_ranges = {}
+        for i in range(cabin_count):
+            raw_id, first, count = CABIN_ENTRY.unpack_from(
+                self._mmap, cabin_table_offset + i * CABIN_ENTRY.size
+            )
+            cabin_id = raw_id.rstrip(b"\0").decode()
+            self.cabin_ids.append(cabin_id)
+            self._cabin_ranges[cabin_id] = (first, first + count)
+
+    def close(self):
+        """
+        Release the memory map and the underlying file.
+
+        Bitmaps returned by record() stay readable after closing; the map is
+        then unmapped once the last of them is garbage collected.
+        """
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Bitmaps from record() still point into the map
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.record_count
+
+    def _offset(self, index: int):
+        return self.records_offset + index * self.record_size
+
+    def timestamp(self, index: int):
+        """Epoch seconds of a record."""
+        return RECORD_PREFIX.unpack_from(self._mmap, self._offset(index))[0]
+
+    def record(self, index: int):
+        """
+        Return a record without copying its bitmap.
+
+        Returns:
+            tuple: (epoch_seconds, cabin_id, available_count, bitmap) where
+                   bitmap is a memoryview into the mapped file.
+        """
+        offset = self._offset(index)
+        t, cabin, count = RECORD_PREFIX.unpack_from(self._mmap, offset)
+        start = offset + RECORD_PREFIX.size
+        return t, self.cabin_ids[cabin], count, self._view[start : offset + self.record_size]
+
+    def records(self, cabin_id: str = None):
+        """
+        Iterate over records, optionally for a single cabin.
+
+        Yields:
+            tuple: See record().
+        """
+        start, stop = self._cabin_ranges[cabin_id] if cabin_id else (0, self.record_count)
+        for index in range(start, stop):
+            yield self.record(index)
+
+    def is_available(self, index: int, date: str):
+        """Test a single day of a record's bitmap."""
+        bit = to_ordinal(date) - self.first_day
+        if not 0 <= bit < self.day_count:
+            return False
+        byte = self._mmap[self._offset(index) + RECORD_PREFIX.size + (bit >> 3)]
+        return bool(byte >> (bit & 7) & 1)
+
+    def dates(self, index: int):
+        """Decode a record's bitmap to a sorted list of dates in the API's ISO format."""
+        bitmap = self.record(index)[3]
+        dates = []
+        for byte_index, byte in enumerate(bitmap):
+            while byte:
+                low = byte & -byte
+                day = self.first_day + byte_index * 8 + low.bit_length() - 1
+                dates.append(from_ordinal(day))
+                byte ^= low
+        return dates
+
+    def find(self, cabin_id: str, when):
+        """
+        Find the record describing a cabin's availability at an instant.
+
+        Args:
+            cabin_id (str): The cabin ID.
+            when (datetime): The instant to look up.
+
+        Returns:
+            int: Record index, or None if nothing was recorded before ``when``.
+        """
+        start, stop = self._cabin_ranges.get(cabin_id, (0, 0))
+        t = _to_epoch(when)
+        lo, hi = start, stop
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp(mid) <= t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1 if lo > start else None
+
+    def as_numpy(self):
+        """
+        Map the records as a NumPy structured array without copying.
+
+        Fields: ``time`` (int64), ``cabin`` (uint32), ``count`` (uint32) and
+        ``days`` (uint8 bitmap, use ``np.unpackbits(..., bitorder="little")``).
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if np is None:
+            raise ImportError("NumPy is required for HistoryArchive.as_numpy()")
+
+        dtype = np.dtype(
+            [
+                ("time", "<i8"),
+                ("cabin", "<u4"),
+                ("count", "<u4"),
+                ("days", "u1", (self.record_size - RECORD_PREFIX.size,)),
+            ]
+        )
+        return np.memmap(
+            self.path, dtype=dtype, mode="r", offset=self.records_offset, shape=(self.record_count,)
+        )
@@ -0,0 +1,107 @@
+"""Multi-process runner for fleet-wide history analysis.
+
+Work is partitioned by cabin: every worker process analyses whole cabins
+from their own journals and returns compact, fixed-size statistics, so no
+date lists are pickled between processes. Results are merged in sorted
+cabin order, so the outcome does not depend on scheduling.
+"""
+
+import datetime
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .journal import list_journals
+from .velocity import VelocityStats, analyze_booking_velocity
+
+
+def analyze_cabin_velocity(
+    cabin_id: str,
+    history_dir: str = "history",
+    sellout_threshold=datetime.timedelta(minutes=30),
+    max_sellouts: int = 50,
+):
+    """
+    Compute compact booking-velocity statistics for a single cabin.
+
+    Args:
+        cabin_id (str): The cabin ID.
+        history_dir (str): Directory containing history files (default: "history").
+        sellout_threshold (timedelta): Weekends gone within this long count as sellouts.
+        max_sellouts (int): Maximum number of sellouts to keep.
+
+    Returns:
+        VelocityStats: Statistics without stream state.
+    """
+    stats = analyze_booking_velocity(history_dir, [cabin_id], sellout_threshold, max_sellouts)
+    return stats.compact()
+
+
+def run_fleet(task, cabin_ids, workers: int = None, **kwargs):
+    """
+    Run a per-cabin task for many cabins across a process pool.
+
+    Args:
+        task (callable): A module-level function called as ``task(cabin_id, **kwargs)``.
+        cabin_ids (list): The cabins to process.
+        workers (int): Number of worker processes (default: CPU count).
+                       With 1 worker the tasks run in the calling process.
+        **kwargs: Extra keyword arguments passed to every task.
+
+    Returns:
+        list: (cabin_id, result) tuples sorted by cabin ID.
+    """
+    cabin_ids = sorted(cabin_ids)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(cabin_ids)))
+    job = functools.partial(task, **kwargs)
+
+    if workers == 1:
+        return [(cabin_id, job(cabin_id)) for cabin_id in cabin_ids]
+
+    # A few chunks per worker balances uneven cabins without per-task overhead
+    chunksize = max(1, len(cabin_ids) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(zip(cabin_ids, executor.map(job, cabin_ids, chunksize=chunksize)))
+
+
+def fleet_booking_velocity(
+    history_dir: str = "history",
+    cabin_ids=None,
+    workers: int = None,
+    sellout_threshold=datetime.timedelta(minutes=30),
+    max_sellouts: int = 50,
+):
+    """
+    Compute booking-velocity statistics for the whole fleet in parallel.
+
+    Gives the same result as analyze_booking_velocity(), since cabins are
+    independent of each other.
+
+    Args:
+        history_dir (str): Directory containing history files (default: "history").
+        cabin_ids (list): Cabins to include (default: every cabin with a journal).
+        workers (int): Number of worker processes (default: CPU count).
+        sellout_threshold (timedelta): Weekends gone within this long count as sellouts.
+        max_sellouts (int): Maximum number of sellouts to keep (fastest first).
+
+    Returns:
+        VelocityStats: The merged statistics.
+    """
+    if cabin_ids is None:
+        cabin_ids = list_journals(history_dir)
+
+    results = run_fleet(
+        analyze_cabin_velocity,
+        cabin_ids,
+        workers,
+        history_dir=history_dir,
+        sellout_threshold=sellout_threshold,
+        max_sellouts=max_sellouts,
+    )
+
+    merged = VelocityStats(sellout_threshold, max_sellouts)
+    for _, stats in results:
+        merged.merge(stats)
+    return merged
@@ -0,0 +1,283 @@
+"""Circuit breakers that stop hammering a failing API.
+
+Every cabin has its own breaker, and one global breaker watches the API as a
+whole. A breaker is *closed* while requests succeed. After too many failures
+it *opens* and requests are skipped without touching the network. Once its
+back-off delay has passed it goes *half-open* and lets a single probe
+request through: success closes it again, failure re-opens it with twice the
+delay (up to a maximum). Failures of requests that were already in flight
+when the breaker opened are counted but do not extend the back-off.
+
+A request is only made if both its cabin's breaker and the global breaker
+let it through, so a dead endpoint costs a handful of requests per back-off
+period instead of one timeout per cabin per cycle.
+
+Breaker state can be saved with to_dict() and restored after a restart, so
+a watcher does not forget an outage it was backing off from.
+"""
+
+import collections
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Failure tracking and exponential back-off for one cabin or the whole API."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        base_delay: float = 60,
+        max_delay: float = 3600,
+        failure_rate: float = None,
+        window: int = 20,
+    ):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker.
+            base_delay (float): Seconds the breaker stays open after the first trip.
+            max_delay (float): Upper bound for the doubling back-off delay.
+            failure_rate (float): Also open when this fraction of the last
+                                  ``window`` requests failed (None to disable).
+            window (int): Number of recent requests the failure rate is taken over.
+        """
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_rate = failure_rate
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.retry_at = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.skipped = 0
+        self._recent = collections.deque(maxlen=window)
+        self._probing = False
+
+    def ready(self, now: float):
+        """True if a request may be made now (does not change the state)."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return now >= self.retry_at
+        return not self._probing
+
+    def attempt(self):
+        """Note that a request is being made; an open breaker turns half-open for the probe."""
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            self._probing = True
+
+    def record_success(self):
+        """Close the breaker and reset the back-off."""
+        self.successes += 1
+        self._recent.append(True)
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.state = CLOSED
+        self._probing = False
+
+    def record_failure(self, now: float):
+        """Count a failure and open the breaker if a limit is reached."""
+        self.failures += 1
+        if self.state == OPEN:
+            # A request that was in flight when the breaker opened
+            return
+        self._recent.append(False)
+        self.consecutive_failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold or self._rate_exceeded():
+            self._trip(now)
+
+    def _rate_exceeded(self):
+        if self.failure_rate is None or len(self._recent) < max(2, self._recent.maxlen // 2):
+            return False
+        return self._recent.count(False) / len(self._recent) >= self.failure_rate
+
+    def _trip(self, now: float):
+        self.trips += 1
+        delay = min(self.base_delay * 2 ** (self.trips - 1), self.max_delay)
+        self.retry_at = now + delay
+        self.state = OPEN
+        self._recent.clear()
+
+    def retry_in(self, now: float):
+        """Seconds until the next probe is allowed (0 if closed or due)."""
+        if self.state == CLOSED:
+            return 0.0
+        return max(0.0, self.retry_at - now)
+
+    def stats(self, now: float):
+        """Return the breaker's counters as a JSON-serializable dict."""
+        return {
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": round(self.retry_in(now)),
+        }
+
+    def to_dict(self, now: float):
+        """
+        Return the breaker's state for saving, with times relative to ``now``.
+
+        A half-open breaker is saved as open and due, since its probe cannot
+        survive a restart.
+        """
+        return {
+            "state": OPEN if self.state == HALF_OPEN else self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+            "retry_in": self.retry_in(now),
+            "successes": self.successes,
+            "failures": self.failures,
+            "skipped": self.skipped,
+        }
+
+    def restore(self, state: dict, now: float):
+        """Load state saved by to_dict(); its retry delay counts from ``now``."""
+        self.state = state.get("state", CLOSED)
+        if self.state not in (CLOSED, OPEN):
+            self.state = CLOSED
+        self.consecutive_failures = int(state.get("consecutive_failures", 0))
+        self.trips = int(state.get("trips", 0))
+        self.retry_at = now + float(state.get("retry_in", 0))
+        self.successes = int(state.get("successes", 0))
+        self.failures = int(state.get("failures", 0))
+        self.skipped = int(state.get("skipped", 0))
+        self._recent.clear()
+        self._probing = False
+
+
+class BreakerBoard:
+    """Per-cabin breakers plus one global breaker, shared by the fetch threads."""
+
+    def __init__(
+        self,
+        cabin_threshold: int = 3,
+        global_threshold: int = 5,
+        global_failure_rate: float = 0.5,
+        base_delay: float = 60,
+        max_delay: float = 3600,
+        clock=time.monotonic,
+    ):
+        """
+        Args:
+            cabin_threshold (int): Consecutive failures that open a cabin's breaker.
+            global_threshold (int): Consecutive failures (any cabins) that open
+                                    the global breaker.
+            global_failure_rate (float): Failure fraction of recent requests that
+                                         opens the global breaker.
+            base_delay (float): Seconds a breaker stays open after its first trip.
+            max_delay (float): Upper bound for the back-off delay.
+            clock (callable): Returns the current time in seconds (for tests).
+        """
+        self.cabin_threshold = cabin_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.api = CircuitBreaker(global_threshold, base_delay, max_delay, global_failure_rate)
+        self.cabins = {}
+        self._lock = threading.Lock()
+
+    def _cabin(self, cabin_id: str):
+        breaker = self.cabins.get(cabin_id)
+        if breaker is None:
+            breaker = self.cabins[cabin_id] = CircuitBreaker(self.cabin_threshold, self.base_delay, self.max_delay)
+        return breaker
+
+    def allow(self, cabin_id: str):
+        """
+        Decide whether to fetch a cabin now.
+
+        Returns:
+            bool: True if the request may be made; the caller must then report
+                  its outcome with record(). False means skip it.
+        """
+        with self._lock:
+            now = self.clock()
+            cabin = self._cabin(cabin_id)
+            if cabin.ready(now) and self.api.ready(now):
+                cabin.attempt()
+                self.api.attempt()
+                return True
+            cabin.skipped += 1
+            self.api.skipped += 1
+            return False
+
+    def record(self, cabin_id: str, ok: bool):
+        """Report the outcome of a request allowed by allow()."""
+        with self._lock:
+            now = self.clock()
+            for breaker in (self._cabin(cabin_id), self.api):
+                if ok:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure(now)
+
+    def retry_in(self, cabin_id: str):
+        """Seconds until a cabin may be fetched again."""
+        with self._lock:
+            now = self.clock()
+            return max(self._cabin(cabin_id).retry_in(now), self.api.retry_in(now))
+
+    def to_dict(self):
+        """
+        Return the state of the global breaker and of every cabin breaker
+        that has failed, for saving across restarts.
+        """
+        with self._lock:
+            now = self.clock()
+            return {
+                "api": self.api.to_dict(now),
+                "cabins": {
+                    cabin_id: breaker.to_dict(now)
+                    for cabin_id, breaker in sorted(self.cabins.items())
+                    if breaker.failures
+                },
+            }
+
+    def restore(self, state: dict, elapsed: float = 0.0):
+        """
+        Load breaker state saved by to_dict().
+
+        Args:
+            state (dict): The saved state.
+            elapsed (float): Seconds since the state was saved; pending back-off
+                             delays are shortened by this much.
+        """
+        with self._lock:
+            now = self.clock() - elapsed
+            if state.get("api"):
+                self.api.restore(state["api"], now)
+            for cabin_id, cabin_state in (state.get("cabins") or {}).items():
+                self._cabin(cabin_id).restore(cabin_state, now)
+
+    def stats(self):
+        """
+        Summarize failures for display.
+
+        Returns:
+            dict: 'api' (the global breaker's stats), 'failures' and 'skipped'
+                  totals, and 'cabins' with the stats of every cabin that has
+                  failed at least once.
+        """
+        with self._lock:
+            now = self.clock()
+            return {
+                "api": self.api.stats(now),
+                "failures": self.api.failures,
+                "skipped": self.api.skipped,
+                "cabins": {
+                    cabin_id: breaker.stats(now)
+                    for cabin_id, breaker in sorted(self.cabins.items())
+                    if breaker.failures
+                },
+            }
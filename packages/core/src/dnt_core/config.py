@@ -20,6 +20,40 @@ def load_cabins(config_file: str = "dnt_hytter.yaml"):
     return config.get("dnt_hytter", [])
 
 
+def load_rules(config_file: str = "dnt_hytter.yaml"):
+    """
+    Load watch rule definitions from the YAML file.
+
+    Args:
+        config_file (str): Path to the YAML configuration file.
+
+    Returns:
+        list: Rule dicts from the 'varsler' section (empty if there is none).
+              See dnt_core.rules for the keys.
+    """
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    return config.get("varsler") or []
+
+
+def load_subscribers(config_file: str = "dnt_hytter.yaml"):
+    """
+    Load subscriber definitions from the YAML file.
+
+    Args:
+        config_file (str): Path to the YAML configuration file.
+
+    Returns:
+        list: Subscriber dicts from the 'abonnenter' section (empty if there is
+              none). See dnt_core.subscribers for the keys.
+    """
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    return config.get("abonnenter") or []
+
+
 def extract_cabin_id(url: str):
     """
     Extract the cabin ID from a DNT booking URL.
@@ -31,3 +65,21 @@ def extract_cabin_id(url: str):
         str: The cabin ID (e.g., '101297')
     """
     return url.rstrip("/").split("/")[-1]
+
+
+def resolve_cabin_id(cabins, name_or_id: str):
+    """
+    Resolve a cabin name or ID to a cabin ID.
+
+    Args:
+        cabins (list): Cabin configuration as returned by load_cabins().
+        name_or_id (str): A cabin name (case-insensitive) or a cabin ID.
+
+    Returns:
+        str: The cabin ID. Unknown names are returned unchanged, so plain
+             IDs of cabins that are not configured still work.
+    """
+    for cabin in cabins:
+        if cabin["navn"].lower() == name_or_id.lower():
+            return extract_cabin_id(cabin["url"])
+    return name_or_id
@@ -0,0 +1,169 @@
+"""Compact representation of availability calendars.
+
+The DNT API returns dates as ISO strings like "2022-01-01T00:00:00.000Z".
+A Calendar parses them once into day ordinals (days since 0001-01-01, as
+used by ``datetime.date.toordinal()``) held in a sorted ``array('i')``:
+four bytes per day instead of a string object, with weekday and weekend
+arithmetic done on plain integers.
+
+A Calendar still iterates as ISO strings in the API's format, so it can be
+passed anywhere a list of dates is expected (saved as JSON, diffed, etc.).
+Calendars parsed from an API response also keep the number of free beds per
+day; calendars rebuilt from history only know which days were available.
+"""
+
+import bisect
+import datetime
+from array import array
+
+# Suffix the DNT API uses for dates, restored when formatting ordinals
+DATE_SUFFIX = "T00:00:00.000Z"
+
+FRIDAY = 4
+SATURDAY = 5
+SUNDAY = 6
+
+
+def to_ordinal(date):
+    """
+    Convert a date to its day ordinal.
+
+    Args:
+        date: An ISO date string (only the first 10 characters are used),
+              a datetime.date/datetime.datetime or an ordinal.
+
+    Returns:
+        int: The proleptic Gregorian ordinal of the day.
+    """
+    if isinstance(date, int):
+        return date
+    if isinstance(date, str):
+        return datetime.date.fromisoformat(date[:10]).toordinal()
+    return date.toordinal()
+
+
+def from_ordinal(ordinal: int):
+    """Format a day ordinal as an ISO string in the API's format."""
+    return datetime.date.fromordinal(ordinal).isoformat() + DATE_SUFFIX
+
+
+def weekday_of(ordinal: int):
+    """Return the weekday (0=Monday) of a day ordinal without creating a date."""
+    return (ordinal - 1) % 7
+
+
+def default_date_range(today: datetime.date = None):
+    """
+    Return the date range the watchers check: today until November next year.
+
+    Returns:
+        tuple: (from_date, to_date) as YYYY-MM-DD strings.
+    """
+    today = today or datetime.date.today()
+    return today.strftime("%Y-%m-%d"), f"{today.year + 1}-11-01"
+
+
+class Calendar:
+    """Sorted, de-duplicated set of available days stored as day ordinals."""
+
+    __slots__ = ("ordinals", "beds")
+
+    def __init__(self, ordinals=(), beds=None):
+        """
+        Create a calendar from day ordinals.
+
+        Args:
+            ordinals (iterable): Day ordinals in any order, duplicates allowed.
+            beds (iterable): Optional free beds per day, parallel to ``ordinals``.
+                             Duplicate days keep their highest count.
+        """
+        if beds is None:
+            self.ordinals = array("i", sorted(set(ordinals)))
+            self.beds = None
+            return
+
+        counts = {}
+        for ordinal, count in zip(ordinals, beds):
+            counts[ordinal] = max(count, counts.get(ordinal, 0))
+        self.ordinals = array("i", sorted(counts))
+        self.beds = array("i", (counts[ordinal] for ordinal in self.ordinals))
+
+    @classmethod
+    def from_iso(cls, dates):
+        """
+        Parse ISO date strings (or dates) into a calendar.
+
+        Passing a Calendar returns it unchanged, so this is safe to call on
+        values that may already have been parsed.
+        """
+        if isinstance(dates, Calendar):
+            return dates
+        return cls(to_ordinal(date) for date in dates)
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def __iter__(self):
+        return (from_ordinal(ordinal) for ordinal in self.ordinals)
+
+    def __contains__(self, date):
+        ordinal = to_ordinal(date)
+        index = bisect.bisect_left(self.ordinals, ordinal)
+        return index < len(self.ordinals) and self.ordinals[index] == ordinal
+
+    def __eq__(self, other):
+        # Bed counts are extra detail; two calendars with the same days are equal
+        if isinstance(other, Calendar):
+            return self.ordinals == other.ordinals
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Calendar({len(self)} days)"
+
+    def to_iso(self):
+        """Return the days as a list of ISO strings in the API's format."""
+        return list(self)
+
+    def to_dates(self):
+        """Return the days as a list of datetime.date objects."""
+        return [datetime.date.fromordinal(ordinal) for ordinal in self.ordinals]
+
+    def first(self):
+        """Earliest available day as a datetime.date, or None if empty."""
+        return datetime.date.fromordinal(self.ordinals[0]) if self.ordinals else None
+
+    def last(self):
+        """Latest available day as a datetime.date, or None if empty."""
+        return datetime.date.fromordinal(self.ordinals[-1]) if self.ordinals else None
+
+    def weekday_counts(self):
+        """
+        Count available days per weekday.
+
+        Returns:
+            list: Seven counts, Monday first.
+        """
+        counts = [0] * 7
+        for ordinal in self.ordinals:
+            counts[(ordinal - 1) % 7] += 1
+        return counts
+
+    def on_weekday(self, weekday: int):
+        """Return the ordinals of all available days on a weekday (0=Monday)."""
+        return [ordinal for ordinal in self.ordinals if (ordinal - 1) % 7 == weekday]
+
+    def weekend_fridays(self):
+        """
+        Find full Friday-Sunday weekends.
+
+        Returns:
+            list: Ordinals of the Fridays whose weekend is fully available.
+        """
+        days = self.ordinals
+        fridays = []
+        # Sorted and de-duplicated, so Fri, Sat, Sun are consecutive entries
+        for i in range(len(days) - 2):
+            ordinal = days[i]
+            if (ordinal - 1) % 7 == FRIDAY and days[i + 2] == ordinal + 2:
+                fridays.append(ordinal)
+        return fridays
@@ -0,0 +1,136 @@
+"""Typed change events between two availability calendars.
+
+compute_events() turns an old and a new Calendar into one sorted list of
+events in a single linear merge over their day ordinals. Rendering, notifications, the toolbar, the
+journal and the local API all consume the same events instead of
+re-parsing and re-classifying the raw added/removed lists themselves.
+"""
+
+import datetime
+from typing import NamedTuple
+
+from .dates import FRIDAY, SATURDAY, Calendar, from_ordinal, weekday_of
+
+DATE_OPENED = "date_opened"
+DATE_CLOSED = "date_closed"
+WEEKEND_OPENED = "weekend_opened"
+WEEKEND_CLOSED = "weekend_closed"
+SATURDAY_OPENED = "saturday_opened"
+
+# Order of events on the same day
+_KIND_ORDER = {
+    WEEKEND_OPENED: 0,
+    SATURDAY_OPENED: 1,
+    DATE_OPENED: 2,
+    WEEKEND_CLOSED: 3,
+    DATE_CLOSED: 4,
+}
+
+
+class ChangeEvent(NamedTuple):
+    """
+    A single change between two calendars.
+
+    ``day`` is the affected day; for weekend events it is the Friday.
+    ``date`` is the same day as an ISO string in the API's format.
+    """
+
+    kind: str
+    day: datetime.date
+    date: str
+
+    def to_dict(self):
+        """Return a JSON-serializable representation."""
+        return {"type": self.kind, "date": self.day.isoformat()}
+
+
+def compute_events(old_dates, new_dates):
+    """
+    Compute the sorted, typed change events between two calendars.
+
+    Both calendars are walked in a single merge over their sorted day
+    ordinals. A weekend opens when Friday, Saturday and Sunday are all
+    available in the new calendar but not in the old one (and vice versa
+    for closing). Saturdays that open outside a newly opened weekend get
+    their own SATURDAY_OPENED event.
+
+    Args:
+        old_dates (Calendar or list): Previously available dates.
+        new_dates (Calendar or list): Currently available dates.
+
+    Returns:
+        list: ChangeEvent objects sorted by day.
+    """
+    old = Calendar.from_iso(old_dates)
+    new = Calendar.from_iso(new_dates)
+    old_days = old.ordinals
+    new_days = new.ordinals
+
+    events = []
+    fridays = set()
+    i = j = 0
+    while i < len(old_days) or j < len(new_days):
+        if j == len(new_days) or (i < len(old_days) and old_days[i] < new_days[j]):
+            ordinal = old_days[i]
+            events.append((ordinal, _KIND_ORDER[DATE_CLOSED], DATE_CLOSED))
+            i += 1
+        elif i == len(old_days) or new_days[j] < old_days[i]:
+            ordinal = new_days[j]
+            events.append((ordinal, _KIND_ORDER[DATE_OPENED], DATE_OPENED))
+            j += 1
+        else:
+            i += 1
+            j += 1
+            continue
+
+        # Friday, Saturday and Sunday belong to the weekend starting that Friday
+        weekday = weekday_of(ordinal)
+        if weekday >= FRIDAY:
+            fridays.add(ordinal - (weekday - FRIDAY))
+
+    opened_weekends = set()
+    for friday in fridays:
+        weekend = (friday, friday + 1, friday + 2)
+        was_open = all(day in old for day in weekend)
+        is_open = all(day in new for day in weekend)
+        if is_open and not was_open:
+            events.append((friday, _KIND_ORDER[WEEKEND_OPENED], WEEKEND_OPENED))
+            opened_weekends.add(friday)
+        elif was_open and not is_open:
+            events.append((friday, _KIND_ORDER[WEEKEND_CLOSED], WEEKEND_CLOSED))
+
+    for ordinal, _, kind in list(events):
+        if kind == DATE_OPENED and weekday_of(ordinal) == SATURDAY and ordinal - 1 not in opened_weekends:
+            events.append((ordinal, _KIND_ORDER[SATURDAY_OPENED], SATURDAY_OPENED))
+
+    events.sort()
+    return [
+        ChangeEvent(kind, datetime.date.fromordinal(ordinal), from_ordinal(ordinal))
+        for ordinal, _, kind in events
+    ]
+
+
+def events_of(events, kind: str):
+    """
+    Filter events by type.
+
+    Args:
+        events (list): ChangeEvent objects.
+        kind (str): One of the event type constants, e.g. WEEKEND_OPENED.
+
+    Returns:
+        list: The matching events, in their original order.
+    """
+    return [event for event in events if event.kind == kind]
+
+
+def split_dates(events):
+    """
+    Recover the plain added/removed lists (diff_lists() semantics) from events.
+
+    Returns:
+        tuple: (added_dates, removed_dates) as lists of ISO strings.
+    """
+    added = [event.date for event in events if event.kind == DATE_OPENED]
+    removed = [event.date for event in events if event.kind == DATE_CLOSED]
+    return added, removed
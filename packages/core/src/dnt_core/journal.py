@@ -0,0 +1,466 @@
+"""Per-cabin change journal for point-in-time availability queries.
+
+Each cabin gets an append-only journal in ``{history_dir}/journal/``:
+
+- ``{cabin_id}.jsonl`` holds one record per line. A checkpoint record stores
+  the full set of available dates (``{"t": ..., "c": [...]}``), a delta record
+  stores only what changed (``{"t": ..., "a": [...], "r": [...]}``).
+- ``{cabin_id}.idx`` is a fixed-width binary index of ``(timestamp, offset,
+  is_checkpoint)`` int64 triples, one per record.
+
+A lookup bisects the index for the nearest checkpoint at or before the
+requested instant, seeks straight to it and replays only the deltas between
+the checkpoint and that instant.
+
+A record is synced to disk before its index entry is written, so an index
+entry never points at data a crash could lose. The check pipeline skips that
+sync and makes the whole cycle durable with one sync_filesystem() call
+instead; a crash before it can leave index entries whose records never
+reached the disk. Either way, what a crash leaves behind (partial last index
+entries or cut-off last records) is ignored on load and overwritten by the
+next append.
+"""
+
+import bisect
+import datetime
+import json
+import os
+from array import array
+
+from .analysis import diff_lists, list_history_files, parse_history_filename
+from .events import split_dates
+from .snapshots import load_snapshot, sync_file, sync_filesystem
+
+# Write a full checkpoint after this many delta records
+CHECKPOINT_INTERVAL = 24
+
+
+def _to_epoch(when):
+    """Convert a datetime (or epoch seconds) to integer epoch seconds."""
+    if isinstance(when, datetime.datetime):
+        return int(when.timestamp())
+    return int(when)
+
+
+def _decodes(line: bytes):
+    """True if a journal line is complete and valid JSON."""
+    if not line.endswith(b"\n"):
+        return False
+    try:
+        json.loads(line)
+    except ValueError:
+        return False
+    return True
+
+
+class HistoryJournal:
+    """Append-only availability journal for a single cabin."""
+
+    def __init__(self, cabin_id: str, history_dir: str = "history"):
+        self.cabin_id = cabin_id
+        self.directory = os.path.join(history_dir, "journal")
+        self.path = os.path.join(self.directory, f"{cabin_id}.jsonl")
+        self.index_path = os.path.join(self.directory, f"{cabin_id}.idx")
+        self._index = None
+        # End of the last intact record in the .jsonl file
+        self._end = None
+        # Complete entries in the .idx file when it was loaded
+        self._stored_entries = 0
+
+    def _load_index(self):
+        """Load the binary index into memory (timestamps, offsets, checkpoint flags)."""
+        if self._index is None:
+            raw = array("q")
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "rb") as f:
+                    data = f.read()
+                # Ignore a partially written last entry
+                raw.frombytes(data[: len(data) - len(data) % (3 * raw.itemsize)])
+            times, offsets, checkpoints = list(raw[0::3]), list(raw[1::3]), list(raw[2::3])
+            self._stored_entries = len(times)
+
+            # Ignore entries whose record was cut off by a crash
+            self._end = None
+            while offsets:
+                line = self._line_at(offsets[-1])
+                if _decodes(line):
+                    self._end = offsets[-1] + len(line)
+                    break
+                del times[-1], offsets[-1], checkpoints[-1]
+            self._index = (times, offsets, checkpoints)
+        return self._index
+
+    def _line_at(self, offset: int):
+        """Return the raw line of the .jsonl file starting at ``offset``."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                return f.readline()
+        except OSError:
+            return b""
+
+    def __len__(self):
+        return len(self._load_index()[0])
+
+    def _read_records(self, position: int, stop_time: int = None):
+        """
+        Yield (timestamp, record) tuples starting at the given index position.
+
+        Args:
+            position (int): Index position of the first record to read.
+            stop_time (int): Stop before the first record newer than this.
+        """
+        times, offsets, _ = self._load_index()
+        if position >= len(times):
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(offsets[position])
+            for i in range(position, len(times)):
+                if stop_time is not None and times[i] > stop_time:
+                    return
+                line = f.readline()
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    if i == len(times) - 1:
+                        # Cut off by a crash, like a partial index entry
+                        return
+                    raise
+                yield times[i], record
+
+    def _checkpoint_before(self, position: int):
+        """Return the index position of the nearest checkpoint at or before position."""
+        checkpoints = self._load_index()[2]
+        while position > 0 and not checkpoints[position]:
+            position -= 1
+        return position
+
+    def _state_at(self, timestamp: int):
+        """
+        Reconstruct the set of available dates at the given epoch timestamp.
+
+        Returns:
+            tuple: (set_of_dates, index_position_of_next_record)
+        """
+        times = self._load_index()[0]
+        position = bisect.bisect_right(times, timestamp)
+        if position == 0:
+            return set(), 0
+
+        dates = set()
+        start = self._checkpoint_before(position - 1)
+        for _, record in self._read_records(start, stop_time=timestamp):
+            if "c" in record:
+                dates = set(record["c"])
+            else:
+                dates.difference_update(record["r"])
+                dates.update(record["a"])
+
+        return dates, position
+
+    def last_timestamp(self):
+        """Return the epoch time of the latest record, or None if the journal is empty."""
+        times = self._load_index()[0]
+        return times[-1] if times else None
+
+    def latest(self):
+        """
+        Return the most recently recorded availability.
+
+        Returns:
+            list: Sorted list of dates in ISO format, or None if the journal is empty.
+        """
+        times = self._load_index()[0]
+        if not times:
+            return None
+        return sorted(self._state_at(times[-1])[0])
+
+    def append(self, dates, timestamp=None, events=None, durable: bool = True):
+        """
+        Record a new availability snapshot.
+
+        Only the difference to the previous snapshot is stored, with a full
+        checkpoint every CHECKPOINT_INTERVAL records. Unchanged snapshots are
+        not written.
+
+        Args:
+            dates (list): Available dates in ISO format.
+            timestamp (datetime): When the snapshot was taken (default: now).
+            events (list): ChangeEvent objects already computed against the
+                           latest recorded state, to avoid diffing again.
+            durable (bool): Sync the record before writing its index entry.
+                            Callers that pass False sync the filesystem themselves.
+
+        Returns:
+            tuple: (added_dates, removed_dates) compared to the previous snapshot.
+        """
+        if timestamp is None:
+            timestamp = datetime.datetime.now()
+        t = _to_epoch(timestamp)
+
+        times, offsets, checkpoints = self._load_index()
+        if times and t < times[-1]:
+            raise ValueError(
+                f"Snapshot at {timestamp} is older than the latest journal entry"
+            )
+
+        if events is not None and times:
+            added, removed = split_dates(events)
+        else:
+            previous, _ = self._state_at(times[-1]) if times else (set(), 0)
+            added, removed = diff_lists(previous, dates)
+        if times and not added and not removed:
+            return added, removed
+
+        is_checkpoint = (
+            not times
+            or len(times) - self._checkpoint_before(len(times) - 1) >= CHECKPOINT_INTERVAL
+        )
+        if is_checkpoint:
+            record = {"t": t, "c": sorted(dates)}
+        else:
+            record = {"t": t, "a": sorted(added), "r": sorted(removed)}
+
+        line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path, "ab") as f:
+            # Drop a line a crash cut off after the last intact record
+            tail = self._line_at(self._end) if self._end is not None else b""
+            if tail and not tail.endswith(b"\n"):
+                f.truncate(self._end)
+            offset = f.seek(0, os.SEEK_END)
+            f.write(line)
+            if durable:
+                # The record must be on disk before an index entry points at it
+                sync_file(f)
+        self._end = offset + len(line)
+
+        entry = array("q", [t, offset, int(is_checkpoint)])
+        with open(self.index_path, "ab") as f:
+            size = f.seek(0, os.SEEK_END)
+            entries, partial = divmod(size, len(entry) * entry.itemsize)
+            if entries == self._stored_entries:
+                # Drop a partial entry and entries whose records were cut off
+                f.truncate(len(times) * len(entry) * entry.itemsize)
+            elif partial:
+                f.truncate(size - partial)
+            entry.tofile(f)
+        self._stored_entries = len(times) + 1
+
+        times.append(t)
+        offsets.append(offset)
+        checkpoints.append(int(is_checkpoint))
+
+        return added, removed
+
+    def availability_at(self, when):
+        """
+        Reconstruct the available dates at an arbitrary instant.
+
+        Args:
+            when (datetime): The instant to reconstruct.
+
+        Returns:
+            list: Sorted list of dates in ISO format available at that instant.
+        """
+        dates, _ = self._state_at(_to_epoch(when))
+        return sorted(dates)
+
+    def changes(self, start=None, end=None, include_initial: bool = False):
+        """
+        Yield every change recorded between two instants.
+
+        The first record at or after ``start`` is located through the index, so
+        only the requested window is read from disk.
+
+        Args:
+            start (datetime): Start of the window (default: beginning of history).
+            end (datetime): End of the window, inclusive (default: now).
+            include_initial (bool): First yield the state at the start of the
+                                    window (all dates as added), even if empty.
+
+        Yields:
+            tuple: (datetime, added_dates, removed_dates) in chronological order.
+        """
+        if start is None:
+            dates, position = set(), 0
+        else:
+            dates, position = self._state_at(_to_epoch(start) - 1)
+            if include_initial:
+                yield start, sorted(dates), []
+                include_initial = False
+        stop_time = None if end is None else _to_epoch(end)
+
+        for t, record in self._read_records(position, stop_time=stop_time):
+            if "c" in record:
+                current = set(record["c"])
+                added, removed = diff_lists(dates, current)
+                dates = current
+            else:
+                added, removed = record["a"], record["r"]
+                dates.difference_update(removed)
+                dates.update(added)
+
+            if added or removed or include_initial:
+                yield datetime.datetime.fromtimestamp(t), sorted(added), sorted(removed)
+                include_initial = False
+
+
+def list_journals(history_dir: str = "history"):
+    """
+    List the cabin IDs that have a journal.
+
+    Args:
+        history_dir (str): Directory containing history files (default: "history").
+
+    Returns:
+        list: Sorted list of cabin IDs.
+    """
+    directory = os.path.join(history_dir, "journal")
+    if not os.path.exists(directory):
+        return []
+
+    return sorted(f[: -len(".jsonl")] for f in os.listdir(directory) if f.endswith(".jsonl"))
+
+
+def append_snapshot(cabin_id: str, dates, timestamp=None, history_dir: str = "history"):
+    """
+    Append an availability snapshot to a cabin's journal.
+
+    Args:
+        cabin_id (str): The cabin ID.
+        dates (list): Available dates in ISO format.
+        timestamp (datetime): When the snapshot was taken (default: now).
+        history_dir (str): Directory containing history files (default: "history").
+
+    Returns:
+        tuple: (added_dates, removed_dates) compared to the previous snapshot.
+    """
+    return HistoryJournal(cabin_id, history_dir).append(dates, timestamp)
+
+
+def availability_at(cabin_id: str, when, history_dir: str = "history"):
+    """
+    Reconstruct a cabin's available dates at an arbitrary past instant.
+
+    Args:
+        cabin_id (str): The cabin ID.
+        when (datetime): The instant to reconstruct.
+        history_dir (str): Directory containing history files (default: "history").
+
+    Returns:
+        list: Sorted list of dates in ISO format.
+    """
+    return HistoryJournal(cabin_id, history_dir).availability_at(when)
+
+
+def change_timeline(
+    cabin_id: str,
+    start=None,
+    end=None,
+    first_date: str = None,
+    last_date: str = None,
+    history_dir: str = "history",
+):
+    """
+    Return the change timeline of a cabin, optionally limited to some dates.
+
+    Args:
+        cabin_id (str): The cabin ID.
+        start (datetime): Only include changes at or after this instant.
+        end (datetime): Only include changes at or before this instant.
+        first_date (str): Only include bookable dates on or after this day (YYYY-MM-DD).
+        last_date (str): Only include bookable dates on or before this day (YYYY-MM-DD).
+        history_dir (str): Directory containing history files (default: "history").
+
+    Returns:
+        list: A list of (datetime, added_dates, removed_dates) tuples.
+    """
+
+    def in_range(date):
+        day = date[:10]
+        if first_date and day < first_date:
+            return False
+        if last_date and day > last_date:
+            return False
+        return True
+
+    timeline = []
+    for when, added, removed in HistoryJournal(cabin_id, history_dir).changes(start, end):
+        added = [d for d in added if in_range(d)]
+        removed = [d for d in removed if in_range(d)]
+        if added or removed:
+            timeline.append((when, added, removed))
+
+    return timeline
+
+
+def open_intervals(timeline):
+    """
+    Turn a change timeline into the periods each date was bookable.
+
+    Args:
+        timeline (list): (datetime, added_dates, removed_dates) tuples, as
+                         returned by change_timeline().
+
+    Returns:
+        dict: Maps each date to a list of (opened, closed) tuples. ``closed`` is
+              None if the date was still available at the end of the timeline,
+              ``opened`` is None if it was already available when it started.
+    """
+    intervals = {}
+    for when, added, removed in timeline:
+        for date in added:
+            intervals.setdefault(date, []).append((when, None))
+        for date in removed:
+            periods = intervals.setdefault(date, [])
+            if periods and periods[-1][1] is None:
+                periods[-1] = (periods[-1][0], when)
+            else:
+                periods.append((None, when))
+
+    return dict(sorted(intervals.items()))
+
+
+def import_history_files(history_dir: str = "history"):
+    """
+    Build journals from the per-cabin JSON snapshot files in the history folder.
+
+    Only files saved with a cabin ID (HH-DD-MM-YYYY-{cabin_id}.json) can be
+    attributed to a cabin. Snapshots older than a cabin's latest journal
+    entry are skipped, so the import can be re-run safely.
+
+    Args:
+        history_dir (str): Directory containing history files (default: "history").
+
+    Returns:
+        dict: Number of snapshots imported per cabin ID.
+    """
+    cabin_ids = set()
+    if os.path.exists(history_dir):
+        for file in os.listdir(history_dir):
+            parsed = parse_history_filename(file)
+            if parsed and parsed[1]:
+                cabin_ids.add(parsed[1])
+
+    imported = {}
+    for cabin_id in sorted(cabin_ids):
+        journal = HistoryJournal(cabin_id, history_dir)
+        times = journal._load_index()[0]
+        latest = times[-1] if times else None
+        count = 0
+        for timestamp, file in list_history_files(history_dir, cabin_id):
+            if latest is not None and _to_epoch(timestamp) <= latest:
+                continue
+            dates = load_snapshot(os.path.join(history_dir, file))
+            if dates is None:
+                # Truncated or corrupt snapshot
+                continue
+            journal.append(dates, timestamp, durable=False)
+            count += 1
+        imported[cabin_id] = count
+
+    if any(imported.values()):
+        sync_filesystem(history_dir)
+    return imported
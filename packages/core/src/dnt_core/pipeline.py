@@ -0,0 +1,261 @@
+"""Staged availability-check pipeline shared by the CLI and the toolbar.
+
+A check cycle runs as four stages, each in its own thread(s), connected by
+bounded queues:
+
+    fetch -> extract -> persist -> sink
+
+- fetch:   download the availability calendar (several threads)
+- extract: parse the API response into a compact Calendar
+- persist: compare with the journal, append to it and buffer the snapshot file
+- sink:    the front end's callback (render, notify, update caches)
+
+While one cabin is being saved, the next is being parsed and a third is on
+the network, so a cycle takes about as long as its slowest stage instead of
+the sum of all stages. Because the queues are bounded, a slow disk or a slow
+front end holds back fetching instead of piling up responses in memory.
+
+Journal records are written without syncing, and the snapshot files of a
+cycle are committed together by a SnapshotWriter once the cycle is done. Its
+single filesystem sync makes both durable: one sync per cycle instead of one
+per cabin.
+
+With a WarmState, the previous calendar of a cabin comes from memory as long
+as no other process has journaled a newer one, so the journal is only
+replayed (and its dates parsed) on a cabin's first check.
+"""
+
+import queue
+import threading
+import time
+
+from .analysis import extract_calendar
+from .api import get_availability
+from .config import extract_cabin_id
+from .dates import Calendar, default_date_range
+from .events import compute_events
+from .journal import HistoryJournal
+from .snapshots import SnapshotWriter
+
+STAGES = ("fetch", "extract", "persist", "sink")
+
+# Marks the end of the input on a queue
+_DONE = object()
+
+
+class CheckResult:
+    """Outcome of checking a single cabin, passed from stage to stage."""
+
+    def __init__(self, cabin_id: str, name: str):
+        self.cabin_id = cabin_id
+        self.name = name
+        # Time of the check; None means now (set by replays to the recorded time)
+        self.checked_at = None
+        self.response = None
+        self.dates = None
+        self.previous = None
+        self.events = []
+        self.error = None
+        # True if a circuit breaker skipped the request
+        self.skipped = False
+        self.timings = {}
+
+    @property
+    def ok(self):
+        """True if the cabin was fetched and saved."""
+        return self.error is None
+
+    @property
+    def first_run(self):
+        """True if there was no earlier snapshot to compare with."""
+        return self.ok and self.previous is None
+
+
+class CheckPipeline:
+    """Runs check cycles through the fetch, extract, persist and sink stages."""
+
+    def __init__(
+        self,
+        fetch=get_availability,
+        history_dir: str = "history",
+        fetch_workers: int = 2,
+        queue_size: int = 4,
+        on_timing=None,
+        breakers=None,
+        state=None,
+    ):
+        """
+        Configure the pipeline.
+
+        Args:
+            fetch (callable): Called as ``fetch(cabin_id, from_date, to_date)``
+                              and returns the API response or None.
+            history_dir (str): Directory containing history files (default: "history").
+            fetch_workers (int): Number of concurrent fetch threads.
+            queue_size (int): Capacity of each queue between stages.
+            on_timing (callable): Hook called as ``on_timing(stage, result, seconds)``
+                                  after every stage of every cabin.
+            breakers (BreakerBoard): Optional circuit breakers that skip fetches
+                                     for failing cabins or a failing API.
+            state (WarmState): Optional saved state holding each cabin's last
+                               calendar, used instead of replaying the journal.
+        """
+        self.fetch = fetch
+        self.history_dir = history_dir
+        self.fetch_workers = max(1, fetch_workers)
+        self.queue_size = queue_size
+        self.on_timing = on_timing
+        self.breakers = breakers
+        self.state = state
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.cycle_seconds = 0.0
+        self._timing_lock = threading.Lock()
+
+    def _timed(self, stage: str, result: CheckResult, func):
+        """Run one stage for one cabin, recording its duration and any error."""
+        start = time.perf_counter()
+        try:
+            if result.ok or stage == "sink":
+                func(result)
+        except Exception as e:
+            result.error = f"{stage}: {e}"
+        seconds = time.perf_counter() - start
+
+        result.timings[stage] = seconds
+        with self._timing_lock:
+            self.stage_seconds[stage] += seconds
+        if self.on_timing is not None:
+            try:
+                self.on_timing(stage, result, seconds)
+            except Exception:
+                # A broken hook must not kill the stage thread and lose the cabin
+                pass
+
+    def _fetch(self, result: CheckResult):
+        breakers = self.breakers
+        if breakers is not None and not breakers.allow(result.cabin_id):
+            result.skipped = True
+            result.error = f"Skipped: circuit open, next try in {breakers.retry_in(result.cabin_id):.0f}s"
+            return
+
+        try:
+            result.response = self.fetch(result.cabin_id, *self._date_range)
+        finally:
+            if breakers is not None:
+                breakers.record(result.cabin_id, bool(result.response))
+        if not result.response:
+            result.error = "Failed to fetch availability"
+
+    def _extract(self, result: CheckResult):
+        result.dates = extract_calendar(result.response)
+        # The raw response is no longer needed; free it before it queues up
+        result.response = None
+
+    def _previous(self, journal: HistoryJournal):
+        """Return the cabin's latest recorded calendar, or None on its first check."""
+        last = journal.last_timestamp()
+        if last is None:
+            return None
+        saved = self.state.cabins.get(journal.cabin_id) if self.state is not None else None
+        if saved is not None and last <= int(saved.checked_at.timestamp()):
+            # Nothing was journaled after our own last check
+            return saved.calendar
+        return Calendar.from_iso(journal.latest())
+
+    def _persist(self, result: CheckResult):
+        journal = HistoryJournal(result.cabin_id, self.history_dir)
+        result.previous = self._previous(journal)
+        result.events = compute_events(result.previous or Calendar(), result.dates)
+        journal.append(result.dates, result.checked_at, events=result.events, durable=False)
+        self._writer.add(result.dates, result.cabin_id, result.checked_at)
+
+    def _run_stage(self, stage: str, func, inbox: queue.Queue, outbox: queue.Queue = None, forward_done: bool = True):
+        """Process results from ``inbox`` until the end marker arrives."""
+        while True:
+            result = inbox.get()
+            if result is _DONE:
+                if outbox is not None and forward_done:
+                    outbox.put(_DONE)
+                return
+            self._timed(stage, result, func)
+            if outbox is not None:
+                outbox.put(result)
+
+    def run(self, cabins, sink=None, date_range=None):
+        """
+        Check a list of cabins.
+
+        Args:
+            cabins (list): Cabin configuration dicts (with 'navn' and 'url'),
+                           or CheckResult objects created by the caller.
+            sink (callable): Called as ``sink(result)`` for every cabin, one at a
+                             time, in the order the cabins finish.
+            date_range (tuple): (from_date, to_date) to check (default: default_date_range()).
+
+        Returns:
+            list: CheckResult objects in the order the cabins finished.
+        """
+        # Built up front so bad cabin entries raise here, before any thread starts
+        checks = [
+            cabin if isinstance(cabin, CheckResult) else CheckResult(extract_cabin_id(cabin["url"]), cabin["navn"])
+            for cabin in cabins
+        ]
+        self._date_range = date_range or default_date_range()
+        self._writer = SnapshotWriter(self.history_dir)
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        cycle_start = time.perf_counter()
+
+        inputs = queue.Queue(self.queue_size)
+        fetched = queue.Queue(self.queue_size)
+        extracted = queue.Queue(self.queue_size)
+        persisted = queue.Queue(self.queue_size)
+        results = []
+
+        def finish(result):
+            try:
+                if sink is not None:
+                    sink(result)
+            finally:
+                results.append(result)
+
+        # Fetchers share one outbox, which the feeder closes once all of them are done
+        fetchers = [
+            threading.Thread(target=self._run_stage, args=("fetch", self._fetch, inputs, fetched, False), daemon=True)
+            for _ in range(self.fetch_workers)
+        ]
+        downstream = [
+            threading.Thread(target=self._run_stage, args=("extract", self._extract, fetched, extracted), daemon=True),
+            threading.Thread(target=self._run_stage, args=("persist", self._persist, extracted, persisted), daemon=True),
+        ]
+        for thread in fetchers + downstream:
+            thread.start()
+
+        feeder = threading.Thread(target=self._feed, args=(checks, inputs, fetchers, fetched), daemon=True)
+        feeder.start()
+
+        # The sink runs in the calling thread so front ends can render safely
+        self._run_stage("sink", finish, persisted)
+        feeder.join()
+        for thread in downstream:
+            thread.join()
+
+        # Group commit of the cycle's snapshot files, syncing the journal too
+        commit_start = time.perf_counter()
+        self._writer.commit()
+        self.stage_seconds["persist"] += time.perf_counter() - commit_start
+
+        self.cycle_seconds = time.perf_counter() - cycle_start
+        return results
+
+    def _feed(self, checks, inputs, fetchers, fetched):
+        """Queue the checks, then end every fetcher and close the fetch stage."""
+        try:
+            for result in checks:
+                inputs.put(result)
+        finally:
+            # Always end the stages, or run() would wait forever
+            for _ in fetchers:
+                inputs.put(_DONE)
+            for fetcher in fetchers:
+                fetcher.join()
+            fetched.put(_DONE)
@@ -0,0 +1,340 @@
+"""Record raw API responses and replay them through the check pipeline.
+
+A recording is a gzip-compressed JSON-lines file with one record per API
+call:
+
+    {"t": epoch, "cabin": cabin_id, "from": from_date, "to": to_date, "r": response}
+
+Failed calls are recorded with ``"r": null``, so outages replay as outages.
+Each recording session appends a new gzip member; readers see one stream.
+
+A crashed session leaves an unterminated member behind. Readers decompress
+member by member and, after a damaged member, resume at the next gzip header,
+so every complete record is still read. Opening a recording for appending
+repairs a truncated last member first: its complete records are carried over
+into the new session's member.
+
+Replaying groups the records into check cycles (a cycle ends when a cabin
+comes up again) and runs every cycle through a CheckPipeline whose fetch
+stage serves the recorded responses. Snapshots are stamped with the recorded
+times, so a replay into an empty history directory produces the same
+journals, events and notifications as the original run.
+"""
+
+import datetime
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+
+from .pipeline import CheckPipeline, CheckResult
+
+_GZIP_MAGIC = b"\x1f\x8b\x08"
+_CHUNK = 1 << 16
+
+
+def _find_member(f, offset: int):
+    """Return the offset of the next gzip header at or after ``offset``, or None."""
+    f.seek(offset)
+    tail = b""
+    while True:
+        chunk = f.read(_CHUNK)
+        if not chunk:
+            return None
+        data = tail + chunk
+        found = data.find(_GZIP_MAGIC)
+        if found >= 0:
+            return offset - len(tail) + found
+        offset += len(chunk)
+        tail = data[-(len(_GZIP_MAGIC) - 1):]
+
+
+def _scan_members(f, offset: int = 0):
+    """
+    Decompress the gzip members of a file one by one.
+
+    Yields:
+        tuple: (member_start, None, line) for every complete line, and
+               (member_start, member_end, None) after every member that ended
+               properly. A truncated or damaged member yields its readable
+               lines and scanning resumes at the next gzip header.
+    """
+    start = _find_member(f, offset)
+    while start is not None:
+        f.seek(start)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        consumed = 0
+        buffer = b""
+        damaged = False
+        while not decompressor.eof and not damaged:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            consumed += len(chunk)
+            saved = decompressor.copy()
+            try:
+                buffer += decompressor.decompress(chunk)
+            except zlib.error:
+                # The failed call discards its output; redo the chunk byte by
+                # byte to keep everything before the damage
+                decompressor = saved
+                damaged = True
+                for i in range(len(chunk)):
+                    try:
+                        buffer += decompressor.decompress(chunk[i:i + 1])
+                    except zlib.error:
+                        break
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield start, None, line
+
+        if decompressor.eof and not damaged:
+            end = start + consumed - len(decompressor.unused_data)
+            yield start, end, None
+            start = _find_member(f, end)
+        else:
+            start = _find_member(f, start + 1)
+
+
+def _repair(path: str):
+    """
+    Make a recording end with a complete gzip member.
+
+    Anything after the last complete member (a crashed session) is cut off.
+
+    Returns:
+        list: The complete lines salvaged from the cut-off part.
+    """
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        good_end = 0
+        for _, end, _ in _scan_members(f):
+            if end is not None:
+                good_end = end
+        if good_end == size:
+            return []
+        salvaged = [line for _, end, line in _scan_members(f, good_end) if end is None]
+        f.truncate(good_end)
+    return salvaged
+
+
+class ResponseRecorder:
+    """Appends API responses to a recording; safe to share between fetch threads."""
+
+    def __init__(self, path: str):
+        """
+        Open a recording for appending.
+
+        Args:
+            path (str): Recording file, e.g. "history/responses.jsonl.gz".
+        """
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        salvaged = _repair(path) if os.path.exists(path) else []
+        self._file = gzip.open(path, "ab")
+        if salvaged:
+            self._file.write(b"".join(line + b"\n" for line in salvaged))
+            self._file.flush()
+
+    def record(self, cabin_id: str, from_date: str, to_date: str, response, when: float = None):
+        """
+        Append one API response.
+
+        Args:
+            cabin_id (str): The cabin ID.
+            from_date (str): Start of the requested range (YYYY-MM-DD).
+            to_date (str): End of the requested range (YYYY-MM-DD).
+            response (dict): The decoded response, or None for a failed call.
+            when (float): Epoch time of the call (default: now).
+        """
+        record = {
+            "t": round(time.time() if when is None else when, 3),
+            "cabin": cabin_id,
+            "from": from_date,
+            "to": to_date,
+            "r": response,
+        }
+        line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        with self._lock:
+            self._file.write(line)
+            # Sync-flush so a crash loses at most the record being written
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        """Finish the gzip member and close the file."""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_recording(path: str):
+    """
+    Read the records of a recording in the order they were written.
+
+    Damaged or cut-off parts are skipped; every complete record is read.
+
+    Args:
+        path (str): Recording file written by ResponseRecorder.
+
+    Yields:
+        tuple: (datetime, cabin_id, from_date, to_date, response).
+    """
+    with open(path, "rb") as f:
+        for _, _, line in _scan_members(f):
+            if line is None:
+                continue
+            try:
+                record = json.loads(line)
+                when = datetime.datetime.fromtimestamp(record["t"])
+                yield when, record["cabin"], record["from"], record["to"], record["r"]
+            except (KeyError, TypeError, ValueError):
+                # Part of a damaged member
+                continue
+
+
+def recorded_cycles(records):
+    """
+    Group records into check cycles.
+
+    A cycle checks every cabin at most once, so a new cycle starts whenever a
+    cabin that is already part of the current cycle comes up again.
+
+    Args:
+        records (iterable): Records as yielded by read_recording().
+
+    Yields:
+        list: The records of one cycle, in recording order.
+    """
+    cycle = []
+    seen = set()
+    for record in records:
+        cabin_id = record[1]
+        if cabin_id in seen:
+            yield cycle
+            cycle = []
+            seen = set()
+        cycle.append(record)
+        seen.add(cabin_id)
+    if cycle:
+        yield cycle
+
+
+class ReplaySource:
+    """Serves recorded responses to a CheckPipeline, one cycle at a time."""
+
+    def __init__(self, path: str, realtime: bool = False, speed: float = 1.0, sleep=time.sleep):
+        """
+        Prepare a replay.
+
+        Args:
+            path (str): Recording file written by ResponseRecorder.
+            realtime (bool): Keep the original pacing between cycles instead of
+                             replaying as fast as possible.
+            speed (float): Pacing multiplier in realtime mode, e.g. 60 replays
+                           an hourly schedule once a minute.
+            sleep (callable): Used to wait between cycles (for tests).
+        """
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        self.sleep = sleep
+        self._responses = {}
+
+    def fetch(self, cabin_id: str, from_date: str, to_date: str):
+        """Fetch function for CheckPipeline: the current cycle's recorded response."""
+        return self._responses.get(cabin_id)
+
+    def cycles(self, names=None):
+        """
+        Step through the recording cycle by cycle.
+
+        The responses of a cycle are served by fetch() until the next cycle is
+        requested. In realtime mode this waits until the cycle is due.
+
+        Args:
+            names (dict): Optional display name per cabin ID.
+
+        Yields:
+            tuple: (recorded_time, results, date_range) where results are fresh
+                   CheckResult objects stamped with their recorded times.
+        """
+        names = names or {}
+        first_time = None
+        start = time.monotonic()
+        for cycle in recorded_cycles(read_recording(self.path)):
+            when = cycle[0][0]
+            if first_time is None:
+                first_time = when
+            if self.realtime:
+                due = start + (when - first_time).total_seconds() / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self.sleep(delay)
+
+            self._responses = {cabin_id: response for _, cabin_id, _, _, response in cycle}
+            results = []
+            for checked_at, cabin_id, _, _, _ in cycle:
+                result = CheckResult(cabin_id, names.get(cabin_id, cabin_id))
+                result.checked_at = checked_at
+                results.append(result)
+            yield when, results, (cycle[0][2], cycle[0][3])
+
+
+def replay_recording(
+    path: str,
+    history_dir: str,
+    sink=None,
+    realtime: bool = False,
+    speed: float = 1.0,
+    names=None,
+    on_cycle=None,
+):
+    """
+    Run a recording through the full check pipeline.
+
+    Replays should write to an empty history directory: the journals refuse
+    snapshots older than their latest entry.
+
+    Args:
+        path (str): Recording file written by ResponseRecorder.
+        history_dir (str): Directory the replayed snapshots and journals go to.
+        sink (callable): Pipeline sink, called as ``sink(result)`` per cabin.
+        realtime (bool): Keep the original pacing between cycles.
+        speed (float): Pacing multiplier in realtime mode.
+        names (dict): Optional display name per cabin ID.
+        on_cycle (callable): Called as ``on_cycle(recorded_time, pipeline)``
+                             after every cycle, e.g. to print timings.
+
+    Returns:
+        dict: Totals with keys 'cycles', 'checks', 'failures', 'events'
+              (excluding first runs), 'seconds' and 'stage_seconds'.
+    """
+    source = ReplaySource(path, realtime, speed)
+    pipeline = CheckPipeline(fetch=source.fetch, history_dir=history_dir)
+    totals = {"cycles": 0, "checks": 0, "failures": 0, "events": 0, "seconds": 0.0}
+    stage_seconds = dict.fromkeys(pipeline.stage_seconds, 0.0)
+
+    for when, results, date_range in source.cycles(names):
+        for result in pipeline.run(results, sink, date_range):
+            totals["checks"] += 1
+            totals["failures"] += not result.ok
+            if not result.first_run:
+                totals["events"] += len(result.events)
+        totals["cycles"] += 1
+        totals["seconds"] += pipeline.cycle_seconds
+        for stage, seconds in pipeline.stage_seconds.items():
+            stage_seconds[stage] += seconds
+        if on_cycle is not None:
+            on_cycle(when, pipeline)
+
+    totals["stage_seconds"] = stage_seconds
+    return totals
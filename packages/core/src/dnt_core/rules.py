@@ -0,0 +1,299 @@
+"""Declarative watch rules, compiled into fast matchers.
+
+Rules live in the config file under ``varsler``:
+
+    varsler:
+      - navn: "Vinterhelg"
+        hytter: ["Stallen", "Fuglemyrhytta"]   # names or IDs; omit for all cabins
+        maaneder: "des-mar"                    # or a list like [12, 1, 2, 3]
+        min_netter: 2                          # consecutive nights
+        med_lordag: true                       # the stay must include a Saturday night
+        min_senger: 4                          # free beds on every night
+
+A rule matches when a cycle opens at least one night of a stay that
+satisfies it. Rules are compiled once into month bitmasks and a per-cabin
+index. Evaluation only looks at the cycle's DATE_OPENED events: for every
+opened night it finds the run of consecutive qualifying nights around it in
+the new calendar and checks the run's length and whether it spans a
+Saturday, using plain integer arithmetic on day ordinals.
+"""
+
+import bisect
+import datetime
+from typing import NamedTuple
+
+from .config import resolve_cabin_id
+from .dates import SATURDAY, Calendar, weekday_of
+from .events import DATE_OPENED
+
+MONTH_NAMES = ("jan", "feb", "mar", "apr", "mai", "jun", "jul", "aug", "sep", "okt", "nov", "des")
+ALL_MONTHS = 0b1111111111110  # bits 1-12
+
+RULE_KEYS = {"navn", "hytter", "maaneder", "min_netter", "med_lordag", "min_senger"}
+
+
+class _MonthCache(dict):
+    """Month number per day ordinal, computed on first use."""
+
+    def __missing__(self, ordinal):
+        month = self[ordinal] = datetime.date.fromordinal(ordinal).month
+        return month
+
+
+# Shared by all engines; bounded by the span of dates ever checked
+_MONTHS = _MonthCache()
+
+
+class RuleMatch(NamedTuple):
+    """A stay that satisfies a rule, found in one cycle's changes."""
+
+    rule: str
+    cabin_id: str
+    first_night: datetime.date
+    last_night: datetime.date
+
+    @property
+    def nights(self):
+        """Number of nights in the stay."""
+        return (self.last_night - self.first_night).days + 1
+
+    def to_dict(self):
+        """Return a JSON-serializable representation."""
+        return {
+            "rule": self.rule,
+            "cabin_id": self.cabin_id,
+            "first_night": self.first_night.isoformat(),
+            "last_night": self.last_night.isoformat(),
+            "nights": self.nights,
+        }
+
+
+def _month_number(value, rule_name: str):
+    """Parse a month given as a number or a Norwegian/English abbreviation."""
+    if isinstance(value, int):
+        month = value
+    else:
+        text = str(value).strip().lower()
+        if text.isdigit():
+            month = int(text)
+        elif text[:3] in MONTH_NAMES:
+            month = MONTH_NAMES.index(text[:3]) + 1
+        elif text[:3] in ("may", "oct", "dec"):
+            month = {"may": 5, "oct": 10, "dec": 12}[text[:3]]
+        else:
+            raise ValueError(f"Unknown month '{value}' in rule '{rule_name}'")
+    if not 1 <= month <= 12:
+        raise ValueError(f"Unknown month '{value}' in rule '{rule_name}'")
+    return month
+
+
+def parse_months(spec, rule_name: str = "?"):
+    """
+    Compile a month specification into a bitmask (bit n set for month n).
+
+    Args:
+        spec: None (all months), a month, a range like "des-mar" or "12-3"
+              (wrapping over the new year), or a list of these.
+        rule_name (str): Rule name for error messages.
+
+    Returns:
+        int: The month bitmask.
+    """
+    if spec is None:
+        return ALL_MONTHS
+    if isinstance(spec, (list, tuple)):
+        mask = 0
+        for part in spec:
+            mask |= parse_months(part, rule_name)
+        return mask
+
+    text = str(spec)
+    if "-" in text:
+        first, last = (_month_number(part, rule_name) for part in text.split("-", 1))
+        mask = 0
+        month = first
+        while True:
+            mask |= 1 << month
+            if month == last:
+                return mask
+            month = month % 12 + 1
+    return 1 << _month_number(spec, rule_name)
+
+
+class WatchRule:
+    """A compiled rule: cabin set, month bitmask and stay constraints."""
+
+    __slots__ = ("name", "cabin_ids", "month_mask", "min_nights", "saturday", "min_beds")
+
+    def __init__(
+        self,
+        name: str,
+        cabin_ids=None,
+        month_mask: int = ALL_MONTHS,
+        min_nights: int = 1,
+        saturday: bool = False,
+        min_beds: int = 0,
+    ):
+        """
+        Args:
+            name (str): Rule name shown in alerts.
+            cabin_ids (iterable): Cabins the rule watches, or None for all.
+            month_mask (int): Allowed months of every night (bit n = month n).
+            min_nights (int): Minimum consecutive nights.
+            saturday (bool): The stay must include a Saturday night.
+            min_beds (int): Minimum free beds on every night.
+        """
+        self.name = name
+        self.cabin_ids = frozenset(cabin_ids) if cabin_ids is not None else None
+        self.month_mask = month_mask
+        self.min_nights = max(1, min_nights)
+        self.saturday = saturday
+        self.min_beds = min_beds
+
+    def _qualifies(self, calendar: Calendar, index: int, months: dict):
+        """True if the night at ``index`` of the calendar can be part of a matching stay."""
+        if not self.month_mask >> months[calendar.ordinals[index]] & 1:
+            return False
+        if self.min_beds:
+            return calendar.beds is not None and calendar.beds[index] >= self.min_beds
+        return True
+
+    def match(self, cabin_id: str, calendar: Calendar, opened, months: dict):
+        """
+        Find the stays this rule matches around the opened nights.
+
+        Args:
+            cabin_id (str): The cabin the calendar belongs to.
+            calendar (Calendar): The cabin's new availability.
+            opened (list): Sorted ordinals of the nights opened this cycle.
+            months (dict): Month number per day ordinal.
+
+        Returns:
+            list: RuleMatch objects, one per matching run of nights.
+        """
+        days = calendar.ordinals
+        matches = []
+        covered = None
+        for ordinal in opened:
+            if covered is not None and ordinal <= covered:
+                # Already part of a run examined for an earlier opened night
+                continue
+            index = bisect.bisect_left(days, ordinal)
+            if index == len(days) or days[index] != ordinal or not self._qualifies(calendar, index, months):
+                continue
+
+            first = last = index
+            while first > 0 and days[first - 1] == days[first] - 1 and self._qualifies(calendar, first - 1, months):
+                first -= 1
+            while last + 1 < len(days) and days[last + 1] == days[last] + 1 and self._qualifies(calendar, last + 1, months):
+                last += 1
+            lo, hi = days[first], days[last]
+            covered = hi
+
+            if hi - lo + 1 < self.min_nights:
+                continue
+            if self.saturday and lo + (SATURDAY - weekday_of(lo)) % 7 > hi:
+                continue
+            matches.append(
+                RuleMatch(self.name, cabin_id, datetime.date.fromordinal(lo), datetime.date.fromordinal(hi))
+            )
+        return matches
+
+
+class RuleEngine:
+    """Compiled set of watch rules, indexed by cabin."""
+
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+        self._by_cabin = {}
+        self._everywhere = []
+        for rule in self.rules:
+            if rule.cabin_ids is None:
+                self._everywhere.append(rule)
+            else:
+                for cabin_id in rule.cabin_ids:
+                    self._by_cabin.setdefault(cabin_id, []).append(rule)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def rules_for(self, cabin_id: str):
+        """Return the rules that watch a cabin."""
+        return self._by_cabin.get(cabin_id, []) + self._everywhere
+
+    def evaluate(self, cabin_id: str, events, calendar):
+        """
+        Match the rules against one cabin's change events.
+
+        Args:
+            cabin_id (str): The cabin ID.
+            events (list): ChangeEvent objects from this cycle.
+            calendar (Calendar): The cabin's new availability.
+
+        Returns:
+            list: RuleMatch objects, ordered by rule and then by date.
+        """
+        opened = [event.day.toordinal() for event in events if event.kind == DATE_OPENED]
+        if not opened:
+            return []
+        rules = self.rules_for(cabin_id)
+        if not rules:
+            return []
+
+        calendar = Calendar.from_iso(calendar)
+        matches = []
+        for rule in rules:
+            matches.extend(rule.match(cabin_id, calendar, opened, _MONTHS))
+        return matches
+
+
+def compile_rules(specs, cabins=()):
+    """
+    Compile rule definitions from the config file.
+
+    Args:
+        specs (list): Rule dicts as returned by load_rules().
+        cabins (list): Cabin configuration, used to resolve cabin names to IDs.
+
+    Returns:
+        RuleEngine: The compiled rules.
+
+    Raises:
+        ValueError: If a rule has unknown keys, unknown cabins or invalid values.
+    """
+    rules = []
+    for number, spec in enumerate(specs, 1):
+        name = str(spec.get("navn", f"Varsel {number}"))
+        unknown = set(spec) - RULE_KEYS
+        if unknown:
+            raise ValueError(f"Unknown key(s) {', '.join(sorted(unknown))} in rule '{name}'")
+
+        hytter = spec.get("hytter")
+        if isinstance(hytter, (str, int)):
+            hytter = [hytter]
+        cabin_ids = None
+        if hytter is not None:
+            cabin_ids = []
+            for cabin in hytter:
+                cabin_id = resolve_cabin_id(cabins, str(cabin))
+                if not cabin_id.isdigit():
+                    raise ValueError(f"Unknown cabin '{cabin}' in rule '{name}'")
+                cabin_ids.append(cabin_id)
+
+        try:
+            min_nights = int(spec.get("min_netter", 1))
+            min_beds = int(spec.get("min_senger", 0))
+        except (TypeError, ValueError):
+            raise ValueError(f"min_netter and min_senger must be numbers in rule '{name}'") from None
+
+        rules.append(
+            WatchRule(
+                name,
+                cabin_ids,
+                parse_months(spec.get("maaneder"), name),
+                min_nights,
+                bool(spec.get("med_lordag", False)),
+                min_beds,
+            )
+        )
+    return RuleEngine(rules)
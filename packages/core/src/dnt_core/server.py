@@ -0,0 +1,293 @@
+"""Local JSON API serving the watcher's current state from memory.
+
+The watcher process owns a StateCache and updates it after every check.
+Clients (toolbars, scripts) read it over HTTP instead of scanning the
+history directory, so only the watcher ever touches the disk.
+
+Endpoints (all GET, all JSON):
+
+- ``/cabins``            current availability per cabin
+- ``/cabins/{cabin_id}`` a single cabin
+- ``/weekends``          every available full Fri-Sun weekend
+- ``/changes?since=N&wait=S``
+                         changes with a sequence number above ``N``; if there
+                         are none, wait up to ``S`` seconds for one (long-poll).
+                         Sequence numbers restart with the watcher, so an ``N``
+                         above the current sequence returns all recent changes
+                         right away and the client resyncs to ``sequence``.
+- ``/health``            uptime, last check, failure counts and circuit breakers
+
+Data responses carry an ETag; a request with a matching If-None-Match
+header gets an empty 304 reply. ``/health`` is built fresh on every request
+and has no ETag.
+"""
+
+import collections
+import datetime
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .analysis import find_available_weekends
+from .config import extract_cabin_id
+from .journal import HistoryJournal
+
+DEFAULT_PORT = 8765
+# Upper bound for long-poll waits, so stuck clients do not pin threads forever
+MAX_WAIT = 60
+# Endpoints built on every request instead of cached per state version
+LIVE_PATHS = {"/health"}
+
+
+class StateCache:
+    """Thread-safe in-memory state of all watched cabins."""
+
+    def __init__(self, max_changes: int = 500, breakers=None):
+        """
+        Args:
+            max_changes (int): Number of recent changes kept for /changes.
+            breakers (BreakerBoard): Circuit breakers whose stats /health reports.
+        """
+        self.breakers = breakers
+        self._lock = threading.Condition()
+        self._cabins = {}
+        self._changes = collections.deque(maxlen=max_changes)
+        self._sequence = 0
+        self._version = 0
+        self._bodies = {}
+        self.started = time.time()
+        self.last_check = None
+        self.failures = 0
+
+    @property
+    def sequence(self):
+        """Sequence number of the latest change."""
+        return self._sequence
+
+    def update(self, cabin_id: str, name: str, dates, events=(), when=None):
+        """
+        Store the result of a successful check.
+
+        Args:
+            cabin_id (str): The cabin ID.
+            name (str): Display name of the cabin.
+            dates (list): All currently available dates.
+            events (list): ChangeEvent objects since the previous check.
+            when (datetime): Time of the check (default: now).
+        """
+        when = when or datetime.datetime.now()
+        weekends = [friday.strftime("%Y-%m-%d") for friday, _ in find_available_weekends(dates)]
+        with self._lock:
+            self._cabins[cabin_id] = {
+                "cabin_id": cabin_id,
+                "name": name,
+                "checked_at": when.isoformat(timespec="seconds"),
+                "dates": sorted(dates),
+                "weekends": weekends,
+            }
+            if events:
+                self._sequence += 1
+                self._changes.append(
+                    {
+                        "seq": self._sequence,
+                        "cabin_id": cabin_id,
+                        "name": name,
+                        "time": when.isoformat(timespec="seconds"),
+                        "events": [event.to_dict() for event in events],
+                    }
+                )
+            self.last_check = when
+            self._touch()
+
+    def record_failure(self, cabin_id: str):
+        """Count a failed check for the health endpoint."""
+        with self._lock:
+            self.failures += 1
+            self._touch()
+
+    def load_from_history(self, cabins, history_dir: str = "history", state=None):
+        """
+        Seed the cache with the latest known state of each cabin.
+
+        Args:
+            cabins (list): Cabin configuration as returned by load_cabins().
+            history_dir (str): Directory containing history files (default: "history").
+            state (WarmState): Saved warm-start state; cabins found there are
+                               loaded from it instead of replaying their journal.
+        """
+        now = datetime.datetime.now()
+        for cabin in cabins:
+            cabin_id = extract_cabin_id(cabin["url"])
+            saved = state.cabins.get(cabin_id) if state is not None else None
+            if saved is not None:
+                self.update(cabin_id, cabin["navn"], saved.calendar.to_iso(), when=saved.checked_at)
+                continue
+            journal = HistoryJournal(cabin_id, history_dir)
+            if len(journal):
+                self.update(cabin_id, cabin["navn"], journal.availability_at(now), when=now)
+
+    def _touch(self):
+        """Invalidate cached responses and wake up long-polling clients."""
+        self._version += 1
+        self._bodies.clear()
+        self._lock.notify_all()
+
+    def _build(self, path: str):
+        """Build the response object for a path, or None if it does not exist."""
+        if path == "/cabins":
+            return list(self._cabins.values())
+        if path.startswith("/cabins/"):
+            return self._cabins.get(path[len("/cabins/"):])
+        if path == "/weekends":
+            return [
+                {"cabin_id": cabin["cabin_id"], "name": cabin["name"], "friday": friday}
+                for cabin in self._cabins.values()
+                for friday in cabin["weekends"]
+            ]
+        if path == "/health":
+            return {
+                "status": "ok",
+                "uptime": round(time.time() - self.started, 1),
+                "last_check": self.last_check.isoformat(timespec="seconds") if self.last_check else None,
+                "cabins": len(self._cabins),
+                "failures": self.failures,
+                "sequence": self._sequence,
+                # Read live: breakers change without touching the cache
+                "breakers": self.breakers.stats() if self.breakers is not None else None,
+            }
+        return None
+
+    def response(self, path: str):
+        """
+        Return the serialized response body and ETag for a path.
+
+        Bodies are serialized once per state version and then served from
+        memory, except for LIVE_PATHS, which are rebuilt every time and have
+        no ETag.
+
+        Returns:
+            tuple: (body_bytes, etag), or (None, None) for unknown paths.
+        """
+        if path in LIVE_PATHS:
+            with self._lock:
+                payload = self._build(path)
+            return json.dumps(payload, separators=(",", ":")).encode(), None
+
+        with self._lock:
+            if path not in self._bodies:
+                payload = self._build(path)
+                if payload is None:
+                    return None, None
+                body = json.dumps(payload, separators=(",", ":")).encode()
+                self._bodies[path] = (body, f'"{self._version}"')
+            return self._bodies[path]
+
+    def changes_since(self, since: int, wait: float = 0):
+        """
+        Return the changes with a sequence number above ``since``.
+
+        Args:
+            since (int): Last sequence number the client has seen.
+            wait (float): Seconds to wait for a new change if there is none.
+
+        Returns:
+            list: Change dicts, oldest first. A ``since`` from before a restart,
+                  above the current sequence, returns all recent changes without
+                  waiting.
+        """
+        deadline = time.monotonic() + min(wait, MAX_WAIT)
+        with self._lock:
+            if since > self._sequence:
+                return list(self._changes)
+            while self._sequence <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._lock.wait(remaining)
+            return [change for change in self._changes if change["seq"] > since]
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Serves StateCache responses; the cache is attached to the server."""
+
+    def log_message(self, format, *args):
+        # Keep the watcher's terminal output clean
+        pass
+
+    def _send(self, status: int, body: bytes = b"", etag: str = None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        cache = self.server.cache
+        url = urlparse(self.path)
+        path = url.path.rstrip("/") or "/"
+
+        if path == "/changes":
+            query = parse_qs(url.query)
+            try:
+                since = int(query.get("since", ["0"])[0])
+                wait = float(query.get("wait", ["0"])[0])
+            except ValueError:
+                self._send(400, b'{"error":"since and wait must be numbers"}')
+                return
+            changes = cache.changes_since(since, wait)
+            body = json.dumps({"sequence": cache.sequence, "changes": changes}, separators=(",", ":"))
+            self._send(200, body.encode())
+            return
+
+        body, etag = cache.response(path)
+        if body is None:
+            self._send(404, b'{"error":"not found"}')
+        elif etag is not None and self.headers.get("If-None-Match") == etag:
+            self._send(304, etag=etag)
+        else:
+            self._send(200, body, etag)
+
+
+def start_server(cache: StateCache, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+    """
+    Serve a StateCache over HTTP in a background thread.
+
+    Args:
+        cache (StateCache): The state to serve.
+        host (str): Interface to bind (default: localhost only).
+        port (int): TCP port (default: 8765).
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), _RequestHandler)
+    server.daemon_threads = True
+    server.cache = cache
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def fetch_state(path: str = "/cabins", base_url: str = f"http://127.0.0.1:{DEFAULT_PORT}", timeout: float = 0.5):
+    """
+    Read from a running watcher's API.
+
+    Args:
+        path (str): Endpoint path, e.g. "/cabins" or "/health".
+        base_url (str): Address of the watcher API.
+        timeout (float): Seconds to wait for a reply.
+
+    Returns:
+        The decoded JSON response, or None if no watcher is reachable.
+    """
+    try:
+        with urllib.request.urlopen(base_url + path, timeout=timeout) as response:
+            return json.load(response)
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
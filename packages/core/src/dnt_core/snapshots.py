@@ -0,0 +1,229 @@
+"""Crash-safe, group-committed writing of history snapshots.
+
+A check cycle produces one snapshot file per cabin
+(``HH-DD-MM-YYYY-{cabin_id}.json``). SnapshotWriter buffers them and commits
+the whole cycle at once:
+
+1. every snapshot is written to a temporary ``.json.tmp`` file next to its
+   final name (ignored by list_history_files()),
+2. one sync_filesystem() call makes them durable, together with everything
+   else written to the history directory during the cycle (the journal),
+3. each temporary file is renamed over its final name, which is atomic.
+
+A crash at any point leaves either the old file or the complete new one,
+never a truncated snapshot. The renames reach the disk with the next sync,
+so a power loss may at worst undo the latest rename. That is one sync per
+cycle instead of one per file.
+"""
+
+import json
+import os
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import ctypes
+
+    _syncfs = ctypes.CDLL(None, use_errno=True).syncfs if sys.platform.startswith("linux") else None
+except (ImportError, OSError, AttributeError):
+    _syncfs = None
+
+from .dates import Calendar
+
+TMP_SUFFIX = ".tmp"
+
+
+def snapshot_filename(cabin_id: str = None, timestamp=None):
+    """
+    Build a snapshot filename: HH-DD-MM-YYYY[-{cabin_id}].json.
+
+    Args:
+        cabin_id (str): Optional cabin ID (same naming as the Swift app).
+        timestamp (datetime): Time of the snapshot (default: now).
+
+    Returns:
+        str: The filename without directory.
+    """
+    if timestamp is None:
+        stamp = time.strftime("%H-%d-%m-%Y")
+    else:
+        stamp = timestamp.strftime("%H-%d-%m-%Y")
+    if cabin_id:
+        stamp = f"{stamp}-{cabin_id}"
+    return f"{stamp}.json"
+
+
+def sync_file(f):
+    """Flush an open file to storage, through the drive cache where the OS allows."""
+    f.flush()
+    if fcntl is not None and hasattr(fcntl, "F_FULLFSYNC"):
+        try:
+            fcntl.fcntl(f.fileno(), fcntl.F_FULLFSYNC)
+            return
+        except OSError:
+            pass
+    os.fsync(f.fileno())
+
+
+def sync_filesystem(path: str):
+    """
+    Flush everything written to the filesystem holding ``path`` to storage, in one call.
+
+    Uses syncfs(2) on Linux, which waits for that filesystem only. Elsewhere
+    os.sync() flushes all filesystems, followed on macOS by F_FULLFSYNC, since
+    sync(2) there does not flush the drive cache.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        fd = None
+    try:
+        if _syncfs is not None and fd is not None and _syncfs(fd) == 0:
+            return
+        if hasattr(os, "sync"):
+            os.sync()
+        if fd is not None and fcntl is not None and hasattr(fcntl, "F_FULLFSYNC"):
+            try:
+                fcntl.fcntl(fd, fcntl.F_FULLFSYNC)
+            except OSError:
+                pass
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+
+def _sync_directory(directory: str):
+    """Make renames in a directory durable (a no-op where directories cannot be opened)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SnapshotWriter:
+    """Buffers a cycle's snapshot files and commits them atomically."""
+
+    def __init__(self, history_dir: str = "history", durable: bool = True):
+        """
+        Args:
+            history_dir (str): Directory to save history files (default: "history").
+            durable (bool): Sync the history filesystem on commit. Without it
+                            the files are still replaced atomically, but a
+                            power loss may lose the latest cycle.
+        """
+        self.history_dir = history_dir
+        self.durable = durable
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, result, cabin_id: str = None, timestamp=None):
+        """
+        Buffer a snapshot until the next commit.
+
+        A later snapshot for the same file replaces an earlier one.
+
+        Args:
+            result: The snapshot contents; a Calendar is saved as its list of
+                    ISO date strings.
+            cabin_id (str): Optional cabin ID appended to the filename.
+            timestamp (datetime): Time of the snapshot (default: now).
+
+        Returns:
+            str: The path the snapshot will be committed to.
+        """
+        if isinstance(result, Calendar):
+            result = result.to_iso()
+        path = os.path.join(self.history_dir, snapshot_filename(cabin_id, timestamp))
+        self._pending[path] = json.dumps(result).encode()
+        return path
+
+    def discard(self):
+        """Drop all buffered snapshots."""
+        self._pending.clear()
+
+    def commit(self):
+        """
+        Write all buffered snapshots, replacing existing files atomically.
+
+        Returns:
+            list: Paths of the committed files.
+        """
+        if not self._pending:
+            return []
+        pending, self._pending = self._pending, {}
+        os.makedirs(self.history_dir, exist_ok=True)
+
+        tmp_paths = []
+        try:
+            for path, data in pending.items():
+                tmp_path = path + TMP_SUFFIX
+                tmp_paths.append(tmp_path)
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+            if self.durable:
+                sync_filesystem(self.history_dir)
+        except BaseException:
+            for tmp_path in tmp_paths:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            raise
+
+        for path in pending:
+            os.replace(path + TMP_SUFFIX, path)
+        return list(pending)
+
+
+def write_atomic(path: str, data: bytes, durable: bool = True):
+    """
+    Replace a single file atomically: write a temporary file, then rename it.
+
+    Args:
+        path (str): The file to write.
+        data (bytes): Its new contents.
+        durable (bool): Sync the file and its directory to storage.
+    """
+    tmp_path = path + TMP_SUFFIX
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            if durable:
+                sync_file(f)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    os.replace(tmp_path, path)
+    if durable:
+        _sync_directory(os.path.dirname(path) or ".")
+
+
+def load_snapshot(path: str):
+    """
+    Read a snapshot file.
+
+    Returns:
+        The decoded contents, or None if the file is missing, truncated or
+        otherwise not valid JSON (e.g. left behind by an older, non-atomic writer).
+    """
+    try:
+        with open(path, "rb") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,248 @@
+"""Route change events to the subscribers watching them.
+
+One watcher serves a whole team. Subscribers are listed in the config file
+under ``abonnenter``, each with one or more watch windows:
+
+    abonnenter:
+      - navn: "Kari"
+        vinduer:
+          - hytter: ["Stallen"]        # names or IDs; omit for all cabins
+            fra: "2025-12-01"          # omit for no lower bound
+            til: "2026-03-31"          # omit for no upper bound
+
+Every cabin is still fetched and diffed once per cycle. Afterwards each
+change event is looked up in a per-cabin interval tree of windows, which
+finds the k windows containing the event's day in O(log n + k), so routing
+cost grows with the number of events, not with cabins times subscribers.
+"""
+
+from .config import extract_cabin_id, resolve_cabin_id
+from .dates import to_ordinal
+
+SUBSCRIBER_KEYS = {"navn", "vinduer"}
+WINDOW_KEYS = {"hytter", "fra", "til"}
+
+# Open window ends
+_MIN_DAY = 1
+_MAX_DAY = 3652059  # 9999-12-31
+
+
+class _Node:
+    """Interval tree node: the intervals that contain ``center``."""
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center, intervals):
+        self.center = center
+        self.by_start = sorted(intervals, key=lambda interval: interval[0])
+        self.by_end = sorted(intervals, key=lambda interval: -interval[1])
+        self.left = None
+        self.right = None
+
+
+class IntervalIndex:
+    """
+    Static centered interval tree over closed integer intervals.
+
+    ``find(point)`` returns the values of all intervals containing the point
+    in O(log n + k) for n intervals and k results.
+    """
+
+    def __init__(self, intervals=()):
+        """
+        Build the index.
+
+        Args:
+            intervals (iterable): (start, end, value) tuples with start <= end.
+        """
+        intervals = [interval for interval in intervals if interval[0] <= interval[1]]
+        self._size = len(intervals)
+        self._root = self._build(intervals)
+
+    def __len__(self):
+        return self._size
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        endpoints = sorted(point for start, end, _ in intervals for point in (start, end))
+        center = endpoints[len(endpoints) // 2]
+
+        left = [interval for interval in intervals if interval[1] < center]
+        right = [interval for interval in intervals if interval[0] > center]
+        here = [interval for interval in intervals if interval[0] <= center <= interval[1]]
+
+        node = _Node(center, here)
+        node.left = self._build(left)
+        node.right = self._build(right)
+        return node
+
+    def find(self, point: int):
+        """
+        Return the values of every interval containing ``point``.
+
+        Args:
+            point (int): The point to look up (e.g. a day ordinal).
+
+        Returns:
+            list: Matching values, in no particular order.
+        """
+        found = []
+        node = self._root
+        while node is not None:
+            if point < node.center:
+                # Every interval here ends at or after center > point
+                for start, _, value in node.by_start:
+                    if start > point:
+                        break
+                    found.append(value)
+                node = node.left
+            elif point > node.center:
+                for _, end, value in node.by_end:
+                    if end < point:
+                        break
+                    found.append(value)
+                node = node.right
+            else:
+                found.extend(value for _, _, value in node.by_start)
+                break
+        return found
+
+
+class SubscriberIndex:
+    """Watch windows of all subscribers, indexed per cabin."""
+
+    def __init__(self, windows=()):
+        """
+        Build the index.
+
+        Args:
+            windows (iterable): (subscriber, cabin_id or None, first_day, last_day)
+                                tuples with day ordinals; a cabin of None means
+                                every cabin.
+        """
+        windows = list(windows)
+        self.subscribers = sorted({subscriber for subscriber, _, _, _ in windows})
+        self.cabin_ids = sorted({cabin_id for _, cabin_id, _, _ in windows if cabin_id is not None})
+
+        per_cabin = {}
+        for subscriber, cabin_id, first, last in windows:
+            per_cabin.setdefault(cabin_id, []).append((first, last, subscriber))
+        self._everywhere = IntervalIndex(per_cabin.pop(None, []))
+        self._by_cabin = {cabin_id: IntervalIndex(intervals) for cabin_id, intervals in per_cabin.items()}
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def subscribers_for(self, cabin_id: str, day):
+        """
+        Return the subscribers watching a cabin on a day.
+
+        Args:
+            cabin_id (str): The cabin ID.
+            day: The day as an ordinal, date or ISO string.
+
+        Returns:
+            list: Subscriber names, sorted and without duplicates.
+        """
+        ordinal = to_ordinal(day)
+        found = self._everywhere.find(ordinal)
+        index = self._by_cabin.get(cabin_id)
+        if index is not None:
+            found += index.find(ordinal)
+        return sorted(set(found))
+
+    def route(self, cabin_id: str, events):
+        """
+        Group a cabin's change events by the subscribers watching them.
+
+        Weekend events are routed by their Friday.
+
+        Args:
+            cabin_id (str): The cabin ID.
+            events (list): ChangeEvent objects from this cycle.
+
+        Returns:
+            dict: Subscriber name -> list of their events, in event order.
+        """
+        index = self._by_cabin.get(cabin_id)
+        if index is None and not len(self._everywhere):
+            return {}
+
+        routed = {}
+        for event in events:
+            ordinal = event.day.toordinal()
+            found = self._everywhere.find(ordinal)
+            if index is not None:
+                found += index.find(ordinal)
+            for subscriber in set(found):
+                routed.setdefault(subscriber, []).append(event)
+        return routed
+
+
+def compile_subscribers(specs, cabins=()):
+    """
+    Build the subscriber index from the config file.
+
+    Args:
+        specs (list): Subscriber dicts as returned by load_subscribers().
+        cabins (list): Cabin configuration, used to resolve cabin names to IDs.
+
+    Returns:
+        SubscriberIndex: The indexed watch windows.
+
+    Raises:
+        ValueError: If a subscriber or window has unknown keys or invalid dates.
+    """
+    windows = []
+    for number, spec in enumerate(specs, 1):
+        name = str(spec.get("navn", f"Abonnent {number}"))
+        unknown = set(spec) - SUBSCRIBER_KEYS
+        if unknown:
+            raise ValueError(f"Unknown key(s) {', '.join(sorted(unknown))} for subscriber '{name}'")
+
+        for window in spec.get("vinduer") or [{}]:
+            unknown = set(window) - WINDOW_KEYS
+            if unknown:
+                raise ValueError(f"Unknown key(s) {', '.join(sorted(unknown))} in a window of '{name}'")
+            try:
+                first = _MIN_DAY if window.get("fra") is None else to_ordinal(window["fra"])
+                last = _MAX_DAY if window.get("til") is None else to_ordinal(window["til"])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid date in a window of '{name}'") from None
+
+            hytter = window.get("hytter")
+            if hytter is None:
+                windows.append((name, None, first, last))
+                continue
+            if isinstance(hytter, (str, int)):
+                hytter = [hytter]
+            for cabin in hytter:
+                cabin_id = resolve_cabin_id(cabins, str(cabin))
+                if not cabin_id.isdigit():
+                    raise ValueError(f"Unknown cabin '{cabin}' in a window of '{name}'")
+                windows.append((name, cabin_id, first, last))
+    return SubscriberIndex(windows)
+
+
+def subscribed_cabins(cabins, subscribers: SubscriberIndex):
+    """
+    Add the cabins that only subscribers watch to the configured cabins.
+
+    Each cabin appears once, so it is fetched and diffed once per cycle no
+    matter how many subscribers watch it.
+
+    Args:
+        cabins (list): Cabin configuration as returned by load_cabins().
+        subscribers (SubscriberIndex): The subscribers' watch windows.
+
+    Returns:
+        list: The configured cabins followed by config dicts for the others.
+    """
+    configured = {extract_cabin_id(cabin["url"]) for cabin in cabins}
+    extra = [
+        {"navn": cabin_id, "url": f"https://hyttebestilling.dnt.no/hytte/{cabin_id}"}
+        for cabin_id in subscribers.cabin_ids
+        if cabin_id not in configured
+    ]
+    return list(cabins) + extra
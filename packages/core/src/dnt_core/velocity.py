@@ -0,0 +1,305 @@
+"""Booking-velocity analytics over the recorded availability history.
+
+All cabin journals are merged into one chronological stream of changes (the
+same added/removed semantics as diff_lists()) and consumed in a single pass.
+Memory is bounded by the number of currently open dates per cabin plus a
+fixed number of counters, never by the length of the history. The open
+dates are kept as day ordinals, so each change costs time in proportion to
+the dates it changes, not to the dates that are open.
+
+The watcher always checks from today until November next year, so not
+every change is a booking or a release: dates that slide into the past drop
+out unbooked, and on 1 January a whole new year of dates comes into range.
+Neither is counted.
+"""
+
+import datetime
+import heapq
+import itertools
+
+from .dates import FRIDAY, default_date_range, to_ordinal, weekday_of
+from .journal import HistoryJournal, list_journals
+
+# Upper bounds of the time-to-gone histogram buckets
+DURATION_BUCKETS = [
+    datetime.timedelta(minutes=5),
+    datetime.timedelta(minutes=15),
+    datetime.timedelta(hours=1),
+    datetime.timedelta(hours=6),
+    datetime.timedelta(days=1),
+    datetime.timedelta(days=7),
+]
+DURATION_LABELS = ["<5m", "<15m", "<1h", "<6h", "<1d", "<1w", "≥1w"]
+
+
+def _friday_of(ordinal: int):
+    """Return the ordinal of the Friday of the weekend a day belongs to, or None for Mon-Thu."""
+    weekday = weekday_of(ordinal)
+    if weekday < FRIDAY:
+        return None
+    return ordinal - (weekday - FRIDAY)
+
+
+class DurationHistogram:
+    """Fixed-size histogram of time-to-gone durations."""
+
+    def __init__(self):
+        self.counts = [0] * len(DURATION_LABELS)
+        self.count = 0
+        self.total = datetime.timedelta()
+        self.fastest = None
+        self.slowest = None
+
+    def add(self, duration: datetime.timedelta):
+        """Add a single duration to the histogram."""
+        bucket = 0
+        while bucket < len(DURATION_BUCKETS) and duration >= DURATION_BUCKETS[bucket]:
+            bucket += 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += duration
+        self.fastest = duration if self.fastest is None else min(self.fastest, duration)
+        self.slowest = duration if self.slowest is None else max(self.slowest, duration)
+
+    def merge(self, other: "DurationHistogram"):
+        """Add all durations of another histogram to this one."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        for duration in (other.fastest, other.slowest):
+            if duration is not None:
+                self.fastest = duration if self.fastest is None else min(self.fastest, duration)
+                self.slowest = duration if self.slowest is None else max(self.slowest, duration)
+
+    @property
+    def mean(self):
+        """Average duration, or None if the histogram is empty."""
+        return self.total / self.count if self.count else None
+
+    @property
+    def median_bucket(self):
+        """Label of the bucket containing the median duration."""
+        if not self.count:
+            return None
+        seen = 0
+        for label, count in zip(DURATION_LABELS, self.counts):
+            seen += count
+            if seen * 2 >= self.count:
+                return label
+
+
+class CabinVelocity:
+    """Booking-velocity statistics for a single cabin."""
+
+    def __init__(self, cabin_id: str):
+        self.cabin_id = cabin_id
+        self.time_to_gone = DurationHistogram()
+        self.by_weekday = [DurationHistogram() for _ in range(7)]
+        self.release_hours = [0] * 24
+        self.releases = 0
+
+    def merge(self, other: "CabinVelocity"):
+        """Add the statistics of another partition of the same cabin."""
+        self.time_to_gone.merge(other.time_to_gone)
+        for mine, theirs in zip(self.by_weekday, other.by_weekday):
+            mine.merge(theirs)
+        self.release_hours = [a + b for a, b in zip(self.release_hours, other.release_hours)]
+        self.releases += other.releases
+
+
+class VelocityStats:
+    """
+    Streaming accumulator for booking-velocity statistics.
+
+    Feed it changes in chronological order with update(); results are
+    available at any time through the ``cabins`` dict, ``by_weekday`` and
+    ``sellouts``.
+    """
+
+    def __init__(self, sellout_threshold=datetime.timedelta(minutes=30), max_sellouts: int = 50):
+        self.sellout_threshold = sellout_threshold
+        self.max_sellouts = max_sellouts
+        self.cabins = {}
+        # Fastest sellouts as a max-heap on duration: (-seconds, cabin_id, friday, opened)
+        self._sellouts = []
+        # Per-cabin stream state, keyed by day ordinal
+        self._open_since = {}
+        self._weekend_since = {}
+        self._last_seen = {}
+
+    def update(self, cabin_id: str, when: datetime.datetime, added, removed):
+        """
+        Consume one change of a cabin's availability.
+
+        The first change seen for a cabin is its initial state: those dates
+        were already open, so they count neither as releases nor towards
+        time-to-gone. Neither do dates that dropped out because they are in
+        the past, nor dates beyond the range checked at the previous change
+        (the range moves a year ahead on 1 January).
+
+        Args:
+            cabin_id (str): The cabin ID.
+            when (datetime): When the change was observed.
+            added (list): Newly available dates.
+            removed (list): Dates no longer available.
+        """
+        initial = cabin_id not in self._open_since
+        stats = self.cabins.get(cabin_id)
+        if stats is None:
+            stats = self.cabins[cabin_id] = CabinVelocity(cabin_id)
+        open_since = self._open_since.setdefault(cabin_id, {})
+        weekend_since = self._weekend_since.setdefault(cabin_id, {})
+        today = when.toordinal()
+        previous = self._last_seen.get(cabin_id)
+        previous_end = None if previous is None else to_ordinal(default_date_range(previous.date())[1])
+        self._last_seen[cabin_id] = when
+
+        removed = [to_ordinal(date) for date in removed]
+        added = [to_ordinal(date) for date in added]
+
+        for day in removed:
+            opened = open_since.pop(day, None)
+            if opened is not None and day >= today:
+                duration = when - opened
+                stats.time_to_gone.add(duration)
+                stats.by_weekday[weekday_of(day)].add(duration)
+
+        for day in added:
+            released = not initial and (previous_end is None or day <= previous_end)
+            open_since[day] = when if released else None
+            if released:
+                stats.release_hours[when.hour] += 1
+                stats.releases += 1
+
+        # Track full Fri-Sun weekends that appear and disappear
+        fridays = {_friday_of(day) for day in itertools.chain(added, removed)}
+        fridays.discard(None)
+        for friday in fridays:
+            days = range(friday, friday + 3)
+            complete = all(day in open_since for day in days)
+            if complete and friday not in weekend_since:
+                # Completed by a release now, not only by the range moving ahead
+                released = not initial and any(open_since[day] == when for day in days)
+                weekend_since[friday] = when if released else None
+            elif not complete and friday in weekend_since:
+                opened = weekend_since.pop(friday)
+                expired = friday < today
+                if opened is not None and not expired and when - opened <= self.sellout_threshold:
+                    self._record_sellout(cabin_id, datetime.date.fromordinal(friday), opened, when - opened)
+
+    def _record_sellout(self, cabin_id, friday, opened, duration):
+        """Keep the fastest ``max_sellouts`` weekend sellouts."""
+        entry = (-duration.total_seconds(), cabin_id, friday, opened)
+        if len(self._sellouts) < self.max_sellouts:
+            heapq.heappush(self._sellouts, entry)
+        else:
+            heapq.heappushpop(self._sellouts, entry)
+
+    @property
+    def sellouts(self):
+        """
+        Full weekends that were gone within the sellout threshold.
+
+        Returns:
+            list: (cabin_id, friday, opened, duration) tuples, fastest first.
+        """
+        return [
+            (cabin_id, friday, opened, datetime.timedelta(seconds=-seconds))
+            for seconds, cabin_id, friday, opened in sorted(self._sellouts, reverse=True)
+        ]
+
+    @property
+    def by_weekday(self):
+        """Fleet-wide time-to-gone histograms per weekday (0=Monday)."""
+        merged = [DurationHistogram() for _ in range(7)]
+        for stats in self.cabins.values():
+            for total, histogram in zip(merged, stats.by_weekday):
+                total.merge(histogram)
+        return merged
+
+    @property
+    def release_hours(self):
+        """Fleet-wide count of released dates per hour of day."""
+        hours = [0] * 24
+        for stats in self.cabins.values():
+            hours = [a + b for a, b in zip(hours, stats.release_hours)]
+        return hours
+
+    def compact(self):
+        """
+        Drop the per-cabin stream state once all changes have been consumed.
+
+        Leaves only the fixed-size statistics, which keeps results small when
+        they are sent between processes.
+        """
+        self._open_since = {}
+        self._weekend_since = {}
+        self._last_seen = {}
+        return self
+
+    def merge(self, other: "VelocityStats"):
+        """
+        Merge the results of another accumulator covering different cabins.
+
+        Only finished statistics are merged; stream state is not carried over.
+        """
+        for cabin_id, stats in other.cabins.items():
+            if cabin_id in self.cabins:
+                self.cabins[cabin_id].merge(stats)
+            else:
+                self.cabins[cabin_id] = stats
+        for seconds, cabin_id, friday, opened in other._sellouts:
+            self._record_sellout(cabin_id, friday, opened, datetime.timedelta(seconds=-seconds))
+
+
+def iter_fleet_changes(history_dir: str = "history", cabin_ids=None, start=None, end=None):
+    """
+    Stream the changes of many cabins merged into one chronological sequence.
+
+    Each journal is read lazily, so only one record per cabin is held in
+    memory at a time. The first change of every cabin is its initial state
+    (all dates available at the start of the window, possibly none).
+
+    Args:
+        history_dir (str): Directory containing history files (default: "history").
+        cabin_ids (list): Cabins to include (default: every cabin with a journal).
+        start (datetime): Only include changes at or after this instant.
+        end (datetime): Only include changes at or before this instant.
+
+    Yields:
+        tuple: (datetime, cabin_id, added_dates, removed_dates)
+    """
+    if cabin_ids is None:
+        cabin_ids = list_journals(history_dir)
+
+    def cabin_changes(cabin_id):
+        journal = HistoryJournal(cabin_id, history_dir)
+        for when, added, removed in journal.changes(start, end, include_initial=True):
+            yield when, cabin_id, added, removed
+
+    streams = [cabin_changes(cabin_id) for cabin_id in cabin_ids]
+    yield from heapq.merge(*streams, key=lambda change: (change[0], change[1]))
+
+
+def analyze_booking_velocity(
+    history_dir: str = "history",
+    cabin_ids=None,
+    sellout_threshold=datetime.timedelta(minutes=30),
+    max_sellouts: int = 50,
+):
+    """
+    Compute booking-velocity statistics for all cabins in one pass over history.
+
+    Args:
+        history_dir (str): Directory containing history files (default: "history").
+        cabin_ids (list): Cabins to include (default: every cabin with a journal).
+        sellout_threshold (timedelta): Weekends gone within this long count as sellouts.
+        max_sellouts (int): Maximum number of sellouts to keep (fastest first).
+
+    Returns:
+        VelocityStats: The accumulated statistics.
+    """
+    stats = VelocityStats(sellout_threshold, max_sellouts)
+    for when, cabin_id, added, removed in iter_fleet_changes(history_dir, cabin_ids):
+        stats.update(cabin_id, when, added, removed)
+    return stats
@@ -0,0 +1,221 @@
+"""Warm-start state, so the watcher and the toolbar resume instantly after a restart.
+
+At the end of every check cycle and on shutdown the watcher saves a compact
+summary of what it knows to ``{history_dir}/state.json``:
+
+    {
+      "version": 1,
+      "saved_at": epoch,
+      "cabins": {cabin_id: {"name": ..., "checked_at": epoch,
+                            "runs": [[first_ordinal, days], ...], "hash": ...}},
+      "due": {cabin_id: epoch},
+      "breakers": {...}
+    }
+
+Calendars are stored as runs of consecutive days, a few numbers per cabin
+instead of hundreds of date strings, with a content hash to detect damage.
+``due`` is when each cabin's next scheduled check is due and ``breakers`` is
+BreakerBoard.to_dict().
+
+Starting up takes a single read of this file: the local API and the toolbar
+show the last known state immediately, the scheduler waits for each cabin's
+due time instead of checking every cabin at once, and open circuit breakers
+keep backing off. A missing, damaged or outdated file is ignored, as is any
+cabin whose calendar does not match its hash; the next check rebuilds it.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import time
+from typing import NamedTuple
+
+from .dates import Calendar
+from .snapshots import write_atomic
+
+STATE_FILENAME = "state.json"
+STATE_VERSION = 1
+
+
+class SavedCabin(NamedTuple):
+    """The last successful check of a cabin, as saved in the warm-start state."""
+
+    name: str
+    checked_at: datetime.datetime
+    calendar: Calendar
+    hash: str
+
+
+def calendar_hash(calendar):
+    """
+    Return a short content hash of a calendar's days.
+
+    Args:
+        calendar: A Calendar or a list of ISO date strings.
+
+    Returns:
+        str: 16 hex digits.
+    """
+    ordinals = Calendar.from_iso(calendar).ordinals
+    return hashlib.blake2b(",".join(map(str, ordinals)).encode(), digest_size=8).hexdigest()
+
+
+def _to_runs(calendar: Calendar):
+    """Encode a calendar as [first_ordinal, days] runs of consecutive days."""
+    runs = []
+    for ordinal in calendar.ordinals:
+        if runs and runs[-1][0] + runs[-1][1] == ordinal:
+            runs[-1][1] += 1
+        else:
+            runs.append([ordinal, 1])
+    return runs
+
+
+def _from_runs(runs):
+    """Decode runs written by _to_runs()."""
+    return Calendar(ordinal for first, days in runs for ordinal in range(first, first + days))
+
+
+class WarmState:
+    """The watcher's last known calendars, check schedule and circuit breakers."""
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path (str): State file (default: "history/state.json").
+        """
+        self.path = path or os.path.join("history", STATE_FILENAME)
+        self.cabins = {}
+        self.due = {}
+        self.breakers = None
+        self.saved_at = None
+
+    @classmethod
+    def load(cls, path: str = None):
+        """
+        Read a state file in a single read.
+
+        Args:
+            path (str): State file (default: "history/state.json").
+
+        Returns:
+            WarmState: The saved state, or an empty one if the file is
+                       missing, damaged or from an incompatible version.
+        """
+        state = cls(path)
+        try:
+            with open(state.path, "rb") as f:
+                data = json.loads(f.read())
+        except (OSError, ValueError):
+            return state
+        if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+            return state
+
+        try:
+            saved_at = float(data["saved_at"])
+            due = {str(cabin_id): float(when) for cabin_id, when in data.get("due", {}).items()}
+            cabins = {}
+            for cabin_id, entry in data.get("cabins", {}).items():
+                calendar = _from_runs(entry["runs"])
+                if calendar_hash(calendar) != entry["hash"]:
+                    continue
+                checked_at = datetime.datetime.fromtimestamp(entry["checked_at"])
+                cabins[str(cabin_id)] = SavedCabin(str(entry["name"]), checked_at, calendar, entry["hash"])
+            breakers = data.get("breakers")
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return state
+
+        state.saved_at = saved_at
+        state.due = due
+        state.cabins = cabins
+        state.breakers = breakers if isinstance(breakers, dict) else None
+        return state
+
+    def record(self, result, due: float = None):
+        """
+        Remember the outcome of a check.
+
+        Args:
+            result (CheckResult): A finished check; failed checks keep the
+                                  cabin's last known calendar.
+            due (float): Epoch time the cabin's next check is due, if scheduled.
+        """
+        if result.ok:
+            calendar = Calendar.from_iso(result.dates)
+            self.cabins[result.cabin_id] = SavedCabin(
+                result.name,
+                result.checked_at or datetime.datetime.now(),
+                calendar,
+                calendar_hash(calendar),
+            )
+        if due is not None:
+            self.due[result.cabin_id] = due
+
+    def retain(self, cabin_ids):
+        """Forget cabins that are no longer watched."""
+        cabin_ids = set(cabin_ids)
+        self.cabins = {cabin_id: saved for cabin_id, saved in self.cabins.items() if cabin_id in cabin_ids}
+        self.due = {cabin_id: when for cabin_id, when in self.due.items() if cabin_id in cabin_ids}
+
+    def is_due(self, cabin_id: str, now: float = None):
+        """True if a cabin should be checked now; unscheduled cabins always are."""
+        return self.due.get(cabin_id, 0.0) <= (time.time() if now is None else now)
+
+    def seconds_until_due(self, now: float = None, cabin_ids=None):
+        """
+        Seconds until the next scheduled check (0 if one is due or nothing is scheduled).
+
+        Args:
+            now (float): Epoch time to measure from (default: now).
+            cabin_ids (list): The watched cabins; any without a scheduled check,
+                              such as a newly added cabin, is due right away.
+        """
+        if cabin_ids is None:
+            due = list(self.due.values())
+        else:
+            due = [self.due.get(cabin_id, 0.0) for cabin_id in cabin_ids]
+        if not due:
+            return 0.0
+        return max(0.0, min(due) - (time.time() if now is None else now))
+
+    def restore_breakers(self, breakers):
+        """
+        Load the saved circuit breaker state into a BreakerBoard.
+
+        Back-off delays count the time the watcher was not running.
+        """
+        if self.breakers and self.saved_at is not None:
+            breakers.restore(self.breakers, elapsed=max(0.0, time.time() - self.saved_at))
+
+    def save(self, breakers=None):
+        """
+        Write the state file atomically, without syncing it.
+
+        Args:
+            breakers (BreakerBoard): Circuit breakers whose state to save
+                                     (default: keep the state loaded from the file).
+        """
+        if breakers is not None:
+            self.breakers = breakers.to_dict()
+        self.saved_at = time.time()
+        data = {
+            "version": STATE_VERSION,
+            "saved_at": round(self.saved_at, 3),
+            "cabins": {
+                cabin_id: {
+                    "name": saved.name,
+                    "checked_at": int(saved.checked_at.timestamp()),
+                    "runs": _to_runs(saved.calendar),
+                    "hash": saved.hash,
+                }
+                for cabin_id, saved in sorted(self.cabins.items())
+            },
+            "due": {cabin_id: round(when, 3) for cabin_id, when in sorted(self.due.items())},
+            "breakers": self.breakers,
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Synced with the next cycle; a file lost to a crash is simply ignored
+        write_atomic(self.path, json.dumps(data, separators=(",", ":")).encode(), durable=False)
@@ -0,0 +1,170 @@
+"""Shared work queue that lets several watcher processes split the cabins.
+
+The queue is a small SQLite database with one row per cabin. A worker claims
+a due cabin by taking a time-limited lease on it, checks it, and completes
+it, which schedules the next check one interval later. Claims run inside
+``BEGIN IMMEDIATE`` transactions, so two workers can never lease the same
+cabin. If a worker crashes its lease simply expires and another worker takes
+the cabin over.
+
+Workers on several hosts can share the queue as long as the database lives
+on a file system with working POSIX locks.
+"""
+
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cabins (
+    cabin_id TEXT PRIMARY KEY,
+    due_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL NOT NULL DEFAULT 0,
+    checks INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+class LeaseQueue:
+    """SQLite-backed queue of cabins with expiring leases."""
+
+    def __init__(self, path: str = "history/queue.sqlite3", lease_seconds: float = 300):
+        """
+        Open (and create if needed) a work queue.
+
+        Args:
+            path (str): Path to the SQLite database.
+            lease_seconds (float): How long a claimed cabin stays reserved.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        # Autocommit mode: transactions are managed explicitly below
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute(SCHEMA)
+
+    def close(self):
+        """Close the database connection."""
+        self._db.close()
+
+    def _transaction(self):
+        """Start a write transaction that locks out other writers."""
+        self._db.execute("BEGIN IMMEDIATE")
+
+    def sync(self, cabin_ids):
+        """
+        Add cabins that are not in the queue yet and drop removed ones.
+
+        New cabins are due immediately.
+
+        Args:
+            cabin_ids (list): Every cabin that should be watched.
+        """
+        self._transaction()
+        try:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO cabins (cabin_id) VALUES (?)",
+                [(cabin_id,) for cabin_id in cabin_ids],
+            )
+            placeholders = ",".join("?" * len(cabin_ids))
+            self._db.execute(f"DELETE FROM cabins WHERE cabin_id NOT IN ({placeholders})", list(cabin_ids))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def claim(self, worker_id: str, now: float = None):
+        """
+        Lease the most overdue cabin that nobody else holds.
+
+        Args:
+            worker_id (str): Unique ID of the claiming worker.
+            now (float): Current epoch time (default: time.time()).
+
+        Returns:
+            str: The claimed cabin ID, or None if no cabin is due.
+        """
+        now = time.time() if now is None else now
+        self._transaction()
+        try:
+            row = self._db.execute(
+                "SELECT cabin_id FROM cabins WHERE due_at <= ? AND lease_expires <= ? "
+                "ORDER BY due_at, cabin_id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is not None:
+                self._db.execute(
+                    "UPDATE cabins SET lease_owner = ?, lease_expires = ? WHERE cabin_id = ?",
+                    (worker_id, now + self.lease_seconds, row[0]),
+                )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+        return row[0] if row else None
+
+    def complete(self, cabin_id: str, worker_id: str, interval: float, now: float = None):
+        """
+        Mark a claimed cabin as checked and schedule its next check.
+
+        Args:
+            cabin_id (str): The cabin ID.
+            worker_id (str): The worker holding the lease.
+            interval (float): Seconds until the cabin is due again.
+            now (float): Current epoch time (default: time.time()).
+
+        Returns:
+            bool: False if the lease had expired and was taken over by another worker.
+        """
+        now = time.time() if now is None else now
+        cursor = self._db.execute(
+            "UPDATE cabins SET due_at = ?, lease_owner = NULL, lease_expires = 0, checks = checks + 1 "
+            "WHERE cabin_id = ? AND lease_owner = ? AND lease_expires > ?",
+            (now + interval, cabin_id, worker_id, now),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, cabin_id: str, worker_id: str, retry_in: float = 0, now: float = None):
+        """
+        Give up a lease without completing the check, e.g. after a failed fetch.
+
+        Args:
+            cabin_id (str): The cabin ID.
+            worker_id (str): The worker holding the lease.
+            retry_in (float): Seconds until the cabin may be claimed again.
+            now (float): Current epoch time (default: time.time()).
+        """
+        now = time.time() if now is None else now
+        self._db.execute(
+            "UPDATE cabins SET due_at = ?, lease_owner = NULL, lease_expires = 0 "
+            "WHERE cabin_id = ? AND lease_owner = ?",
+            (now + retry_in, cabin_id, worker_id),
+        )
+
+    def seconds_until_due(self, now: float = None):
+        """
+        Seconds until the next cabin can be claimed.
+
+        Returns:
+            float: 0 if a cabin is due now, None if the queue is empty.
+        """
+        now = time.time() if now is None else now
+        row = self._db.execute("SELECT MIN(MAX(due_at, lease_expires)) FROM cabins").fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - now)
+
+    def status(self):
+        """
+        Return the queue contents for display.
+
+        Returns:
+            list: (cabin_id, due_at, lease_owner, lease_expires, checks) tuples.
+        """
+        return self._db.execute(
+            "SELECT cabin_id, due_at, lease_owner, lease_expires, checks FROM cabins ORDER BY cabin_id"
+        ).fetchall()
@@ -23,5 +23,6 @@ def send_notification(title: str, message: str):
         apple_script = f'display notification "{message}" with title "{title}"'
         subprocess.run(["osascript", "-e", apple_script], check=False)
     else:
-        # Fallback for other platforms - just print to console
-        print(f"\n[NOTIFICATION] {title}: {message}\n")
+        # Fallback for other platforms - just print to the console, on stderr
+        # so it never mixes with machine-readable output on stdout
+        print(f"\n[NOTIFICATION] {title}: {message}\n", file=sys.stderr)
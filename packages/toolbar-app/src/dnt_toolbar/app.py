@@ -8,8 +8,6 @@ This app provides:
 - Summary of weekends and available dates
 """
 
-import datetime
-import json
 import os
 import sys
 import threading
@@ -25,13 +23,18 @@ from Cocoa import (
 from PyObjCTools.Conversion import propertyListFromPythonCollection
 
 from dnt_core import (
-    extract_available_dates,
+    DATE_OPENED,
+    STATE_FILENAME,
+    WEEKEND_OPENED,
+    CheckPipeline,
+    WarmState,
+    events_of,
     extract_cabin_id,
+    fetch_state,
     find_available_weekends,
-    get_availability,
+    list_history_files,
+    load_snapshot,
     load_cabins,
-    load_latest_files,
-    save_result_as_json,
 )
 # Notifications disabled - use Swift app for notification support
 
@@ -95,7 +98,11 @@ class DNTToolbarApp(rumps.App):
 
     def get_latest_status(self):
         """
-        Load the latest saved status from history files.
+        Load the latest saved status.
+
+        Uses the running watcher's state if available, then the warm-start
+        state file (a single read), and only scans history files for cabins
+        missing from both.
 
         Returns:
             dict: Dictionary containing status information with keys:
@@ -115,6 +122,17 @@ class DNTToolbarApp(rumps.App):
                     "cabins": []
                 }
 
+            # Prefer the running watcher's in-memory state over scanning history
+            served = fetch_state("/cabins")
+            if served:
+                last_check = max(cabin["checked_at"] for cabin in served)
+                return {
+                    "last_check": last_check[:16].replace("T", " "),
+                    "total_dates": sum(len(cabin["dates"]) for cabin in served),
+                    "weekends": sum(len(cabin["weekends"]) for cabin in served),
+                    "cabins": cabins
+                }
+
             # Get latest history file timestamp
             history_dir = "history"
             if not os.path.exists(history_dir):
@@ -125,8 +143,31 @@ class DNTToolbarApp(rumps.App):
                     "cabins": []
                 }
 
-            files = os.listdir(history_dir)
-            if not files:
+            # Load the latest saved state of each cabin
+            state = WarmState.load(os.path.join(history_dir, STATE_FILENAME))
+            latest_check = None
+            total_dates = 0
+            weekend_count = 0
+            for cabin in cabins:
+                cabin_id = extract_cabin_id(cabin["url"])
+                saved = state.cabins.get(cabin_id)
+                if saved is not None:
+                    timestamp, available_dates = saved.checked_at, saved.calendar
+                else:
+                    snapshots = list_history_files(history_dir, cabin_id)
+                    if not snapshots:
+                        continue
+
+                    timestamp, latest_file = snapshots[-1]
+                    available_dates = load_snapshot(os.path.join(history_dir, latest_file))
+                    if available_dates is None:
+                        continue
+                latest_check = max(latest_check or timestamp, timestamp)
+
+                total_dates += len(available_dates)
+                weekend_count += len(find_available_weekends(available_dates))
+
+            if latest_check is None:
                 return {
                     "last_check": "Never",
                     "total_dates": 0,
@@ -134,30 +175,12 @@ class DNTToolbarApp(rumps.App):
                     "cabins": []
                 }
 
-            # Get the latest file
-            latest_file = sorted(files)[-1]
-            file_path = os.path.join(history_dir, latest_file)
-
-            # Parse timestamp from filename (format: HH-DD-MM-YYYY.json)
-            timestamp_str = latest_file.replace(".json", "")
-            try:
-                hour, day, month, year = timestamp_str.split("-")
-                last_check = f"{year}-{month}-{day} {hour}:00"
-            except ValueError:
-                last_check = "Unknown"
-
-            # Load latest availability data
-            with open(file_path) as f:
-                available_dates = json.load(f)
-
-            # Calculate statistics
-            total_dates = len(available_dates)
-            weekends = find_available_weekends(available_dates)
+            last_check = latest_check.strftime("%Y-%m-%d %H:%M")
 
             return {
                 "last_check": last_check,
                 "total_dates": total_dates,
-                "weekends": len(weekends),
+                "weekends": weekend_count,
                 "cabins": cabins
             }
 
@@ -331,49 +354,44 @@ class DNTToolbarApp(rumps.App):
         """
         Perform the actual availability check.
 
-        This is the same logic as the CLI's main() function but without
-        the colorful terminal output.
+        Runs the same check pipeline as the CLI, but without the colorful
+        terminal output.
         """
         # Load cabin configuration
         cabins = load_cabins()
         if not cabins:
             raise Exception("No cabins configured")
 
-        # Check each cabin
-        for cabin in cabins:
-            cabin_id = extract_cabin_id(cabin["url"])
-            cabin_name = cabin["navn"]
-
-            # Get availability from today until November of next year
-            today = datetime.date.today()
-            from_date = today.strftime("%Y-%m-%d")
-            next_year = today.year + 1
-            to_date = f"{next_year}-11-01"
-
-            # Fetch availability data
-            result = get_availability(cabin_id, from_date, to_date)
-            if not result:
-                print(f"Failed to fetch availability for {cabin_name}")
-                continue
-
-            # Extract and save available dates
-            available = extract_available_dates(result)
-            save_result_as_json(available)
-
-            # Check for new dates
-            last_results = load_latest_files()
-            if len(last_results) >= 2:
-                added = list(set(last_results[1]) - set(last_results[0]))
-                if added:
-                    # Check for new weekends
-                    new_weekends = find_available_weekends(added)
-                    if new_weekends:
-                        weekend_str = ", ".join([f.strftime("%Y-%m-%d") for f, _ in new_weekends])
-                        print(f"NEW FULL WEEKENDS! {cabin_name}: {len(new_weekends)} weekend(s)! {weekend_str}")
-                        # Notifications disabled - use Swift app for notifications
-                    else:
-                        print(f"New dates: {cabin_name}: {len(added)} new date(s) available")
-                        # Notifications disabled - use Swift app for notifications
+        # Save the results so the next start shows them immediately
+        state = WarmState.load()
+        for result in CheckPipeline().run(cabins, sink=self._report_result):
+            state.record(result)
+        state.save()
+
+    def _report_result(self, result):
+        """
+        Log the outcome of checking one cabin.
+
+        Args:
+            result (CheckResult): The pipeline's result for one cabin.
+        """
+        if not result.ok:
+            print(f"Failed to fetch availability for {result.name}")
+            return
+        if result.first_run:
+            return
+
+        # Report new dates
+        added = events_of(result.events, DATE_OPENED)
+        if added:
+            new_weekends = events_of(result.events, WEEKEND_OPENED)
+            if new_weekends:
+                weekend_str = ", ".join([weekend.day.strftime("%Y-%m-%d") for weekend in new_weekends])
+                print(f"NEW FULL WEEKENDS! {result.name}: {len(new_weekends)} weekend(s)! {weekend_str}")
+                # Notifications disabled - use Swift app for notifications
+            else:
+                print(f"New dates: {result.name}: {len(added)} new date(s) available")
+                # Notifications disabled - use Swift app for notifications
 
     @rumps.clicked("❌ Quit")
     def quit_app(self, _):
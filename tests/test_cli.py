@@ -0,0 +1,141 @@
+"""Tests for the DNT Watcher CLI."""
+
+import io
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from dnt_core import (
+    BreakerBoard,
+    Calendar,
+    CheckPipeline,
+    CheckResult,
+    compile_rules,
+    compile_subscribers,
+    compute_events,
+)
+from dnt_cli.run import JsonlOutput, send_alerts
+
+
+class TestJsonlOutput(unittest.TestCase):
+    """Test the --format jsonl output."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cabins = [
+            {"navn": "Stallen", "url": "https://hyttebestilling.dnt.no/hytte/101297"},
+            {"navn": "Broken", "url": "https://hyttebestilling.dnt.no/hytte/404"},
+        ]
+        self.days = ["2025-12-01"]
+        self.pipeline = CheckPipeline(self._fetch, self.tmp.name)
+        # Desktop notifications are not part of the stream
+        patcher = mock.patch("dnt_cli.run.send_notification")
+        self.notifications = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _fetch(self, cabin_id, from_date, to_date):
+        if cabin_id == "404":
+            return None
+        return {
+            "data": {
+                "availabilityList": [
+                    {"date": f"{day}T00:00:00.000Z", "products": [{"available": 2}]} for day in self.days
+                ]
+            }
+        }
+
+    def _cycle(self, quiet=False, rules=None):
+        stream = io.BytesIO()
+        output = JsonlOutput(stream, quiet)
+        self.pipeline.run(self.cabins, sink=lambda result: output.result(result, rules=rules))
+        output.cycle(self.pipeline)
+        output.flush()
+        data = stream.getvalue()
+        self.assertNotIn(b"\x1b[", data)
+        return [json.loads(line) for line in data.splitlines()]
+
+    def test_record_types(self):
+        """Test cabin, error, event, rule match and cycle records."""
+        records = self._cycle()
+        self.assertEqual(sorted(record["type"] for record in records), ["cabin", "cycle", "error"])
+        cabin = next(record for record in records if record["type"] == "cabin")
+        self.assertEqual((cabin["cabin_id"], cabin["available"], cabin["first_run"]), ("101297", 1, True))
+
+        # A full weekend opens and matches a two-night rule
+        self.days = ["2025-12-01", "2025-12-05", "2025-12-06", "2025-12-07"]
+        rules = compile_rules([{"navn": "Helg", "min_netter": 2}])
+        types = [record["type"] for record in self._cycle(rules=rules)]
+        self.assertEqual(types.count("date_opened"), 3)
+        self.assertEqual(types.count("weekend_opened"), 1)
+        self.assertEqual(types.count("rule_match"), 1)
+        self.assertEqual(self.notifications.call_count, 1)
+
+    def test_quiet_drops_cabin_records(self):
+        """Test that quiet output keeps only changes and errors."""
+        self._cycle()
+        self.days = ["2025-12-01", "2025-12-02"]
+        types = [record["type"] for record in self._cycle(quiet=True)]
+        self.assertNotIn("cabin", types)
+        self.assertIn("date_opened", types)
+        self.assertIn("error", types)
+
+    def test_breakers(self):
+        """Test that breaker stats are written only after failures."""
+        board = BreakerBoard()
+        stream = io.BytesIO()
+        output = JsonlOutput(stream)
+        output.breakers(board)
+        self.assertEqual(stream.getvalue(), b"")
+
+        board.allow("404")
+        board.record("404", False)
+        output.breakers(board)
+        record = json.loads(stream.getvalue())
+        self.assertEqual((record["type"], record["failures"]), ("breakers", 1))
+        self.assertIn("404", record["cabins"])
+
+
+class TestAlerts(unittest.TestCase):
+    """Test how change notifications are routed."""
+
+    def setUp(self):
+        self.cabins = [{"navn": "Stallen", "url": "https://hyttebestilling.dnt.no/hytte/101297"}]
+        self.result = CheckResult("101297", "Stallen")
+        self.result.dates = Calendar.from_iso(["2025-12-05", "2025-12-06", "2025-12-07", "2026-02-02"])
+        self.result.previous = Calendar()
+        self.result.events = compute_events(Calendar(), self.result.dates)
+        patcher = mock.patch("dnt_cli.run.send_notification")
+        self.notifications = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _titles(self):
+        return sorted(call.args[1].split(":")[0] for call in self.notifications.call_args_list)
+
+    def test_global_alert_without_subscribers(self):
+        """Test that changes are alerted once when nobody subscribes."""
+        send_alerts(self.result)
+        self.assertEqual(self._titles(), ["Stallen"])
+
+    def test_subscribers_replace_global_alert(self):
+        """Test one alert per subscriber, limited to their windows and filtered by rules."""
+        subscribers = compile_subscribers(
+            [
+                {"navn": "Kari", "vinduer": [{"til": "2025-12-31"}]},
+                {"navn": "Per", "vinduer": [{"fra": "2026-01-01"}]},
+                {"navn": "Ola", "vinduer": [{"fra": "2027-01-01"}]},
+            ],
+            self.cabins,
+        )
+        send_alerts(self.result, subscribers=subscribers)
+        self.assertEqual(self._titles(), ["Stallen (for Kari)", "Stallen (for Per)"])
+
+        # Rules apply to subscriber alerts too: only Kari's window has a weekend
+        self.notifications.reset_mock()
+        rules = compile_rules([{"navn": "Helg", "min_netter": 2}], self.cabins)
+        send_alerts(self.result, rules, subscribers)
+        self.assertEqual(self._titles(), ["Stallen (for Kari)"])
+        self.assertEqual(self.notifications.call_args.args[0], "DNT Watcher - Helg")
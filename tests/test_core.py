@@ -1,9 +1,55 @@
 """Tests for DNT Core package."""
 
 import datetime
+import json
+import os
+import tempfile
+import threading
+import time
 import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
 
-from dnt_core import extract_available_dates, extract_cabin_id, find_available_weekends
+from dnt_core import (
+    BreakerBoard,
+    Calendar,
+    CheckPipeline,
+    CheckResult,
+    HistoryArchive,
+    HistoryJournal,
+    IntervalIndex,
+    LeaseQueue,
+    ReplaySource,
+    ResponseRecorder,
+    SnapshotWriter,
+    StateCache,
+    WarmState,
+    analyze_booking_velocity,
+    calendar_hash,
+    change_timeline,
+    compile_rules,
+    compile_subscribers,
+    compute_events,
+    export_archive,
+    extract_available_dates,
+    extract_cabin_id,
+    extract_calendar,
+    find_available_weekends,
+    fleet_booking_velocity,
+    load_latest_files,
+    load_snapshot,
+    open_intervals,
+    parse_history_filename,
+    parse_months,
+    read_recording,
+    recorded_cycles,
+    replay_recording,
+    start_server,
+    subscribed_cabins,
+)
+from dnt_core import archive as archive_module
+from dnt_core import journal as journal_module
 
 
 class TestConfig(unittest.TestCase):
@@ -127,6 +173,1033 @@ class TestAnalysis(unittest.TestCase):
         result = find_available_weekends(dates)
         self.assertEqual(len(result), 2)
 
+    def test_parse_history_filename(self):
+        """Test parsing legacy and per-cabin history filenames."""
+        self.assertEqual(
+            parse_history_filename("14-05-11-2025.json"),
+            (datetime.datetime(2025, 11, 5, 14), None),
+        )
+        self.assertEqual(
+            parse_history_filename("14-05-11-2025-101297.json"),
+            (datetime.datetime(2025, 11, 5, 14), "101297"),
+        )
+        self.assertIsNone(parse_history_filename("journal"))
+
+
+class TestDates(unittest.TestCase):
+    """Test the compact Calendar date representation."""
+
+    def test_extract_calendar(self):
+        """Test parsing an API response into a Calendar."""
+        availability = {
+            "data": {
+                "availabilityList": [
+                    {"date": "2022-01-03T00:00:00.000Z", "products": [{"available": 1}]},
+                    {"date": "2022-01-01T00:00:00.000Z", "products": [{"available": 2}]},
+                    {"date": "2022-01-02T00:00:00.000Z", "products": [{"available": 0}]},
+                ]
+            }
+        }
+        calendar = extract_calendar(availability)
+        self.assertEqual(len(calendar), 2)
+        self.assertEqual(calendar.to_iso(), extract_available_dates(availability)[::-1])
+        self.assertEqual(calendar.first(), datetime.date(2022, 1, 1))
+        self.assertIn("2022-01-03", calendar)
+        self.assertNotIn("2022-01-02T00:00:00.000Z", calendar)
+        self.assertEqual(len(extract_calendar({})), 0)
+
+    def test_round_trip_and_weekdays(self):
+        """Test that a Calendar iterates in the API format and counts weekdays."""
+        dates = [
+            "2024-01-07T00:00:00.000Z",  # Sunday
+            "2024-01-05T00:00:00.000Z",  # Friday
+            "2024-01-06T00:00:00.000Z",  # Saturday
+            "2024-01-06T00:00:00.000Z",  # duplicate
+            "2024-01-13T00:00:00.000Z",  # Saturday
+        ]
+        calendar = Calendar.from_iso(dates)
+        self.assertIs(Calendar.from_iso(calendar), calendar)
+        self.assertEqual(list(calendar), sorted(set(dates)))
+        self.assertEqual(calendar.weekday_counts(), [0, 0, 0, 0, 1, 2, 1])
+        self.assertEqual(calendar.weekend_fridays(), [datetime.date(2024, 1, 5).toordinal()])
+        self.assertEqual(find_available_weekends(calendar), find_available_weekends(dates))
+        self.assertEqual(compute_events([], calendar), compute_events([], dates))
+
+
+class TestEvents(unittest.TestCase):
+    """Test the change-event engine."""
+
+    def test_weekend_completed_by_new_dates(self):
+        """Test that a weekend opens even if only some of its days are new."""
+        old = ["2022-01-07T00:00:00.000Z"]  # Friday
+        new = [
+            "2022-01-07T00:00:00.000Z",  # Friday
+            "2022-01-08T00:00:00.000Z",  # Saturday
+            "2022-01-09T00:00:00.000Z",  # Sunday
+            "2022-01-10T00:00:00.000Z",  # Monday
+        ]
+        events = compute_events(old, new)
+        self.assertEqual(
+            [(event.kind, event.day.isoformat()) for event in events],
+            [
+                ("weekend_opened", "2022-01-07"),
+                ("date_opened", "2022-01-08"),
+                ("date_opened", "2022-01-09"),
+                ("date_opened", "2022-01-10"),
+            ],
+        )
+        self.assertEqual(events[1].date, "2022-01-08T00:00:00.000Z")
+
+    def test_saturday_and_closed_weekend(self):
+        """Test Saturday events and weekends closing."""
+        weekend = ["2022-01-07", "2022-01-08", "2022-01-09"]
+        events = compute_events(weekend, ["2022-01-08", "2022-01-09", "2022-01-15"])
+        self.assertEqual(
+            [(event.kind, event.day.isoformat()) for event in events],
+            [
+                ("weekend_closed", "2022-01-07"),
+                ("date_closed", "2022-01-07"),
+                ("saturday_opened", "2022-01-15"),
+                ("date_opened", "2022-01-15"),
+            ],
+        )
+        self.assertEqual(compute_events(weekend, weekend), [])
+
+
+class TestJournal(unittest.TestCase):
+    """Test the per-cabin history journal."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history_dir = self.tmp.name
+        self.start = datetime.datetime(2025, 11, 1, 12)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_availability_at(self):
+        """Test reconstructing availability at arbitrary instants."""
+        journal = HistoryJournal("101297", self.history_dir)
+        journal.append(["2025-12-05", "2025-12-06"], self.start)
+        journal.append(["2025-12-06", "2025-12-07"], self.start + datetime.timedelta(hours=1))
+        journal.append(["2025-12-07"], self.start + datetime.timedelta(hours=2))
+
+        self.assertEqual(journal.availability_at(self.start - datetime.timedelta(hours=1)), [])
+        self.assertEqual(
+            journal.availability_at(self.start + datetime.timedelta(minutes=30)),
+            ["2025-12-05", "2025-12-06"],
+        )
+        self.assertEqual(
+            journal.availability_at(self.start + datetime.timedelta(hours=1, minutes=59)),
+            ["2025-12-06", "2025-12-07"],
+        )
+        self.assertEqual(journal.availability_at(self.start + datetime.timedelta(days=1)), ["2025-12-07"])
+
+    def test_unchanged_snapshots_not_written(self):
+        """Test that identical snapshots do not grow the journal."""
+        journal = HistoryJournal("101297", self.history_dir)
+        journal.append(["2025-12-05"], self.start)
+        added, removed = journal.append(["2025-12-05"], self.start + datetime.timedelta(hours=1))
+        self.assertEqual((added, removed), ([], []))
+        self.assertEqual(len(journal), 1)
+
+    def test_checkpoints_and_reopen(self):
+        """Test replay across checkpoints from a freshly opened journal."""
+        original_interval = journal_module.CHECKPOINT_INTERVAL
+        journal_module.CHECKPOINT_INTERVAL = 3
+        try:
+            journal = HistoryJournal("101297", self.history_dir)
+            for hour in range(10):
+                dates = [f"2025-12-{day:02d}" for day in range(1, hour + 2)]
+                journal.append(dates, self.start + datetime.timedelta(hours=hour))
+        finally:
+            journal_module.CHECKPOINT_INTERVAL = original_interval
+
+        reopened = HistoryJournal("101297", self.history_dir)
+        self.assertEqual(len(reopened), 10)
+        self.assertEqual(sum(reopened._load_index()[2]), 4)
+        for hour in range(10):
+            self.assertEqual(
+                len(reopened.availability_at(self.start + datetime.timedelta(hours=hour))),
+                hour + 1,
+            )
+
+    def test_change_timeline(self):
+        """Test the change timeline filtered by bookable dates."""
+        journal = HistoryJournal("101297", self.history_dir)
+        journal.append(["2025-12-01"], self.start)
+        journal.append(["2025-12-01", "2025-12-06"], self.start + datetime.timedelta(hours=1))
+        journal.append(["2025-12-01"], self.start + datetime.timedelta(hours=3))
+
+        timeline = change_timeline(
+            "101297", first_date="2025-12-05", last_date="2025-12-07", history_dir=self.history_dir
+        )
+        self.assertEqual(len(timeline), 2)
+        self.assertEqual(timeline[0][1], ["2025-12-06"])
+        self.assertEqual(timeline[1][2], ["2025-12-06"])
+
+        periods = open_intervals(timeline)["2025-12-06"]
+        self.assertEqual(periods[0][1] - periods[0][0], datetime.timedelta(hours=2))
+
+        # A window starting mid-history only reads from the nearest state
+        later = change_timeline("101297", start=self.start + datetime.timedelta(hours=2), history_dir=self.history_dir)
+        self.assertEqual(len(later), 1)
+        self.assertTrue(os.path.exists(journal.index_path))
+
+
+class TestSnapshots(unittest.TestCase):
+    """Test group-committed snapshot files."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history_dir = self.tmp.name
+        self.start = datetime.datetime(2025, 11, 1, 12)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_commit_writes_all_files(self):
+        """Test that snapshots only appear on commit and no temp files remain."""
+        writer = SnapshotWriter(self.history_dir)
+        first = writer.add(["2025-12-05"], "101297", self.start)
+        calendar = Calendar.from_iso(["2025-12-06"])
+        second = writer.add(calendar, "101209", self.start)
+        self.assertEqual(len(writer), 2)
+        self.assertEqual(os.listdir(self.history_dir), [])
+
+        self.assertEqual(sorted(writer.commit()), sorted([first, second]))
+        self.assertEqual(len(writer), 0)
+        self.assertEqual(sorted(os.listdir(self.history_dir)), sorted(os.path.basename(p) for p in (first, second)))
+        self.assertEqual(load_snapshot(first), ["2025-12-05"])
+        self.assertEqual(load_snapshot(second), calendar.to_iso())
+        self.assertEqual(writer.commit(), [])
+
+    def test_truncated_snapshot_skipped(self):
+        """Test that readers skip a snapshot cut short by a crash."""
+        writer = SnapshotWriter(self.history_dir, durable=False)
+        writer.add(["2025-12-05"], "101297", self.start)
+        writer.add(["2025-12-06"], "101297", self.start + datetime.timedelta(hours=1))
+        writer.commit()
+        with open(writer.add([], "101297", self.start + datetime.timedelta(hours=2)), "w") as f:
+            f.write('["2025-12')
+
+        self.assertEqual(load_latest_files(self.history_dir, "101297"), [["2025-12-05"], ["2025-12-06"]])
+
+    def test_partial_index_entry_ignored(self):
+        """Test that a journal tolerates a partially written index entry."""
+        journal = HistoryJournal("101297", self.history_dir)
+        journal.append(["2025-12-05"], self.start)
+        with open(journal.index_path, "ab") as f:
+            f.write(b"\x00" * 5)
+
+        reopened = HistoryJournal("101297", self.history_dir)
+        self.assertEqual(len(reopened), 1)
+        self.assertEqual(reopened.availability_at(self.start), ["2025-12-05"])
+
+        # The next append replaces the partial entry
+        reopened.append(["2025-12-06"], self.start + datetime.timedelta(hours=1))
+        self.assertEqual(os.path.getsize(journal.index_path), 2 * 3 * 8)
+        self.assertEqual(HistoryJournal("101297", self.history_dir).latest(), ["2025-12-06"])
+
+    def test_cut_off_record_ignored(self):
+        """Test that a journal ignores and overwrites a record cut off by a crash."""
+        journal = HistoryJournal("101297", self.history_dir)
+        journal.append(["2025-12-05"], self.start)
+        journal.append(["2025-12-05", "2025-12-06"], self.start + datetime.timedelta(hours=1))
+        with open(journal.path, "rb+") as f:
+            f.truncate(os.path.getsize(journal.path) - 10)
+
+        reopened = HistoryJournal("101297", self.history_dir)
+        self.assertEqual(len(reopened), 1)
+        self.assertEqual(reopened.latest(), ["2025-12-05"])
+        self.assertEqual(reopened.availability_at(self.start + datetime.timedelta(hours=1)), ["2025-12-05"])
+
+        reopened.append(["2025-12-07"], self.start + datetime.timedelta(hours=2))
+        journal = HistoryJournal("101297", self.history_dir)
+        self.assertEqual(len(journal), 2)
+        self.assertEqual(journal.availability_at(self.start + datetime.timedelta(hours=1)), ["2025-12-05"])
+        self.assertEqual(journal.latest(), ["2025-12-07"])
+
+
+class TestVelocity(unittest.TestCase):
+    """Test booking-velocity analytics."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history_dir = self.tmp.name
+        self.start = datetime.datetime(2025, 11, 1, 12)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _append(self, cabin_id, dates, minutes):
+        HistoryJournal(cabin_id, self.history_dir).append(
+            dates, self.start + datetime.timedelta(minutes=minutes)
+        )
+
+    def test_time_to_gone_and_sellouts(self):
+        """Test time-to-gone, release hours and fast weekend sellouts across cabins."""
+        weekend = ["2025-12-05", "2025-12-06", "2025-12-07"]
+        # Cabin A: initial state, then a weekend released and gone 10 minutes later
+        self._append("A", ["2025-12-01"], 0)
+        self._append("A", ["2025-12-01"] + weekend, 60)
+        self._append("A", ["2025-12-01", "2025-12-05"], 70)
+        # Cabin B: a Monday released and gone after two hours
+        self._append("B", [], 0)
+        self._append("B", ["2025-12-08"], 30)
+        self._append("B", [], 150)
+
+        stats = analyze_booking_velocity(self.history_dir)
+
+        cabin_a = stats.cabins["A"]
+        self.assertEqual(cabin_a.releases, 3)
+        self.assertEqual(cabin_a.release_hours[13], 3)
+        self.assertEqual(cabin_a.time_to_gone.count, 2)
+        self.assertEqual(cabin_a.time_to_gone.fastest, datetime.timedelta(minutes=10))
+
+        cabin_b = stats.cabins["B"]
+        self.assertEqual(cabin_b.by_weekday[0].count, 1)
+        self.assertEqual(cabin_b.by_weekday[0].mean, datetime.timedelta(hours=2))
+
+        # The initial Monday of cabin A was never released, so it is not counted
+        self.assertEqual(stats.by_weekday[0].count, 1)
+
+        self.assertEqual(len(stats.sellouts), 1)
+        cabin_id, friday, _, duration = stats.sellouts[0]
+        self.assertEqual((cabin_id, friday), ("A", datetime.date(2025, 12, 5)))
+        self.assertEqual(duration, datetime.timedelta(minutes=10))
+
+        # The multi-process runner merges to the same result
+        for workers in (1, 2):
+            fleet = fleet_booking_velocity(self.history_dir, workers=workers)
+            self.assertEqual(sorted(fleet.cabins), ["A", "B"])
+            self.assertEqual(fleet.sellouts, stats.sellouts)
+            self.assertEqual(fleet.release_hours, stats.release_hours)
+            self.assertEqual(
+                [h.counts for h in fleet.by_weekday], [h.counts for h in stats.by_weekday]
+            )
+
+    def test_expired_and_range_shift_not_counted(self):
+        """Test that dates sliding into the past or into range are not bookings or releases."""
+        # Unbooked until it is in the past: dropped out, but not booked
+        self._append("A", ["2025-11-02", "2025-12-01"], 0)
+        self._append("A", ["2025-12-01"], 24 * 60 * 2)
+        # Cabin B is checked on 31 December and on 1 January, when the range grows a year
+        start = datetime.datetime(2025, 12, 31, 12)
+        journal = HistoryJournal("B", self.history_dir)
+        journal.append(["2026-01-05"], start)
+        journal.append(["2026-01-05", "2026-06-01", "2027-01-08"], start + datetime.timedelta(hours=12))
+
+        stats = analyze_booking_velocity(self.history_dir)
+        self.assertEqual(stats.cabins["A"].time_to_gone.count, 0)
+        self.assertEqual(stats.cabins["B"].releases, 1)
+        self.assertEqual(stats.cabins["B"].release_hours[0], 1)
+
+
+class TestArchive(unittest.TestCase):
+    """Test the memory-mapped history archive."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history_dir = self.tmp.name
+        self.path = os.path.join(self.tmp.name, "history.dntarchive")
+        self.start = datetime.datetime(2025, 11, 1, 12)
+
+        for cabin_id, offset in (("101297", 0), ("101209", 100)):
+            journal = HistoryJournal(cabin_id, self.history_dir)
+            for hour in range(5):
+                dates = [
+                    f"2025-12-{day:02d}T00:00:00.000Z" for day in range(1 + hour, 10)
+                ] + [f"2026-0{1 + offset // 100}-15T00:00:00.000Z"]
+                journal.append(dates, self.start + datetime.timedelta(hours=hour))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """Test that archived snapshots match the journal."""
+        self.assertEqual(export_archive(self.path, self.history_dir), 10)
+
+        with HistoryArchive(self.path) as archive:
+            self.assertEqual(archive.cabin_ids, ["101209", "101297"])
+            self.assertEqual(archive.record_size % 8, 0)
+            for cabin_id in archive.cabin_ids:
+                journal = HistoryJournal(cabin_id, self.history_dir)
+                for hour in range(5):
+                    when = self.start + datetime.timedelta(hours=hour, minutes=30)
+                    index = archive.find(cabin_id, when)
+                    self.assertEqual(archive.dates(index), journal.availability_at(when))
+                    self.assertEqual(archive.record(index)[2], 10 - hour)
+
+            self.assertIsNone(archive.find("101297", self.start - datetime.timedelta(hours=1)))
+            index = archive.find("101297", self.start)
+            self.assertTrue(archive.is_available(index, "2025-12-01"))
+            self.assertFalse(archive.is_available(index, "2025-12-10"))
+            self.assertEqual(len(list(archive.records("101209"))), 5)
+
+    def test_close_with_bitmaps_in_use(self):
+        """Test that closing the archive tolerates bitmaps that are still referenced."""
+        export_archive(self.path, self.history_dir)
+        with HistoryArchive(self.path) as archive:
+            for t, cabin_id, count, bitmap in archive.records():
+                self.assertEqual(bin(int.from_bytes(bitmap, "little")).count("1"), count)
+        # Still readable after the with block closed the archive
+        self.assertEqual(bin(int.from_bytes(bitmap, "little")).count("1"), count)
+
+    @unittest.skipIf(archive_module.np is None, "NumPy not installed")
+    def test_numpy_view(self):
+        """Test the zero-copy NumPy view of the records."""
+        export_archive(self.path, self.history_dir)
+        with HistoryArchive(self.path) as archive:
+            records = archive.as_numpy()
+            self.assertEqual(len(records), 10)
+            self.assertEqual(list(records["count"][:5]), [10, 9, 8, 7, 6])
+
+
+class TestRules(unittest.TestCase):
+    """Test compiling and evaluating declarative watch rules."""
+
+    def setUp(self):
+        self.cabins = [
+            {"navn": "Stallen", "url": "https://hyttebestilling.dnt.no/hytte/101297"},
+            {"navn": "Fuglemyrhytta", "url": "https://hyttebestilling.dnt.no/hytte/101209"},
+        ]
+        self.rules = compile_rules(
+            [
+                {
+                    "navn": "Vinterhelg",
+                    "hytter": ["Stallen", "101209"],
+                    "maaneder": "des-mar",
+                    "min_netter": 2,
+                    "med_lordag": True,
+                    "min_senger": 4,
+                },
+                {"navn": "Alt"},
+            ],
+            self.cabins,
+        )
+
+    def _calendar(self, beds):
+        """Build a calendar from {YYYY-MM-DD: free beds} as extract_calendar() would."""
+        return extract_calendar(
+            {
+                "data": {
+                    "availabilityList": [
+                        {"date": f"{day}T00:00:00.000Z", "products": [{"available": count}]}
+                        for day, count in beds.items()
+                    ]
+                }
+            }
+        )
+
+    def test_parse_months(self):
+        """Test month specifications, including ranges over the new year."""
+        self.assertEqual(parse_months("des-mar"), (1 << 12) | (1 << 1) | (1 << 2) | (1 << 3))
+        self.assertEqual(parse_months([6, "jul"]), (1 << 6) | (1 << 7))
+        self.assertEqual(parse_months("3-3"), 1 << 3)
+        with self.assertRaises(ValueError):
+            parse_months("13")
+        with self.assertRaises(ValueError):
+            compile_rules([{"navn": "x", "senger": 2}])
+
+    def test_unknown_cabin_rejected(self):
+        """Test that a misspelled cabin name is an error, not a rule that never fires."""
+        cabins = [{"navn": "Stallen", "url": "https://hyttebestilling.dnt.no/hytte/101297"}]
+        rules = compile_rules([{"hytter": ["Stallen", 101209]}], cabins)
+        self.assertEqual([rule.name for rule in rules.rules_for("101209")], ["Varsel 1"])
+        with self.assertRaises(ValueError):
+            compile_rules([{"navn": "Helg", "hytter": ["Stalen"]}], cabins)
+
+    def test_evaluate(self):
+        """Test that rules match stays around opened nights only."""
+        self.assertEqual([rule.name for rule in self.rules.rules_for("101297")], ["Vinterhelg", "Alt"])
+        self.assertEqual([rule.name for rule in self.rules.rules_for("999")], ["Alt"])
+
+        old = self._calendar({"2025-01-10": 6})
+        # Fri 10 (already open), Sat 11 opens -> a 2-night stay with a Saturday
+        new = self._calendar({"2025-01-10": 6, "2025-01-11": 5, "2025-01-15": 8})
+        matches = self.rules.evaluate("101297", compute_events(old, new), new)
+        winter = [match for match in matches if match.rule == "Vinterhelg"]
+        self.assertEqual(len(winter), 1)
+        self.assertEqual(winter[0].first_night, datetime.date(2025, 1, 10))
+        self.assertEqual(winter[0].nights, 2)
+        # "Alt" matches every opened run: Jan 10-11 and Jan 15
+        self.assertEqual(len([match for match in matches if match.rule == "Alt"]), 2)
+
+        # Too few beds on the Saturday
+        new = self._calendar({"2025-01-10": 6, "2025-01-11": 3})
+        matches = self.rules.evaluate("101209", compute_events(old, new), new)
+        self.assertEqual([match.rule for match in matches], ["Alt"])
+
+        # Outside the months, or only weekdays
+        old = self._calendar({})
+        new = self._calendar({"2025-06-06": 9, "2025-06-07": 9, "2025-01-14": 9, "2025-01-15": 9})
+        matches = self.rules.evaluate("101297", compute_events(old, new), new)
+        self.assertEqual([match.rule for match in matches], ["Alt", "Alt"])
+
+        # Calendars from history have no bed counts, so bed rules cannot match
+        new = Calendar.from_iso(["2025-01-10", "2025-01-11"])
+        self.assertEqual(self.rules.evaluate("101297", compute_events([], new), new)[0].rule, "Alt")
+        self.assertEqual(self.rules.evaluate("101297", [], new), [])
+
+
+class TestSubscribers(unittest.TestCase):
+    """Test routing change events to subscribers' watch windows."""
+
+    def test_interval_index(self):
+        """Test stabbing queries against a brute-force scan."""
+        import random
+
+        rng = random.Random(7)
+        intervals = []
+        for value in range(300):
+            start = rng.randint(0, 1000)
+            intervals.append((start, start + rng.randint(0, 120), value))
+        index = IntervalIndex(intervals)
+        self.assertEqual(len(index), 300)
+        for point in range(-5, 1130, 7):
+            expected = sorted(value for start, end, value in intervals if start <= point <= end)
+            self.assertEqual(sorted(index.find(point)), expected)
+        self.assertEqual(IntervalIndex().find(3), [])
+
+    def test_route(self):
+        """Test compiling subscribers and routing events to them."""
+        cabins = [{"navn": "Stallen", "url": "https://hyttebestilling.dnt.no/hytte/101297"}]
+        subscribers = compile_subscribers(
+            [
+                {
+                    "navn": "Kari",
+                    "vinduer": [
+                        {"hytter": ["Stallen", "555"], "fra": "2025-01-01", "til": "2025-01-31"},
+                        {"hytter": "Stallen", "fra": datetime.date(2025, 1, 20)},
+                    ],
+                },
+                {"navn": "Ola", "vinduer": [{"til": "2025-01-04"}]},
+            ],
+            cabins,
+        )
+        self.assertEqual(subscribers.subscribers, ["Kari", "Ola"])
+        self.assertEqual(subscribers.subscribers_for("101297", "2025-01-25"), ["Kari"])
+        self.assertEqual(subscribers.subscribers_for("101297", "2025-03-01"), ["Kari"])
+        self.assertEqual(subscribers.subscribers_for("555", "2025-03-01"), [])
+        self.assertEqual(subscribers.subscribers_for("999", "2025-01-02"), ["Ola"])
+
+        events = compute_events([], ["2025-01-03", "2025-01-04", "2025-01-05", "2025-02-10"])
+        routed = subscribers.route("101297", events)
+        self.assertEqual([event.kind for event in routed["Ola"]], ["weekend_opened", "date_opened", "date_opened"])
+        self.assertEqual(len(routed["Kari"]), len(events))
+
+        self.assertEqual(
+            [extract_cabin_id(cabin["url"]) for cabin in subscribed_cabins(cabins, subscribers)],
+            ["101297", "555"],
+        )
+        with self.assertRaises(ValueError):
+            compile_subscribers([{"navn": "Per", "vinduer": [{"hytter": ["Ukjent"]}]}], cabins)
+        with self.assertRaises(ValueError):
+            compile_subscribers([{"navn": "Per", "vinduer": [{"fra": "i morgen"}]}], cabins)
+
+
+class TestBreakers(unittest.TestCase):
+    """Test circuit breakers around the fetch stage."""
+
+    def setUp(self):
+        self.now = 1000.0
+        self.board = BreakerBoard(cabin_threshold=2, global_threshold=4, base_delay=60, max_delay=200, clock=lambda: self.now)
+
+    def _fail(self, cabin_id):
+        self.assertTrue(self.board.allow(cabin_id))
+        self.board.record(cabin_id, False)
+
+    def test_cabin_backoff_and_probe(self):
+        """Test that a cabin backs off exponentially and half-opens for one probe."""
+        self._fail("1")
+        self._fail("1")
+        self.assertFalse(self.board.allow("1"))
+        self.assertTrue(self.board.allow("2"))
+        self.board.record("2", True)
+        self.assertEqual(self.board.retry_in("1"), 60)
+
+        # Half-open: one probe at a time; a failed probe doubles the delay
+        self.now += 60
+        self.assertTrue(self.board.allow("1"))
+        self.assertFalse(self.board.allow("1"))
+        self.board.record("1", False)
+        self.assertEqual(self.board.retry_in("1"), 120)
+        self.now += 120
+        self._fail("1")
+        self.assertEqual(self.board.retry_in("1"), 200)
+
+        # A successful probe closes the breaker and resets the back-off
+        self.now += 200
+        self.assertTrue(self.board.allow("1"))
+        self.board.record("1", True)
+        self.assertTrue(self.board.allow("1"))
+        self.board.record("1", True)
+
+        stats = self.board.stats()
+        self.assertEqual(stats["failures"], 4)
+        self.assertEqual(stats["skipped"], 2)
+        self.assertEqual(list(stats["cabins"]), ["1"])
+        self.assertEqual(stats["cabins"]["1"]["state"], "closed")
+
+    def test_in_flight_failures_do_not_escalate(self):
+        """Test that failures of requests in flight when the breaker opened keep the delay."""
+        for _ in range(3):
+            self.assertTrue(self.board.allow("1"))
+        self.board.record("1", False)
+        self.board.record("1", False)
+        self.board.record("1", False)
+        self.assertEqual(self.board.retry_in("1"), 60)
+        self.assertEqual(self.board.stats()["cabins"]["1"]["failures"], 3)
+
+        # Only a failed probe doubles it
+        self.now += 60
+        self._fail("1")
+        self.assertEqual(self.board.retry_in("1"), 120)
+
+    def test_global_breaker_in_pipeline(self):
+        """Test that a failing API stops the remaining fetches of a cycle."""
+        calls = []
+
+        def fetch(cabin_id, from_date, to_date):
+            calls.append(cabin_id)
+            return None
+
+        cabins = [
+            {"navn": str(number), "url": f"https://hyttebestilling.dnt.no/hytte/{number}"} for number in range(10)
+        ]
+        with tempfile.TemporaryDirectory() as history_dir:
+            pipeline = CheckPipeline(fetch, history_dir, fetch_workers=1, breakers=self.board)
+            results = pipeline.run(cabins)
+
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(sum(result.skipped for result in results), 6)
+        self.assertEqual(self.board.stats()["api"]["state"], "open")
+        self.assertTrue(all(not result.ok for result in results))
+
+
+class TestWarmStart(unittest.TestCase):
+    """Test the warm-start state saved between runs."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "history", "state.json")
+        self.checked_at = datetime.datetime(2025, 11, 1, 12)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _result(self, cabin_id, dates):
+        result = CheckResult(cabin_id, f"Hytte {cabin_id}")
+        result.checked_at = self.checked_at
+        result.dates = Calendar.from_iso(dates)
+        return result
+
+    def test_round_trip(self):
+        """Test that calendars, due times and breakers survive a restart."""
+        weekend = ["2025-12-05", "2025-12-06", "2025-12-07", "2025-12-20"]
+        state = WarmState(self.path)
+        state.record(self._result("101297", weekend), due=5000.0)
+        failed = CheckResult("101209", "Hytte 101209")
+        failed.error = "Failed to fetch availability"
+        state.record(failed, due=5000.0)
+
+        now = 1000.0
+        board = BreakerBoard(cabin_threshold=1, clock=lambda: now)
+        self.assertTrue(board.allow("101209"))
+        board.record("101209", False)
+        state.save(board)
+
+        loaded = WarmState.load(self.path)
+        saved = loaded.cabins["101297"]
+        self.assertEqual(list(loaded.cabins), ["101297"])
+        self.assertEqual(saved.calendar, Calendar.from_iso(weekend))
+        self.assertEqual(saved.checked_at, self.checked_at)
+        self.assertEqual(saved.hash, calendar_hash(weekend))
+        self.assertEqual(loaded.due, {"101297": 5000.0, "101209": 5000.0})
+        self.assertEqual(loaded.seconds_until_due(4000.0), 1000.0)
+        self.assertTrue(loaded.is_due("101297", 5000.0))
+        self.assertTrue(loaded.is_due("100000", 0.0))
+        # A cabin added since the last run does not wait for the others
+        self.assertEqual(loaded.seconds_until_due(4000.0, ["101297", "101209"]), 1000.0)
+        self.assertEqual(loaded.seconds_until_due(4000.0, ["101297", "100000"]), 0.0)
+
+        # An open breaker stays open after the restart
+        restored = BreakerBoard(cabin_threshold=1, clock=lambda: now)
+        loaded.restore_breakers(restored)
+        self.assertFalse(restored.allow("101209"))
+        self.assertGreater(restored.retry_in("101209"), 0)
+
+        cache = StateCache()
+        cabins = [{"navn": "Stallen", "url": "https://hyttebestilling.dnt.no/hytte/101297"}]
+        cache.load_from_history(cabins, self.tmp.name, state=loaded)
+        self.assertEqual(cache.last_check, self.checked_at)
+
+    def test_damaged_state_ignored(self):
+        """Test that a damaged file or a tampered calendar is not trusted."""
+        state = WarmState(self.path)
+        state.record(self._result("101297", ["2025-12-05"]))
+        state.record(self._result("101209", ["2025-12-06"]))
+        state.save()
+
+        with open(self.path) as f:
+            data = json.load(f)
+        data["cabins"]["101209"]["runs"][0][1] = 3
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+        self.assertEqual(list(WarmState.load(self.path).cabins), ["101297"])
+
+        with open(self.path, "w") as f:
+            f.write('{"version": 1, "saved_at": ')
+        loaded = WarmState.load(self.path)
+        self.assertEqual((loaded.cabins, loaded.due, loaded.seconds_until_due()), ({}, {}, 0.0))
+        self.assertEqual(WarmState.load(os.path.join(self.tmp.name, "missing.json")).cabins, {})
+
+
+class TestPipeline(unittest.TestCase):
+    """Test the staged check pipeline."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history_dir = self.tmp.name
+        self.cabins = [
+            {"navn": "Stallen", "url": "https://hyttebestilling.dnt.no/hytte/101297"},
+            {"navn": "Broken", "url": "https://hyttebestilling.dnt.no/hytte/404"},
+            {"navn": "Fuglemyrhytta", "url": "https://hyttebestilling.dnt.no/hytte/101209"},
+        ]
+        self.calendar = ["2022-01-07T00:00:00.000Z"]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _fetch(self, cabin_id, from_date, to_date):
+        if cabin_id == "404":
+            return None
+        return {
+            "data": {
+                "availabilityList": [
+                    {"date": date, "products": [{"available": 1}]} for date in self.calendar
+                ]
+            }
+        }
+
+    def test_cycles(self):
+        """Test results, events, failures and timing hooks over two cycles."""
+        timings = []
+        pipeline = CheckPipeline(
+            self._fetch,
+            self.history_dir,
+            fetch_workers=2,
+            queue_size=1,
+            on_timing=lambda stage, result, seconds: timings.append((stage, result.cabin_id)),
+        )
+
+        seen = []
+        results = pipeline.run(self.cabins, sink=lambda result: seen.append(result.cabin_id))
+        self.assertEqual(sorted(seen), ["101209", "101297", "404"])
+        by_id = {result.cabin_id: result for result in results}
+        self.assertEqual(by_id["404"].error, "Failed to fetch availability")
+        self.assertTrue(by_id["101297"].first_run)
+        self.assertEqual(len(timings), 12)
+
+        self.calendar = self.calendar + ["2022-01-08T00:00:00.000Z", "2022-01-09T00:00:00.000Z"]
+        results = pipeline.run(self.cabins)
+        by_id = {result.cabin_id: result for result in results}
+        self.assertFalse(by_id["101297"].first_run)
+        self.assertEqual(
+            [event.kind for event in by_id["101297"].events],
+            ["weekend_opened", "date_opened", "date_opened"],
+        )
+        self.assertEqual(
+            HistoryJournal("101209", self.history_dir).latest(), sorted(self.calendar)
+        )
+        self.assertGreater(pipeline.cycle_seconds, 0)
+
+    def test_one_sync_per_cycle(self):
+        """Test that a cycle syncs the history filesystem once and nothing else."""
+        pipeline = CheckPipeline(self._fetch, self.history_dir)
+        with mock.patch("dnt_core.snapshots.sync_filesystem") as sync, mock.patch("os.fsync") as fsync:
+            pipeline.run(self.cabins)
+        sync.assert_called_once_with(self.history_dir)
+        fsync.assert_not_called()
+        self.assertEqual(HistoryJournal("101297", self.history_dir).latest(), self.calendar)
+
+    def test_previous_calendar_from_warm_state(self):
+        """Test that the journal is only replayed when the saved calendar is out of date."""
+        state = WarmState(os.path.join(self.history_dir, "state.json"))
+        pipeline = CheckPipeline(self._fetch, self.history_dir, state=state)
+        for result in pipeline.run(self.cabins):
+            state.record(result)
+
+        replayed = []
+        original_latest = HistoryJournal.latest
+
+        def latest(journal):
+            replayed.append(journal.cabin_id)
+            return original_latest(journal)
+
+        HistoryJournal.latest = latest
+        try:
+            self.calendar = self.calendar + ["2022-01-10T00:00:00.000Z"]
+            by_id = {result.cabin_id: result for result in pipeline.run(self.cabins)}
+            self.assertEqual(replayed, [])
+            self.assertEqual([event.kind for event in by_id["101297"].events], ["date_opened"])
+
+            # Another process journaled a newer calendar: replay instead
+            later = datetime.datetime.now() + datetime.timedelta(minutes=5)
+            HistoryJournal("101209", self.history_dir).append([], later)
+            pipeline.run(self.cabins[2:])
+            self.assertEqual(replayed, ["101209"])
+        finally:
+            HistoryJournal.latest = original_latest
+
+    def test_errors_do_not_hang_or_lose_cabins(self):
+        """Test that bad cabin entries raise and failing hooks and sinks keep every result."""
+        pipeline = CheckPipeline(self._fetch, self.history_dir, fetch_workers=2, queue_size=1)
+        with self.assertRaises(KeyError):
+            pipeline.run(self.cabins + [{"navn": "No URL"}])
+
+        def broken(*args):
+            raise RuntimeError("broken")
+
+        pipeline.on_timing = broken
+        results = pipeline.run(self.cabins, sink=broken)
+        self.assertEqual(sorted(result.cabin_id for result in results), ["101209", "101297", "404"])
+        self.assertTrue(all(result.error.startswith("sink: ") for result in results))
+
+
+class TestRecording(unittest.TestCase):
+    """Test recording API responses and replaying them through the pipeline."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "responses.jsonl.gz")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _response(self, *days):
+        return {
+            "data": {
+                "availabilityList": [
+                    {"date": f"{day}T00:00:00.000Z", "products": [{"available": 1}]} for day in days
+                ]
+            }
+        }
+
+    def test_record_and_replay(self):
+        """Test that a replay reproduces the recorded cycles, events and times."""
+        start = datetime.datetime(2024, 1, 1, 12).timestamp()
+        with ResponseRecorder(self.path) as recorder:
+            recorder.record("1", "2024-01-01", "2024-12-31", self._response("2024-01-05"), start)
+            recorder.record("2", "2024-01-01", "2024-12-31", None, start + 1)
+        # A second session appends a new gzip member
+        with ResponseRecorder(self.path) as recorder:
+            recorder.record(
+                "1", "2024-01-01", "2024-12-31",
+                self._response("2024-01-05", "2024-01-06", "2024-01-07"), start + 3600,
+            )
+            recorder.record("2", "2024-01-01", "2024-12-31", self._response("2024-01-10"), start + 3601)
+
+        records = list(read_recording(self.path))
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[0][0], datetime.datetime(2024, 1, 1, 12))
+        self.assertEqual([len(cycle) for cycle in recorded_cycles(records)], [2, 2])
+
+        seen = []
+        history_dir = os.path.join(self.tmp.name, "history")
+        totals = replay_recording(self.path, history_dir, sink=seen.append, names={"1": "Stallen"})
+        self.assertEqual((totals["cycles"], totals["checks"], totals["failures"]), (2, 4, 1))
+        self.assertEqual({result.name for result in seen}, {"Stallen", "2"})
+        replayed = [result for result in seen[2:] if result.cabin_id == "1"][0]
+        self.assertEqual(replayed.checked_at, datetime.datetime(2024, 1, 1, 13))
+        self.assertEqual(
+            [event.kind for event in replayed.events],
+            ["weekend_opened", "date_opened", "date_opened"],
+        )
+        journal = HistoryJournal("1", history_dir)
+        self.assertEqual(len(journal.availability_at(datetime.datetime(2024, 1, 1, 12, 30))), 1)
+        self.assertEqual(len(journal.latest()), 3)
+
+    def test_truncated_recording(self):
+        """Test that a recording cut short is read up to its last complete record."""
+        with ResponseRecorder(self.path) as recorder:
+            for cabin_id in "123":
+                recorder.record(cabin_id, "2024-01-01", "2024-12-31", self._response("2024-01-05"))
+        with open(self.path, "rb") as f:
+            data = f.read()
+        with open(self.path, "wb") as f:
+            f.write(data[:-12])
+        self.assertEqual([record[1] for record in read_recording(self.path)], ["1", "2", "3"])
+
+    def _crashed_session(self, count):
+        """Record ``count`` responses and return the file as a crash would leave it."""
+        recorder = ResponseRecorder(self.path)
+        for number in range(count):
+            recorder.record(str(number), "2024-01-01", "2024-12-31", None, 1000 + number)
+        with open(self.path, "rb") as f:
+            crashed = f.read()
+        recorder.close()
+        return crashed
+
+    def test_append_after_crash(self):
+        """Test that records before and after a crashed session are all read."""
+        crashed = self._crashed_session(5)
+        with open(self.path, "wb") as f:
+            f.write(crashed)
+
+        with ResponseRecorder(self.path) as recorder:
+            recorder.record("5", "2024-01-01", "2024-12-31", None, 2000)
+            recorder.record("6", "2024-01-01", "2024-12-31", None, 2001)
+        self.assertEqual([record[1] for record in read_recording(self.path)], list("0123456"))
+
+        # Without the repair on open, readers still skip over the damaged member
+        later = os.path.join(self.tmp.name, "later.jsonl.gz")
+        with ResponseRecorder(later) as recorder:
+            recorder.record("7", "2024-01-01", "2024-12-31", None, 3000)
+        with open(later, "rb") as f:
+            complete = f.read()
+        with open(self.path, "wb") as f:
+            f.write(crashed + complete)
+        self.assertEqual([record[1] for record in read_recording(self.path)], list("012347"))
+
+    def test_paced_replay(self):
+        """Test that realtime replays wait for the recorded gaps, scaled by speed."""
+        with ResponseRecorder(self.path) as recorder:
+            recorder.record("1", "2024-01-01", "2024-12-31", None, 1000)
+            recorder.record("1", "2024-01-01", "2024-12-31", None, 1600)
+        waits = []
+        source = ReplaySource(self.path, realtime=True, speed=60, sleep=waits.append)
+        cycles = list(source.cycles())
+        self.assertEqual(len(cycles), 2)
+        self.assertEqual(len(waits), 1)
+        self.assertAlmostEqual(waits[0], 10, delta=0.5)
+
+
+class TestLeaseQueue(unittest.TestCase):
+    """Test the shared work queue."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "queue.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_each_cabin_claimed_once_per_interval(self):
+        """Test that two workers never hold the same cabin."""
+        first = LeaseQueue(self.path, lease_seconds=60)
+        second = LeaseQueue(self.path, lease_seconds=60)
+        first.sync(["A", "B"])
+
+        self.assertEqual(first.claim("w1", now=1000), "A")
+        self.assertEqual(second.claim("w2", now=1000), "B")
+        self.assertIsNone(second.claim("w2", now=1000))
+
+        self.assertTrue(first.complete("A", "w1", interval=3600, now=1010))
+        self.assertIsNone(second.claim("w2", now=1020))
+        self.assertEqual(first.seconds_until_due(now=1020), 40)
+        self.assertTrue(second.complete("B", "w2", interval=3600, now=1030))
+        self.assertEqual(second.claim("w2", now=4610), "A")
+
+        first.close()
+        second.close()
+
+    def test_expired_lease_taken_over(self):
+        """Test that a crashed worker's cabin is taken over after its lease."""
+        queue = LeaseQueue(self.path, lease_seconds=60)
+        queue.sync(["A"])
+
+        self.assertEqual(queue.claim("crashed", now=1000), "A")
+        self.assertIsNone(queue.claim("w2", now=1059))
+        self.assertEqual(queue.claim("w2", now=1061), "A")
+        self.assertFalse(queue.complete("A", "crashed", interval=3600, now=1070))
+        self.assertTrue(queue.complete("A", "w2", interval=3600, now=1070))
+
+        queue.sync(["B"])
+        self.assertEqual([row[0] for row in queue.status()], ["B"])
+        queue.close()
+
+
+class TestStateServer(unittest.TestCase):
+    """Test the local JSON API."""
+
+    def setUp(self):
+        self.cache = StateCache()
+        self.server = start_server(self.cache, port=0)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _get(self, path, headers=None):
+        request = urllib.request.Request(self.base_url + path, headers=headers or {})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.headers.get("ETag"), json.load(response)
+
+    def test_cabins_weekends_and_etag(self):
+        """Test state endpoints and conditional requests."""
+        weekend = ["2025-12-05T00:00:00.000Z", "2025-12-06T00:00:00.000Z", "2025-12-07T00:00:00.000Z"]
+        self.cache.update("101297", "Stallen", weekend)
+
+        status, etag, cabins = self._get("/cabins")
+        self.assertEqual(status, 200)
+        self.assertEqual(cabins[0]["dates"], weekend)
+        self.assertEqual(self._get("/weekends")[2], [{"cabin_id": "101297", "name": "Stallen", "friday": "2025-12-05"}])
+        self.assertEqual(self._get("/health")[2]["cabins"], 1)
+
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self._get("/cabins", {"If-None-Match": etag})
+        self.assertEqual(context.exception.code, 304)
+
+        # Health is live: no ETag, and uptime keeps moving without updates
+        self.cache.started -= 100
+        status, etag, health = self._get("/health", {"If-None-Match": '"1"'})
+        self.assertEqual((status, etag), (200, None))
+        self.assertGreaterEqual(health["uptime"], 100)
+
+    def test_health_reports_live_breaker_stats(self):
+        """Test that breaker failures show up without any cache update."""
+        self.cache.breakers = BreakerBoard(cabin_threshold=2)
+        self.assertEqual(self._get("/health")[2]["breakers"]["failures"], 0)
+        for _ in range(6):
+            if self.cache.breakers.allow("101297"):
+                self.cache.breakers.record("101297", False)
+
+        breakers = self._get("/health")[2]["breakers"]
+        self.assertEqual(breakers["failures"], 2)
+        self.assertEqual(breakers["skipped"], 4)
+        self.assertEqual(breakers["cabins"]["101297"]["state"], "open")
+
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self._get("/cabins/unknown")
+        self.assertEqual(context.exception.code, 404)
+
+    def test_long_poll_changes(self):
+        """Test that a waiting client is woken up by a new change."""
+        events = compute_events([], ["2025-12-05"])
+        timer = threading.Timer(0.1, self.cache.update, ("101297", "Stallen", ["2025-12-05"], events))
+        timer.start()
+        _, _, result = self._get("/changes?since=0&wait=5")
+        timer.join()
+
+        self.assertEqual(result["sequence"], 1)
+        self.assertEqual(
+            result["changes"][0]["events"],
+            [{"type": "date_opened", "date": "2025-12-05"}],
+        )
+        self.assertEqual(self._get("/changes?since=1")[2]["changes"], [])
+
+    def test_changes_after_restart(self):
+        """Test that a sequence number from before a restart does not block the client."""
+        self.cache.update("101297", "Stallen", ["2025-12-05"], compute_events([], ["2025-12-05"]))
+        start = time.monotonic()
+        _, _, result = self._get("/changes?since=40&wait=5")
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(result["sequence"], 1)
+        self.assertEqual([change["seq"] for change in result["changes"]], [1])
+
 
 if __name__ == "__main__":
     unittest.main()